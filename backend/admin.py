@@ -2,6 +2,7 @@ import csv
 import hmac
 import io
 import os
+import sqlite3
 import tempfile
 from datetime import datetime
 from functools import wraps
@@ -18,6 +19,7 @@ from flask import (
     url_for,
 )
 
+from backend.config import program_titles_store_path
 from backend.program_titles import ProgramTitles
 from backend.reporting import (
     ReportConfigurationError,
@@ -26,6 +28,7 @@ from backend.reporting import (
     install_template,
     template_export_enabled,
 )
+from backend.title_store import TitleStore
 
 
 admin_blueprint = Blueprint("admin", __name__)
@@ -111,6 +114,17 @@ def _install_program_titles(data: bytes, filename: str) -> None:
         os.replace(temporary_path, PROGRAM_TITLES_PATH)
         temporary_path = None
         ProgramTitles.reload_titles(str(PROGRAM_TITLES_PATH))
+        store_path = program_titles_store_path()
+        if store_path:
+            store = TitleStore(store_path)
+            try:
+                store.import_csv(str(PROGRAM_TITLES_PATH))
+            except sqlite3.Error as exc:
+                raise ReportConfigurationError(
+                    "Słownik zapisano, ale nie udało się go zaimportować do bazy tytułów."
+                ) from exc
+            finally:
+                store.close()
     finally:
         if temporary_path is not None:
             temporary_path.unlink(missing_ok=True)
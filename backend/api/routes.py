@@ -1,23 +1,30 @@
-from pathlib import Path
+from io import BytesIO
+import json
+import time
 from urllib.parse import quote
 import unicodedata
 
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, Response, request, jsonify, current_app
 from backend.config import DEFAULT_INSTALLATION_FILENAME, ScheduleConfig
+from backend.export_jobs import (
+    JOB_DONE,
+    ExportQueueFullError,
+    describe_export_error,
+    get_export_queue,
+)
 from backend.reporting import (
     POLISH_MONTHS,
     ReportSettingsStore,
     get_application_now,
     template_export_enabled,
 )
-from backend.schedule_scraper import ScheduleScraper
-import tempfile
-import os
-import shutil
+from backend.schedule_scraper import UPSTREAM_LIMITER, ScheduleScraper
 
 api_blueprint = Blueprint('api', __name__)
 
 XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+# Seconds between keep-alive comments on an idle event stream
+EVENT_STREAM_KEEPALIVE = 15
 
 
 def _xlsx_download_response(file_data: bytes, filename: str):
@@ -42,7 +49,8 @@ def _xlsx_download_response(file_data: bytes, filename: str):
 @api_blueprint.route('/health', methods=['GET'])
 def health_check():
     """Test endpoint to check if API is working"""
-    return jsonify({"status": "ok"})
+    # Time this process spent waiting for upstream request slots
+    return jsonify({"status": "ok", "upstream": UPSTREAM_LIMITER.stats()})
 
 @api_blueprint.route('/export-config', methods=['GET'])
 def export_config():
@@ -54,12 +62,12 @@ def export_config():
         "activityValue": settings.activity_value,
         "month": POLISH_MONTHS[now.month - 1],
         "year": now.year,
+        "exportEventsEnabled": get_export_queue().config.events_enabled,
     })
 
 @api_blueprint.route('/schedule', methods=['POST'])
 def get_schedule():
     """Main endpoint for downloading the schedule"""
-    temp_dir = None
     try:
         # Get and validate input data
         data = request.get_json()
@@ -78,53 +86,48 @@ def get_schedule():
                 "message": f"Brakujące pola: {', '.join(missing_fields)}"
             }), 400
 
-        # Create temporary directory
-        temp_dir = tempfile.mkdtemp()
-
-        # Create config
+        # Create config; the workbook is built in memory, so no output
+        # directory is used
         config = ScheduleConfig(
             username=data['username'],
             password=data['password'],
-            output_dir=temp_dir,
+            output_dir='',
             output_filename=DEFAULT_INSTALLATION_FILENAME,
             start_date=data['startDate'],
             end_date=data['endDate'],
             is_personal=data['isPersonal']
         )
 
+        if data.get('async'):
+            # Run the export in the background and let the browser poll for it
+            try:
+                job = get_export_queue().submit(config, ScheduleScraper)
+            except ExportQueueFullError as e:
+                return jsonify(describe_export_error(e)), 503
+            response = jsonify(job.to_dict())
+            response.status_code = 202
+            response.headers['Location'] = f"{request.path}/{job.id}"
+            return response
+
         try:
             # Get schedule
             scraper = ScheduleScraper(config)
-            download_filename = scraper.scrape_schedule()
+            output = BytesIO()
+            download_filename = scraper.scrape_schedule(output)
+            file_data = output.getvalue()
 
-            # Get file path
-            file_path = config.get_full_output_path()
-
-            # Check if file exists
-            if not os.path.exists(file_path):
+            # Check if the workbook was written
+            if not file_data:
                 return jsonify({
                     "title": "Błąd generowania pliku",
                     "message": "Nie udało się wygenerować pliku grafiku"
                 }), 500
 
-            # Return file and ensure it's closed after sending
-            file_data = Path(file_path).read_bytes()
             return _xlsx_download_response(file_data, download_filename)
 
         except Exception as e:
-            # Handle scraper specific errors
-            if hasattr(e, 'args') and isinstance(e.args[0], dict):
-                error_dict = e.args[0]
-                return jsonify({
-                    "title": error_dict.get('title', 'Błąd'),
-                    "message": error_dict.get('message', str(e))
-                }), 400
-
-            # Handle generic errors
-            return jsonify({
-                "title": "Błąd pobierania grafiku",
-                "message": str(e)
-            }), 400
+            # Handle scraper specific and generic errors
+            return jsonify(describe_export_error(e)), 400
 
     except Exception as e:
         # Handle unexpected errors
@@ -134,10 +137,98 @@ def get_schedule():
             "message": str(e)
         }), 500
 
-    finally:
-        # Clean up temporary directory if it exists
-        if temp_dir and os.path.exists(temp_dir):
-            try:
-                shutil.rmtree(temp_dir, ignore_errors=True)
-            except Exception as e:
-                current_app.logger.error(f"Failed to remove temporary directory: {e}")
+def _find_export_job(job_id: str):
+    job = get_export_queue().get(job_id)
+    if job is None:
+        return None, (jsonify({
+            "title": "Nie znaleziono zadania",
+            "message": "Zadanie pobierania grafiku nie istnieje lub wygasło. Spróbuj ponownie."
+        }), 404)
+    return job, None
+
+@api_blueprint.route('/schedule/<job_id>', methods=['GET'])
+def get_schedule_job(job_id):
+    """Report the progress of a background export
+
+    With `?since=<n>` the per-week events from index n on are included as `weeks`.
+    """
+    job, error_response = _find_export_job(job_id)
+    if error_response:
+        return error_response
+    status = job.to_dict()
+    since = request.args.get('since', type=int)
+    if since is not None:
+        status["weeks"] = job.events[max(0, since):]
+    return jsonify(status)
+
+@api_blueprint.route('/schedule/<job_id>/file', methods=['GET'])
+def get_schedule_job_file(job_id):
+    """Download the workbook of a finished background export"""
+    job, error_response = _find_export_job(job_id)
+    if error_response:
+        return error_response
+    if job.status != JOB_DONE:
+        return jsonify({
+            "title": "Grafik nie jest gotowy",
+            "message": "Plik grafiku nie został jeszcze wygenerowany."
+        }), 409
+    return _xlsx_download_response(job.data, job.filename)
+
+def _sse_message(event: str, data: dict, event_id: int | None = None) -> str:
+    message = f"event: {event}\n"
+    if event_id is not None:
+        message += f"id: {event_id}\n"
+    return message + f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@api_blueprint.route('/schedule/<job_id>/events', methods=['GET'])
+def get_schedule_job_events(job_id):
+    """Stream per-week progress of a background export as Server-Sent Events
+
+    The stream ends with the final job status, or with a `poll` event after
+    the configured maximum duration, so it does not hold a worker for a whole
+    long export; the client then polls the status endpoint.
+    """
+    queue = get_export_queue()
+    if not queue.config.events_enabled:
+        return jsonify({
+            "title": "Strumień postępu jest wyłączony",
+            "message": "Postęp pobierania grafiku jest dostępny przez odpytywanie statusu zadania."
+        }), 404
+    job, error_response = _find_export_job(job_id)
+    if error_response:
+        return error_response
+
+    # A reconnecting EventSource sends the id of the last week it received
+    try:
+        next_event = int(request.headers.get('Last-Event-ID', -1)) + 1
+    except ValueError:
+        next_event = 0
+
+    deadline = time.monotonic() + queue.config.event_stream_max_seconds
+
+    def stream():
+        nonlocal next_event
+        current = job
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                yield _sse_message('poll', current.to_dict())
+                return
+            events, current = queue.wait_for_events(
+                current, next_event, min(EVENT_STREAM_KEEPALIVE, remaining)
+            )
+            if current is None:
+                return
+            for event in events:
+                yield _sse_message('week', event, next_event)
+                next_event += 1
+            if current.finished:
+                yield _sse_message(current.status, current.to_dict())
+                return
+            if not events:
+                yield ": keep-alive\n\n"
+
+    response = Response(stream(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
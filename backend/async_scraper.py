@@ -0,0 +1,240 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import Executor
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, BinaryIO, Callable, Optional
+
+import httpx
+
+from backend.config import ScheduleConfig, ScraperConfig
+from backend.parse_pool import parse_week_rows
+from backend.retry import ExportRetries
+from backend.schedule_scraper import (
+    CIRCUIT_BREAKER,
+    INVALID_CREDENTIALS_ERROR,
+    INVALID_CREDENTIALS_TEXT,
+    SCHEDULE_FETCH_ERROR,
+    UPSTREAM_LIMITER,
+    LoginError,
+    ScheduleFetchError,
+    WeekCacheLookup,
+    is_login_page_url,
+    report_week,
+    save_rows,
+    schedule_page_url,
+    week_fetch_error,
+    week_start_dates,
+)
+
+
+class AsyncScheduleScraper:
+    """asyncio counterpart of ScheduleScraper with the same scrape_schedule contract
+
+    Weeks are fetched concurrently over one keep-alive httpx.AsyncClient, so a
+    single event loop can multiplex many weeks and many users' exports
+    without a thread per request. Parsing runs in `executor` (the loop's
+    default executor when omitted) and overlaps with later weeks still being
+    fetched. The on-disk week cache, retry decisions, circuit breaker and
+    upstream limiter are shared with ScheduleScraper; the session pool, export
+    coalescing and shared parsed-week cache are thread-based and apply to
+    ScheduleScraper only.
+    """
+
+    def __init__(self, schedule_config: ScheduleConfig, executor: Optional[Executor] = None):
+        self.config = ScraperConfig()
+        self.schedule_config = schedule_config
+        self.executor = executor
+        self.client = httpx.AsyncClient(timeout=self.config.request_timeout, follow_redirects=True)
+        self.__login_lock = asyncio.Lock()
+        self.__login_generation = 0
+        self.__retries = ExportRetries(self.config, CIRCUIT_BREAKER)
+        # Token of the half-open probe, when this export holds it
+        self.__probe = None
+
+    @asynccontextmanager
+    async def __upstream_slot(self) -> AsyncIterator[None]:
+        """Wait for the process-wide limiter in a thread, keeping the event loop free"""
+        slot = UPSTREAM_LIMITER.slot(
+            self.config.upstream_max_in_flight,
+            self.config.upstream_rate,
+            self.config.upstream_burst,
+            self.config.upstream_lock_dir,
+        )
+        acquire = asyncio.ensure_future(asyncio.to_thread(slot.__enter__))
+        try:
+            await asyncio.shield(acquire)
+        except asyncio.CancelledError:
+            # The thread still gets the slot; give it back as soon as it does
+            acquire.add_done_callback(
+                lambda done: done.exception() is None and slot.__exit__(None, None, None)
+            )
+            raise
+        try:
+            yield
+        finally:
+            slot.__exit__(None, None, None)
+
+    async def __request(self, method: str, url: str, **options) -> httpx.Response:
+        async with self.__upstream_slot():
+            return await self.client.request(method, url, **options)
+
+    def __check_circuit(self) -> None:
+        if CIRCUIT_BREAKER.is_open(self.__probe):
+            raise ScheduleFetchError(SCHEDULE_FETCH_ERROR)
+
+    async def __login(self) -> bool:
+        """Perform login to the system"""
+        self.__check_circuit()
+        payload = {
+            'username': self.schedule_config.username,
+            'password': self.schedule_config.password
+        }
+        try:
+            response = await self.__request('POST', self.config.login_url, data=payload)
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            self.__retries.record_login_error(e)
+            logging.error(f"Login error: {e}")
+            return False
+
+        if INVALID_CREDENTIALS_TEXT in response.text:
+            logging.error("Invalid credentials")
+            return False
+
+        logging.info("Login successful")
+        return True
+
+    async def __relogin(self, seen_generation: int) -> None:
+        """Log in again after the session expired, once for all concurrently fetched weeks"""
+        async with self.__login_lock:
+            if self.__login_generation != seen_generation:
+                return  # Another week already renewed the session
+            logging.info("Login session expired, logging in again")
+            if not await self.__login():
+                raise LoginError(INVALID_CREDENTIALS_ERROR)
+            self.__login_generation += 1
+
+    async def __get(self, url: str, headers: dict) -> httpx.Response:
+        """GET a page, logging in again if the session expired and retrying transient failures"""
+        retry_number = 0
+        while True:
+            timeout = self.__retries.request_timeout()
+            if timeout is None:
+                raise httpx.TimeoutException("Export deadline exceeded")
+
+            self.__check_circuit()
+            login_generation = self.__login_generation
+            try:
+                response = await self.__request('GET', url, headers=headers, timeout=timeout)
+                if is_login_page_url(self.config, str(response.url)):
+                    await self.__relogin(login_generation)
+                    response = await self.__request('GET', url, headers=headers, timeout=timeout)
+                # httpx also raises for 304, which answers a revalidated cached week
+                if response.is_error:
+                    response.raise_for_status()
+                self.__retries.record_success()
+                return response
+            except httpx.HTTPError as e:
+                delay = self.__retries.retry_delay(e, retry_number)
+                if delay is None:
+                    raise
+                logging.warning(f"Retrying in {delay:.1f} s after request error: {e}")
+                await asyncio.sleep(delay)
+                retry_number += 1
+
+    async def __fetch_schedule(self, date: str) -> str:
+        """Fetch schedule HTML content for a specific date, using the week cache when possible"""
+        schedule_url = schedule_page_url(self.config, self.schedule_config.is_personal, date)
+
+        lookup = await asyncio.to_thread(WeekCacheLookup.open, self.config, self.schedule_config, date)
+        if lookup.fresh_html is not None:
+            logging.info(f"Using cached schedule for week starting {date}")
+            return lookup.fresh_html
+
+        logging.info(f"Fetching schedule for week starting {date}")
+        try:
+            response = await self.__get(schedule_url, lookup.request_headers())
+        except httpx.HTTPError as e:
+            logging.error(f"Error fetching schedule for date {date}: {e}")
+            raise week_fetch_error(date) from e
+        return await asyncio.to_thread(lookup.html_from_response, response)
+
+    async def scrape_schedule(
+        self,
+        output: Optional[BinaryIO] = None,
+        progress: Optional[Callable[[int, int], None]] = None,
+        on_week: Optional[Callable[[dict], None]] = None,
+    ) -> str:
+        """Log in, fetch and parse every week in the range and save the workbook
+
+        Arguments and result are those of ScheduleScraper.scrape_schedule.
+        """
+        admission = CIRCUIT_BREAKER.allow(self.config.circuit_reset_timeout)
+        if not admission:
+            logging.warning("GPT circuit breaker is open, failing fast")
+            raise ScheduleFetchError(SCHEDULE_FETCH_ERROR)
+        self.__probe = admission.probe
+        try:
+            async with self.client:
+                return await self.__scrape_schedule(output, progress, on_week)
+        finally:
+            CIRCUIT_BREAKER.release_probe(self.__probe)
+
+    async def __scrape_schedule(
+        self,
+        output: Optional[BinaryIO],
+        progress: Optional[Callable[[int, int], None]],
+        on_week: Optional[Callable[[dict], None]],
+    ) -> str:
+        self.__retries = ExportRetries(self.config, CIRCUIT_BREAKER)
+        if not await self.__login():
+            logging.error("Login failed")
+            raise LoginError(INVALID_CREDENTIALS_ERROR)
+
+        dates = week_start_dates(self.schedule_config.start_date, self.schedule_config.end_date)
+        loop = asyncio.get_running_loop()
+        concurrency = asyncio.Semaphore(max(1, self.config.fetch_workers))
+
+        async def fetch(date: str) -> tuple[str, float]:
+            async with concurrency:
+                started = time.perf_counter()
+                html_content = await self.__fetch_schedule(date)
+                return html_content, time.perf_counter() - started
+
+        # All weeks are requested up front; they are parsed in date order as
+        # soon as each one arrives
+        fetches = [asyncio.create_task(fetch(date)) for date in dates]
+        # Weeks are parsed one after another, so they can share resolved titles
+        title_cache = {}
+        all_data = []
+        try:
+            if progress:
+                progress(0, len(dates))
+            for index, (date, week_fetch) in enumerate(zip(dates, fetches), start=1):
+                html_content, fetch_seconds = await week_fetch
+                parse_started = time.perf_counter()
+                week_data = []
+                if html_content:
+                    week_data = await loop.run_in_executor(
+                        self.executor, parse_week_rows,
+                        html_content, self.schedule_config, self.config.parser, title_cache,
+                    )
+                    all_data.extend(week_data)
+                else:
+                    logging.error(f"Failed to fetch schedule for week starting {date}")
+                report_week(
+                    date, index, len(dates), bool(html_content), len(week_data),
+                    fetch_seconds, time.perf_counter() - parse_started, progress, on_week,
+                )
+        finally:
+            for week_fetch in fetches:
+                week_fetch.cancel()
+            await asyncio.gather(*fetches, return_exceptions=True)
+
+        if not all_data:
+            logging.error("No schedule data was fetched")
+            raise ScheduleFetchError(SCHEDULE_FETCH_ERROR)
+
+        # The output object belongs to this process, so saving always uses a thread
+        return await asyncio.to_thread(save_rows, all_data, self.schedule_config, output)
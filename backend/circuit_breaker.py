@@ -0,0 +1,101 @@
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Optional
+
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+
+@dataclass(frozen=True)
+class Admission:
+    """Answer of CircuitBreaker.allow, true when the operation may start"""
+    allowed: bool
+    # Token of the half-open probe, when the caller became it
+    probe: Optional[str] = None
+
+    def __bool__(self) -> bool:
+        return self.allowed
+
+
+class CircuitBreaker:
+    """Process-wide breaker that stops calling an upstream that keeps failing
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    callers are refused for `reset_timeout` seconds. The first caller after
+    that becomes the probe (half-open): its success closes the circuit, its
+    failure opens it again. Operations already running when the circuit
+    left the closed state stop at their next request, so while half-open only
+    the probe reaches upstream. Thresholds are passed per call so they can
+    come from configuration read after this object was created.
+    """
+
+    def __init__(self):
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def allow(self, reset_timeout: float) -> Admission:
+        """Check whether a new operation may start, claiming the probe when half-open"""
+        with self._lock:
+            if self._state == OPEN:
+                if time.monotonic() - self._opened_at < reset_timeout:
+                    return Admission(False)
+                self._state = HALF_OPEN
+            if self._state == HALF_OPEN:
+                if self._probe is not None:
+                    return Admission(False)
+                self._probe = uuid.uuid4().hex
+                return Admission(True, self._probe)
+            return Admission(True)
+
+    def is_open(self, probe: Optional[str] = None) -> bool:
+        """Check whether requests of an operation already running should stop
+
+        While half-open only the operation holding `probe` may continue.
+        """
+        with self._lock:
+            if self._state == HALF_OPEN:
+                return probe is None or probe != self._probe
+            return self._state == OPEN
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._probe = None
+
+    def record_failure(self, failure_threshold: int) -> None:
+        if failure_threshold < 1:
+            return
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= failure_threshold:
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self._probe = None
+
+    def release_probe(self, probe: Optional[str]) -> None:
+        """Let another caller probe when the probe finished without reaching upstream
+
+        Does nothing unless `probe` is the token of the current probe.
+        """
+        with self._lock:
+            if probe is not None and probe == self._probe:
+                self._probe = None
+
+    def reset(self) -> None:
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._probe = None
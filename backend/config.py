@@ -1,12 +1,44 @@
 import os
 from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Optional
+
 from backend.program_titles import ProgramTitles
-from backend.reporting import template_export_enabled
+from backend.reporting import INSTANCE_DIR, template_export_enabled
+from backend.title_store import TitleStore, get_title_store
 
 
 DEFAULT_INSTALLATION_FILENAME = "grafik_montazy.xlsx"
 
+
+def _env_flag(name: str, default: bool) -> bool:
+    value = os.environ.get(name, "").strip().lower()
+    if not value:
+        return default
+    return value not in {"0", "false", "no", "off"}
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, "").strip() or default)
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, "").strip() or default)
+    except ValueError:
+        return default
+
+
+def program_titles_store_path() -> Optional[str]:
+    """SQLite program titles store, when enabled instead of the in-memory dictionary"""
+    if not _env_flag('PROGRAM_TITLES_STORE', False):
+        return None
+    return str(INSTANCE_DIR / 'program_titles.sqlite3')
+
+
 @dataclass
 class ScheduleConfig:
     # Authentication data
@@ -25,6 +57,12 @@ class ScheduleConfig:
 
     # Program titles file
     program_titles_csv: str = os.path.join(os.path.dirname(__file__), "data", "program_titles.csv")
+    # Seconds between checks whether the titles file changed
+    program_titles_check_interval: float = field(
+        default_factory=lambda: _env_float('PROGRAM_TITLES_CHECK_INTERVAL', 5.0)
+    )
+    # Titles looked up in this SQLite store, imported from the CSV file
+    program_titles_db: Optional[str] = field(default_factory=program_titles_store_path)
 
 
     def get_full_output_path(self) -> Path:
@@ -32,7 +70,13 @@ class ScheduleConfig:
 
     def get_program_titles_dict(self) -> dict:
         """Get program titles using singleton"""
-        return ProgramTitles().get_titles(self.program_titles_csv)
+        return ProgramTitles().get_titles(self.program_titles_csv, self.program_titles_check_interval)
+
+    def get_program_titles_store(self) -> Optional[TitleStore]:
+        """Get the program titles store, or None to use the dictionary"""
+        if not self.program_titles_db:
+            return None
+        return get_title_store(self.program_titles_db, self.program_titles_csv, self.program_titles_check_interval)
 
 @dataclass
 class ScraperConfig:
@@ -40,6 +84,87 @@ class ScraperConfig:
     login_url: str = 'https://gpt.canalplus.pl/Account/Login'
     general_schedule_url: str = 'https://gpt.canalplus.pl/Schedule/Editing'
     personal_schedule_url: str = 'https://gpt.canalplus.pl/User/Schedule'
-    parser: str = 'html.parser'
+    # BeautifulSoup parser name, 'lxml' for the faster lxml.html backend or
+    # 'lxml-stream' for incremental row-by-row parsing
+    parser: str = field(default_factory=lambda: os.environ.get('SCHEDULE_PARSER', 'html.parser'))
     encoding: str = 'utf-8'
     request_timeout: int = 30
+    # Number of weeks fetched in parallel over the shared, logged-in session
+    fetch_workers: int = 4
+    # Worker processes parsing fetched weeks for all exports of a process
+    # (0 parses in the exporting thread)
+    parse_workers: int = field(default_factory=lambda: _env_int('SCHEDULE_PARSE_WORKERS', 0))
+
+    # Retries of failed week requests with jittered exponential backoff
+    retry_attempts: int = field(default_factory=lambda: _env_int('SCHEDULE_RETRY_ATTEMPTS', 3))
+    retry_base_delay: float = 0.5
+    retry_max_delay: float = 10.0
+    # Retries and seconds one export may spend in total before giving up
+    retry_budget: int = field(default_factory=lambda: _env_int('SCHEDULE_RETRY_BUDGET', 8))
+    export_deadline: int = field(default_factory=lambda: _env_int('SCHEDULE_EXPORT_DEADLINE', 180))
+
+    # Requests to GPT from all exports of a process: at most this many at once
+    # (0 = unlimited) and at most `upstream_rate` per second with bursts of
+    # `upstream_burst` (rate 0 = unlimited)
+    upstream_max_in_flight: int = field(default_factory=lambda: _env_int('SCHEDULE_UPSTREAM_MAX_IN_FLIGHT', 8))
+    upstream_rate: float = field(default_factory=lambda: _env_float('SCHEDULE_UPSTREAM_RATE', 5.0))
+    upstream_burst: int = field(default_factory=lambda: _env_int('SCHEDULE_UPSTREAM_BURST', 10))
+    # Lock directory that extends these limits to all worker processes
+    upstream_lock_dir: str | None = field(
+        default_factory=lambda: str(INSTANCE_DIR / 'upstream') if _env_flag('SCHEDULE_UPSTREAM_SHARED', False) else None
+    )
+
+    # Consecutive upstream failures that open the circuit breaker (0 disables it)
+    circuit_failure_threshold: int = field(default_factory=lambda: _env_int('SCHEDULE_CIRCUIT_FAILURES', 5))
+    # Seconds exports fail fast before a probe request is let through
+    circuit_reset_timeout: int = field(default_factory=lambda: _env_int('SCHEDULE_CIRCUIT_RESET', 30))
+
+    # Logged-in sessions kept per credentials and reused across exports
+    session_pool_size: int = field(default_factory=lambda: _env_int('SCHEDULE_SESSION_POOL_SIZE', 32))
+    # Seconds a pooled session may stay idle before it is logged in again
+    session_ttl: int = field(default_factory=lambda: _env_int('SCHEDULE_SESSION_TTL', 900))
+
+    # On-disk cache of fetched weeks
+    week_cache_enabled: bool = field(default_factory=lambda: _env_flag('SCHEDULE_CACHE', True))
+    week_cache_dir: str = str(INSTANCE_DIR / 'schedule_cache')
+    # Seconds before a week that may still change is revalidated upstream
+    week_cache_ttl: int = field(default_factory=lambda: _env_int('SCHEDULE_CACHE_TTL', 600))
+    # Weeks that ended this many days ago are closed and cached permanently
+    week_cache_closed_after_days: int = field(
+        default_factory=lambda: _env_int('SCHEDULE_CACHE_CLOSED_AFTER_DAYS', 35)
+    )
+    # Days after which cached weeks nobody requested are deleted (0 keeps them)
+    week_cache_max_age_days: int = field(default_factory=lambda: _env_int('SCHEDULE_CACHE_MAX_AGE_DAYS', 90))
+
+    # Parsed general-schedule weeks shared by all worker processes
+    shared_week_cache_enabled: bool = field(
+        default_factory=lambda: _env_flag('SCHEDULE_SHARED_CACHE', _env_flag('SCHEDULE_CACHE', True))
+    )
+    shared_week_cache_path: str = str(INSTANCE_DIR / 'parsed_weeks.sqlite3')
+    # Seconds before parsed rows of a week that may still change are refreshed
+    shared_week_cache_ttl: int = field(default_factory=lambda: _env_int('SCHEDULE_SHARED_CACHE_TTL', 300))
+    # Seconds other workers wait for the worker refreshing a week
+    shared_week_lease_seconds: int = 60
+    # Days after which parsed weeks that were not refreshed are deleted (0 keeps them)
+    shared_week_cache_max_age_days: int = field(
+        default_factory=lambda: _env_int('SCHEDULE_SHARED_CACHE_MAX_AGE_DAYS', 90)
+    )
+
+
+@dataclass
+class ExportJobConfig:
+    # Exports run at the same time in the background; further jobs wait in the queue
+    workers: int = field(default_factory=lambda: _env_int('SCHEDULE_EXPORT_WORKERS', 2))
+    # Jobs accepted but not yet finished; new jobs are rejected above this
+    max_pending: int = field(default_factory=lambda: _env_int('SCHEDULE_EXPORT_MAX_PENDING', 20))
+    # Seconds a finished job and its workbook stay available for download
+    result_ttl: int = field(default_factory=lambda: _env_int('SCHEDULE_EXPORT_RESULT_TTL', 600))
+    # Per-week progress streamed as Server-Sent Events; each open stream holds a
+    # server worker, so the form polls unless this is enabled
+    events_enabled: bool = field(default_factory=lambda: _env_flag('SCHEDULE_EXPORT_EVENTS', False))
+    # Seconds after which an event stream is closed and the client polls instead
+    event_stream_max_seconds: int = field(
+        default_factory=lambda: _env_int('SCHEDULE_EXPORT_EVENT_STREAM_MAX_SECONDS', 60)
+    )
+    # Job states and workbooks readable by every worker process
+    store_path: str = str(INSTANCE_DIR / 'export_jobs.sqlite3')
@@ -0,0 +1,344 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from io import BytesIO
+from pathlib import Path
+from typing import Callable, Optional
+
+from backend.config import ExportJobConfig, ScheduleConfig
+from backend.sqlite_connections import get_connections
+
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    completed_weeks INTEGER NOT NULL,
+    total_weeks INTEGER NOT NULL,
+    filename TEXT NOT NULL,
+    data BLOB NOT NULL,
+    error TEXT,
+    pid INTEGER NOT NULL,
+    finished_at REAL
+);
+CREATE TABLE IF NOT EXISTS job_events (
+    job_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    event TEXT NOT NULL,
+    PRIMARY KEY (job_id, position)
+);
+"""
+
+INTERRUPTED_ERROR = {
+    "title": "Przerwane pobieranie",
+    "message": "Pobieranie grafiku zostało przerwane. Spróbuj ponownie.",
+}
+# Seconds between store reads while following a job of another process
+STORE_POLL_INTERVAL = 0.5
+
+
+class ExportQueueFullError(Exception):
+    """Raised when too many exports are waiting to be processed"""
+    pass
+
+
+def describe_export_error(error: Exception) -> dict:
+    """Turn a scraper exception into the title/message payload shown to the user"""
+    if error.args and isinstance(error.args[0], dict):
+        details = error.args[0]
+        return {
+            "title": details.get('title', 'Błąd'),
+            "message": details.get('message', str(error)),
+        }
+    return {"title": "Błąd pobierania grafiku", "message": str(error)}
+
+
+@dataclass
+class ExportJob:
+    id: str
+    status: str = JOB_QUEUED
+    completed_weeks: int = 0
+    total_weeks: int = 0
+    filename: str = ''
+    data: bytes = b''
+    error: Optional[dict] = None
+    finished_at: Optional[float] = None
+    # Per-week progress events, in the order the weeks were processed
+    events: list[dict] = field(default_factory=list)
+    _changed: threading.Condition = field(default_factory=threading.Condition, repr=False, compare=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (JOB_DONE, JOB_FAILED)
+
+    def update(self, **changes) -> None:
+        """Change job attributes and wake up anyone waiting for events"""
+        with self._changed:
+            for name, value in changes.items():
+                setattr(self, name, value)
+            self._changed.notify_all()
+
+    def add_event(self, event: dict) -> int:
+        """Append a progress event and return its position"""
+        with self._changed:
+            self.events.append(event)
+            self._changed.notify_all()
+            return len(self.events) - 1
+
+    def wait_for_events(self, start: int, timeout: float) -> tuple[list[dict], bool]:
+        """Return events from index `start` on and whether the job has finished
+
+        Blocks for up to `timeout` seconds while there is nothing new. When the
+        job is reported as finished, all of its events are included.
+        """
+        with self._changed:
+            self._changed.wait_for(lambda: len(self.events) > start or self.finished, timeout)
+            return self.events[start:], self.finished
+
+    def to_dict(self) -> dict:
+        """Public job status, without the workbook itself"""
+        status = {
+            "jobId": self.id,
+            "status": self.status,
+            "completedWeeks": self.completed_weeks,
+            "totalWeeks": self.total_weeks,
+        }
+        if self.status == JOB_DONE:
+            status["filename"] = self.filename
+        if self.error:
+            status.update(self.error)
+        return status
+
+
+def _process_alive(pid: int) -> bool:
+    if os.name != 'posix':
+        return True  # os.kill would terminate the process on Windows
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class ExportJobStore:
+    """State, progress events and workbooks of export jobs shared by all worker processes
+
+    A job runs in the process that accepted it, which writes every change
+    here, so status, event and download requests can be answered by any
+    process. Finished jobs are kept for `result_ttl` seconds. An unfinished
+    job whose process no longer exists is reported as failed. Database
+    errors are logged and leave the job visible only to its own process.
+    """
+
+    def __init__(self, path: str, result_ttl: int):
+        self.path = Path(path)
+        self.result_ttl = result_ttl
+        self._connections = get_connections(path, SCHEMA)
+
+    def save(self, job: ExportJob) -> None:
+        """Write the current state of a job run by this process"""
+        try:
+            self._connections.get().execute(
+                "INSERT OR REPLACE INTO jobs (id, status, completed_weeks, total_weeks, filename, data, error, pid,"
+                " finished_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    job.id, job.status, job.completed_weeks, job.total_weeks, job.filename, job.data,
+                    json.dumps(job.error, ensure_ascii=False) if job.error else None,
+                    os.getpid(), job.finished_at,
+                ),
+            )
+        except sqlite3.Error as e:
+            logging.warning(f"Failed to save export job {job.id}: {e}")
+
+    def add_event(self, job_id: str, position: int, event: dict) -> None:
+        try:
+            self._connections.get().execute(
+                "INSERT OR REPLACE INTO job_events (job_id, position, event) VALUES (?, ?, ?)",
+                (job_id, position, json.dumps(event, ensure_ascii=False)),
+            )
+        except sqlite3.Error as e:
+            logging.warning(f"Failed to save progress of export job {job_id}: {e}")
+
+    def load(self, job_id: str) -> Optional[ExportJob]:
+        """Return a snapshot of the job, or None if it is unknown or has expired"""
+        try:
+            connection = self._connections.get()
+            row = connection.execute(
+                "SELECT status, completed_weeks, total_weeks, filename, data, error, pid, finished_at"
+                " FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+            events = [
+                json.loads(event) for event, in connection.execute(
+                    "SELECT event FROM job_events WHERE job_id = ? ORDER BY position", (job_id,)
+                )
+            ]
+        except sqlite3.Error as e:
+            logging.warning(f"Export job store unavailable: {e}")
+            return None
+
+        if row is None:
+            return None
+        status, completed_weeks, total_weeks, filename, data, error, pid, finished_at = row
+        if finished_at is not None and finished_at < time.time() - self.result_ttl:
+            return None
+        job = ExportJob(
+            id=job_id,
+            status=status,
+            completed_weeks=completed_weeks,
+            total_weeks=total_weeks,
+            filename=filename,
+            data=data,
+            error=json.loads(error) if error else None,
+            finished_at=finished_at,
+            events=events,
+        )
+        if not job.finished and not _process_alive(pid):
+            job.status = JOB_FAILED
+            job.error = INTERRUPTED_ERROR
+        return job
+
+    def prune(self) -> None:
+        """Delete expired jobs and jobs of processes that no longer exist"""
+        try:
+            with self._connections.transaction() as connection:
+                connection.execute(
+                    "DELETE FROM jobs WHERE finished_at < ?", (time.time() - self.result_ttl,)
+                )
+                for pid, in connection.execute(
+                    "SELECT DISTINCT pid FROM jobs WHERE finished_at IS NULL"
+                ).fetchall():
+                    if not _process_alive(pid):
+                        connection.execute("DELETE FROM jobs WHERE pid = ? AND finished_at IS NULL", (pid,))
+                connection.execute("DELETE FROM job_events WHERE job_id NOT IN (SELECT id FROM jobs)")
+        except sqlite3.Error as e:
+            logging.warning(f"Failed to prune export job store: {e}")
+
+
+class ExportJobQueue:
+    """Runs schedule exports on a bounded thread pool and keeps their results
+
+    A job runs in the process that accepted it. Its state, progress events
+    and workbook are also written to the shared ExportJobStore, so the
+    follow-up requests may reach any worker process.
+    """
+
+    def __init__(self, config: Optional[ExportJobConfig] = None):
+        self.config = config or ExportJobConfig()
+        self._jobs: dict[str, ExportJob] = {}
+        self._store = ExportJobStore(self.config.store_path, self.config.result_ttl)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, self.config.workers),
+            thread_name_prefix='schedule-export',
+        )
+
+    def submit(self, schedule_config: ScheduleConfig, scraper_factory: Callable) -> ExportJob:
+        """Queue an export and return its job immediately"""
+        with self._lock:
+            self._prune()
+            pending = sum(not job.finished for job in self._jobs.values())
+            if pending >= self.config.max_pending:
+                raise ExportQueueFullError({
+                    "title": "Serwer jest zajęty",
+                    "message": "Zbyt wiele grafików jest obecnie pobieranych. Spróbuj ponownie za chwilę.",
+                })
+            job = ExportJob(id=uuid.uuid4().hex)
+            self._jobs[job.id] = job
+        self._store.prune()
+        self._store.save(job)
+        self._executor.submit(self._run, job, schedule_config, scraper_factory)
+        return job
+
+    def get(self, job_id: str) -> Optional[ExportJob]:
+        """Return a job of this process, or a snapshot of one run by another process"""
+        with self._lock:
+            self._prune()
+            job = self._jobs.get(job_id)
+        return job if job is not None else self._store.load(job_id)
+
+    def wait_for_events(self, job: ExportJob, start: int, timeout: float) -> tuple[list[dict], Optional[ExportJob]]:
+        """Return events from index `start` on and the current state of the job
+
+        Like ExportJob.wait_for_events, but also follows jobs run by other
+        processes by polling the store. The job is None once it has expired.
+        """
+        with self._lock:
+            local_job = self._jobs.get(job.id)
+        if local_job is not None:
+            events, _ = local_job.wait_for_events(start, timeout)
+            return events, local_job
+
+        deadline = time.monotonic() + timeout
+        while True:
+            current = self._store.load(job.id)
+            if current is None or len(current.events) > start or current.finished or time.monotonic() >= deadline:
+                return (current.events[start:] if current else []), current
+            time.sleep(STORE_POLL_INTERVAL)
+
+    def _update(self, job: ExportJob, **changes) -> None:
+        job.update(**changes)
+        self._store.save(job)
+
+    def _add_event(self, job: ExportJob, event: dict) -> None:
+        self._store.add_event(job.id, job.add_event(event), event)
+
+    def _run(self, job: ExportJob, schedule_config: ScheduleConfig, scraper_factory: Callable) -> None:
+        self._update(job, status=JOB_RUNNING)
+
+        def report_progress(completed_weeks: int, total_weeks: int) -> None:
+            self._update(job, completed_weeks=completed_weeks, total_weeks=total_weeks)
+
+        try:
+            output = BytesIO()
+            filename = scraper_factory(schedule_config).scrape_schedule(
+                output, progress=report_progress, on_week=partial(self._add_event, job)
+            )
+            data = output.getvalue()
+            if not data:
+                raise RuntimeError({
+                    "title": "Błąd generowania pliku",
+                    "message": "Nie udało się wygenerować pliku grafiku",
+                })
+        except Exception as e:
+            logging.error(f"Export job {job.id} failed: {e}")
+            self._update(job, error=describe_export_error(e), status=JOB_FAILED, finished_at=time.time())
+        else:
+            self._update(job, filename=filename, data=data, status=JOB_DONE, finished_at=time.time())
+
+    def _prune(self) -> None:
+        """Forget finished jobs whose results have expired; the lock must be held"""
+        cutoff = time.time() - self.config.result_ttl
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+_export_queue: Optional[ExportJobQueue] = None
+_export_queue_lock = threading.Lock()
+
+
+def get_export_queue() -> ExportJobQueue:
+    """Return the process-wide export queue, created on first use so .env is already loaded"""
+    global _export_queue
+    with _export_queue_lock:
+        if _export_queue is None:
+            _export_queue = ExportJobQueue()
+        return _export_queue
@@ -0,0 +1,125 @@
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import replace
+from typing import Optional
+
+from backend.config import ScheduleConfig
+from backend.program_titles import ProgramTitles
+from backend.schedule_entry import ScheduleEntry
+from backend.schedule_parser import ScheduleParser
+
+
+def rows_to_tuples(rows: list) -> list:
+    """Pack parsed entries into tuples, which are much cheaper to pickle"""
+    return [entry.as_tuple() for entry in rows]
+
+
+def rows_from_tuples(rows: list) -> list:
+    """Unpack row tuples into schedule entries"""
+    return [ScheduleEntry(*row) for row in rows]
+
+
+def parse_week_rows(
+    html_content: str,
+    schedule_config: ScheduleConfig,
+    parser_name: str,
+    title_cache: Optional[dict] = None,
+) -> list:
+    """Parse one fetched week page into schedule rows
+
+    `title_cache` holds the titles already resolved by the export, so
+    descriptions repeated in later weeks are not looked up again.
+    """
+    parser = ScheduleParser(html_content, schedule_config, parser_name, title_cache)
+    parser.parse_schedule()
+    return parser.get_parsed_data()
+
+
+def parse_week_tuples(html_content: str, schedule_config: ScheduleConfig, parser_name: str) -> list:
+    """Parse one week page in a worker process, returning compact row tuples"""
+    return rows_to_tuples(parse_week_rows(html_content, schedule_config, parser_name))
+
+
+def _warm_worker(program_titles_csv: str, use_title_store: bool) -> None:
+    # Load the titles once per worker instead of in the first parsed week;
+    # the SQLite store needs nothing in memory
+    if not use_title_store:
+        ProgramTitles().get_titles(program_titles_csv)
+
+
+class ParsePool:
+    """Worker processes that parse fetched weeks for all exports of a process
+
+    Parsing is CPU-bound and holds the GIL, so concurrent exports in one
+    application process would otherwise take turns. The executor is started
+    on first use, sized by that call, and reused by later exports. Workers
+    are spawned rather than forked, because the application process runs
+    threads.
+    """
+
+    def __init__(self):
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def submit(self, html_content: str, schedule_config: ScheduleConfig, parser_name: str, workers: int) -> Future:
+        """Start parsing a week; the future resolves to schedule entries
+
+        With `workers` below 1 the week is parsed right away in the calling
+        thread. If a worker process dies, the week is parsed locally and the
+        pool is started again for the next one.
+        """
+        result = Future()
+        executor = self.__executor(workers, schedule_config) if workers > 0 else None
+        if executor is None:
+            result.set_result(parse_week_rows(html_content, schedule_config, parser_name))
+            return result
+
+        try:
+            # Workers only need the schedule type and the titles file, not the credentials
+            task = executor.submit(
+                parse_week_tuples, html_content, replace(schedule_config, password=''), parser_name
+            )
+        except (BrokenProcessPool, RuntimeError):
+            logging.error("Parse worker processes are unavailable, parsing the week locally")
+            self.shutdown(executor)
+            result.set_result(parse_week_rows(html_content, schedule_config, parser_name))
+            return result
+
+        def finish(task: Future) -> None:
+            try:
+                result.set_result(rows_from_tuples(task.result()))
+            except BrokenProcessPool:
+                logging.error("Parse worker process died, parsing the week locally")
+                self.shutdown(executor)
+                try:
+                    result.set_result(parse_week_rows(html_content, schedule_config, parser_name))
+                except Exception as e:
+                    result.set_exception(e)
+            except Exception as e:
+                result.set_exception(e)
+
+        task.add_done_callback(finish)
+        return result
+
+    def shutdown(self, executor: Optional[ProcessPoolExecutor] = None) -> None:
+        """Stop the worker processes (only if `executor` is still the current one)"""
+        with self._lock:
+            if self._executor is None or executor not in (None, self._executor):
+                return
+            executor, self._executor = self._executor, None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def __executor(self, workers: int, schedule_config: ScheduleConfig) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                logging.info(f"Starting {workers} schedule parse worker processes")
+                self._executor = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_warm_worker,
+                    initargs=(schedule_config.program_titles_csv, bool(schedule_config.program_titles_db)),
+                )
+            return self._executor
@@ -0,0 +1,142 @@
+import json
+import logging
+import sqlite3
+import time
+import uuid
+from pathlib import Path
+from typing import Optional
+
+from backend.schedule_entry import ScheduleEntry
+from backend.sqlite_connections import get_connections
+from backend.week_cache import is_week_closed
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS weeks (
+    key TEXT PRIMARY KEY,
+    week_start TEXT NOT NULL,
+    rows TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leases (
+    key TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+class ParsedWeekCache:
+    """Parsed general-schedule weeks shared by all worker processes via SQLite
+
+    Rows are fresh for `ttl` seconds, or for good once the week is closed.
+    A worker about to refresh a stale week takes a lease on it; other workers
+    wait for its rows instead of scraping the same week. Leases expire after
+    `lease_seconds`, so a worker that dies mid-refresh cannot block the week.
+    Any database error is logged and treated as a cache miss.
+
+    Every store prunes the database: rows of the same week saved under an
+    older titles version, rows not refreshed for `max_age` seconds and
+    expired leases are deleted, so the file does not grow without limit.
+    """
+
+    def __init__(self, path: str, ttl: int, lease_seconds: int, closed_after_days: int, max_age: int = 0):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.lease_seconds = lease_seconds
+        self.closed_after_days = closed_after_days
+        # 0 keeps rows until they are replaced
+        self.max_age = max_age
+        self._connections = get_connections(path, SCHEMA)
+
+    @staticmethod
+    def key(week_start: str, titles_version: str) -> str:
+        """Rows carry resolved program titles, so a new titles file means new keys"""
+        return f"{week_start}\0{titles_version}"
+
+    def load(self, key: str) -> Optional[list[ScheduleEntry]]:
+        """Return the cached rows if they are still fresh"""
+        try:
+            row = self._connections.get().execute(
+                "SELECT week_start, rows, fetched_at FROM weeks WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logging.warning(f"Shared week cache unavailable: {e}")
+            return None
+
+        if row is None:
+            return None
+        week_start, rows, fetched_at = row
+        if time.time() - fetched_at >= self.ttl and not is_week_closed(week_start, self.closed_after_days):
+            return None
+        try:
+            return [ScheduleEntry.coerce(entry) for entry in json.loads(rows)]
+        except (ValueError, TypeError):
+            return None
+
+    def try_lease(self, key: str) -> Optional[str]:
+        """Claim the right to refresh a week; returns the lease owner or None if taken"""
+        owner = uuid.uuid4().hex
+        now = time.time()
+        try:
+            with self._connections.transaction() as connection:
+                current = connection.execute(
+                    "SELECT expires_at FROM leases WHERE key = ?", (key,)
+                ).fetchone()
+                if current is not None and current[0] > now:
+                    return None
+                connection.execute(
+                    "INSERT OR REPLACE INTO leases (key, owner, expires_at) VALUES (?, ?, ?)",
+                    (key, owner, now + self.lease_seconds),
+                )
+                return owner
+        except sqlite3.Error as e:
+            logging.warning(f"Shared week cache lease failed: {e}")
+            # Without the cache every worker simply fetches the week itself
+            return owner
+
+    def wait_for(self, key: str, poll_interval: float = 0.2) -> Optional[list[ScheduleEntry]]:
+        """Wait for the lease holder's rows, for at most the lease duration"""
+        deadline = time.monotonic() + self.lease_seconds
+        while time.monotonic() < deadline:
+            time.sleep(poll_interval)
+            rows = self.load(key)
+            if rows is not None:
+                return rows
+            if not self.__is_leased(key):
+                return None
+        return None
+
+    def __is_leased(self, key: str) -> bool:
+        try:
+            row = self._connections.get().execute(
+                "SELECT expires_at FROM leases WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error:
+            return False
+        return row is not None and row[0] > time.time()
+
+    def store(self, key: str, week_start: str, rows: list[ScheduleEntry], owner: Optional[str] = None) -> None:
+        """Save freshly parsed rows, give up the lease held by `owner` and prune old entries"""
+        now = time.time()
+        try:
+            with self._connections.transaction() as connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO weeks (key, week_start, rows, fetched_at) VALUES (?, ?, ?, ?)",
+                    (key, week_start, json.dumps([entry.as_tuple() for entry in rows], ensure_ascii=False), now),
+                )
+                connection.execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, owner))
+                # Rows parsed with an older titles file are never read again
+                connection.execute("DELETE FROM weeks WHERE week_start = ? AND key != ?", (week_start, key))
+                if self.max_age > 0:
+                    connection.execute("DELETE FROM weeks WHERE fetched_at < ?", (now - self.max_age,))
+                connection.execute("DELETE FROM leases WHERE expires_at < ?", (now,))
+        except sqlite3.Error as e:
+            logging.warning(f"Failed to write shared week cache entry: {e}")
+
+    def release(self, key: str, owner: str) -> None:
+        """Give up a lease without storing rows, e.g. after a failed fetch"""
+        try:
+            self._connections.get().execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, owner))
+        except sqlite3.Error as e:
+            logging.warning(f"Failed to release shared week cache lease: {e}")
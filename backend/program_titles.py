@@ -1,14 +1,133 @@
-from typing import Dict
+from typing import Dict, Iterable, Mapping, Optional
 import csv
 import logging
 import os
+import re
+import threading
+import time
+import unicodedata
 from datetime import datetime
 
 
+# Episode and part markers at the end of a description, e.g. "odc. 12",
+# "cz. 2", "(3/10)", "#4" or "S02E05", after case and diacritics are folded.
+# Markers start a word, so "Mecz 1" or "Step 3" keep their endings.
+EPISODE_SUFFIX = re.compile(
+    r"(?:\s*[-–,:]?\s*(?:"
+    r"\(?\s*\b(?:odc|odcinek|cz|czesc|ep|episode)\.?\s*\d+(?:\s*/\s*\d+)?\s*\)?"
+    r"|\(\s*\d+(?:\s*/\s*\d+)?\s*\)"
+    r"|#\d+"
+    r"|\bs\d+\s*e\d+"
+    r"|\b\d+\s*/\s*\d+"
+    r"))+$"
+)
+# Changes whenever normalize_description() does, so stored normalized keys
+# and cached rows with resolved titles are rebuilt
+NORMALIZATION_VERSION = 2
+# Punctuation that only separates words, e.g. "LIGA MISTRZÓW: studio"
+WORD_SEPARATORS = re.compile(r"[\s,:;–-]+")
+# Letters NFKD does not decompose into a base letter and a combining mark
+_FOLDED_LETTERS = str.maketrans({'ł': 'l', 'đ': 'd', 'ø': 'o', 'ß': 'ss'})
+# Trie node key holding the title of the key that ends at the node
+_TITLE = ''
+# Distinct descriptions remembered per index before the memo is cleared
+LOOKUP_MEMO_SIZE = 65536
+
+
+def normalize_description(description: str) -> str:
+    """Fold case, diacritics, separators and episode suffixes of a description"""
+    text = unicodedata.normalize('NFKD', description.replace('\ufeff', ''))
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    text = WORD_SEPARATORS.sub(' ', text.casefold().translate(_FOLDED_LETTERS)).strip()
+    # A description that is nothing but a marker, e.g. "Odcinek 2", keeps it
+    return EPISODE_SUFFIX.sub('', text) or text
+
+
+def read_titles_csv(csv_path: str) -> Dict[str, str]:
+    """Read the description;title CSV dictionary; later rows override earlier ones"""
+    with open(csv_path, 'r', encoding='utf-8') as f:
+        reader = csv.reader(f, delimiter=';')  # The source file uses semicolon-separated values.
+        return {rows[0]: rows[1].strip('"') for rows in reader}
+
+
+def description_prefixes(normalized: str) -> list:
+    """Whole-word prefixes of a normalized description, longest first"""
+    words = normalized.split(' ')
+    return [' '.join(words[:count]) for count in range(len(words), 0, -1)]
+
+
+class TitleIndex:
+    """Program titles by normalized description, with longest-prefix matching
+
+    Built once per loaded dictionary. A description is looked up exactly,
+    then by its normalized form, then by the longest dictionary key that is
+    a whole-word prefix of it ("LIGA MISTRZÓW SKRÓT - Real" finds "LIGA
+    MISTRZÓW SKRÓT"). Keys are stored in a word trie, so a lookup walks the
+    words of the description once, however large the dictionary is.
+    """
+
+    def __init__(self, titles: Mapping[str, str]):
+        self.titles = titles
+        self._trie: dict = {}
+        for description, title in titles.items():
+            words = normalize_description(description).split(' ')
+            if not title or words == ['']:
+                continue
+            node = self._trie
+            for word in words:
+                node = node.setdefault(word, {})
+            # The first of several near-duplicate keys wins, like the CSV order
+            node.setdefault(_TITLE, title)
+        self._memo: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    def lookup(self, description: str) -> str:
+        """Title for a description, or '' when nothing matches"""
+        title = self.titles.get(description)
+        if title:
+            return title
+        title = self._memo.get(description)
+        if title is None:
+            title = self.__longest_prefix(normalize_description(description))
+            if len(self._memo) >= LOOKUP_MEMO_SIZE:
+                self._memo.clear()
+            self._memo[description] = title
+        return title
+
+    def lookup_many(self, descriptions: Iterable[str]) -> Dict[str, str]:
+        """Titles of all given descriptions; unmatched ones map to ''"""
+        return {description: self.lookup(description) for description in descriptions if description}
+
+    def __longest_prefix(self, normalized: str) -> str:
+        node = self._trie
+        title = ''
+        for word in normalized.split(' '):
+            node = node.get(word)
+            if node is None:
+                break
+            title = node.get(_TITLE, title)
+        return title
+
+
 class ProgramTitles:
+    """Process-wide program titles loaded from the CSV dictionary
+
+    The file's modification time is checked at most once per
+    `check_interval` seconds, so building parsers does not stat the file
+    every time. Reloads happen under a lock, so concurrent threads load a
+    changed file only once, and each reload increments `generation`, which
+    callers can compare to tell whether their titles are still current.
+    """
     _instance = None
     _titles_dict: Dict[str, str] = None
+    _titles_index: Optional[TitleIndex] = None
+    _csv_path: Optional[str] = None
     _last_modified: float = 0
+    _checked_at: float = 0
+    _lock = threading.Lock()
+    generation: int = 0
 
     def __new__(cls):
         if cls._instance is None:
@@ -16,42 +135,84 @@ class ProgramTitles:
         return cls._instance
 
     @classmethod
-    def get_titles(cls, csv_path: str) -> Dict[str, str]:
+    def get_titles(cls, csv_path: str, check_interval: float = 0) -> Dict[str, str]:
         """Get program titles dictionary with automatic refresh on file change"""
-        try:
-            # Check if file has been modified
-            current_modified_time = os.path.getmtime(csv_path)
-            
-            # Load dictionary if it's first time or file was modified
-            if cls._titles_dict is None or current_modified_time > cls._last_modified:
-                logging.info(f"Loading titles from CSV (last modified: {datetime.fromtimestamp(current_modified_time)})")
-                cls._titles_dict = cls._load_titles(csv_path)
-                cls._last_modified = current_modified_time
-                
-        except OSError as e:
-            logging.error(f"Error checking file modification time: {e}")
-            if cls._titles_dict is None:
-                cls._titles_dict = {}
-                
-        return cls._titles_dict
+        if cls.__is_recently_checked(csv_path, check_interval):
+            return cls._titles_dict
+
+        with cls._lock:
+            # Another thread may have checked the file while this one waited
+            if cls.__is_recently_checked(csv_path, check_interval):
+                return cls._titles_dict
+            try:
+                # Check if file has been modified
+                current_modified_time = os.path.getmtime(csv_path)
+
+                # Load dictionary if it's first time, another file or the file was modified
+                if (
+                    cls._titles_dict is None
+                    or csv_path != cls._csv_path
+                    or current_modified_time > cls._last_modified
+                ):
+                    logging.info(f"Loading titles from CSV (last modified: {datetime.fromtimestamp(current_modified_time)})")
+                    cls.__replace(cls._load_titles(csv_path), csv_path, current_modified_time)
+
+            except OSError as e:
+                logging.error(f"Error checking file modification time: {e}")
+                if cls._titles_dict is None:
+                    cls.__replace({}, csv_path, 0)
+            cls._checked_at = time.monotonic()
+
+            return cls._titles_dict
+
+    @classmethod
+    def index_for(cls, titles: Mapping[str, str]) -> TitleIndex:
+        """Lookup index of a titles dictionary, built once per CSV load"""
+        if titles is not cls._titles_dict:
+            # E.g. a dictionary supplied by a test or another source
+            return TitleIndex(titles)
+        index = cls._titles_index
+        if index is None or index.titles is not titles:
+            index = TitleIndex(titles)
+            with cls._lock:
+                if titles is cls._titles_dict:
+                    cls._titles_index = index
+        return index
 
     @classmethod
     def reload_titles(cls, csv_path: str) -> None:
-        """Force reload of program titles"""
-        cls._titles_dict = cls._load_titles(csv_path)
-        try:
-            cls._last_modified = os.path.getmtime(csv_path)
-        except OSError as e:
-            logging.error(f"Error checking file modification time during reload: {e}")
-            cls._last_modified = 0
+        """Force reload of program titles, e.g. after an upload"""
+        with cls._lock:
+            titles = cls._load_titles(csv_path)
+            try:
+                modified = os.path.getmtime(csv_path)
+            except OSError as e:
+                logging.error(f"Error checking file modification time during reload: {e}")
+                modified = 0
+            cls.__replace(titles, csv_path, modified)
+            cls._checked_at = time.monotonic()
+
+    @classmethod
+    def __is_recently_checked(cls, csv_path: str, check_interval: float) -> bool:
+        return (
+            cls._titles_dict is not None
+            and csv_path == cls._csv_path
+            and time.monotonic() - cls._checked_at < check_interval
+        )
+
+    @classmethod
+    def __replace(cls, titles: Dict[str, str], csv_path: str, modified: float) -> None:
+        cls._titles_dict = titles
+        cls._titles_index = None
+        cls._csv_path = csv_path
+        cls._last_modified = modified
+        cls.generation += 1
 
     @staticmethod
     def _load_titles(csv_path: str) -> Dict[str, str]:
         """Load program titles from CSV file"""
         try:
-            with open(csv_path, 'r', encoding='utf-8') as f:
-                reader = csv.reader(f, delimiter=';')  # The source file uses semicolon-separated values.
-                titles = {rows[0]: rows[1].strip('"') for rows in reader}
+            titles = read_titles_csv(csv_path)
             logging.info(f"Program titles loaded successfully: {len(titles)} entries")
             return titles
         except FileNotFoundError:
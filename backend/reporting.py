@@ -1,20 +1,25 @@
+import bisect
+import copy
 import json
 import logging
 import os
 import posixpath
 import re
+import struct
 import tempfile
 import threading
+import zlib
 from dataclasses import asdict, dataclass, fields
 from datetime import date, datetime
 from io import BytesIO
 from pathlib import Path
-from typing import Any
-from zipfile import BadZipFile, ZIP_DEFLATED, ZipFile
+from typing import Any, BinaryIO
+from zipfile import BadZipFile, ZIP_DEFLATED, ZipFile, ZipInfo
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 from lxml import etree
 
+from backend.schedule_entry import ScheduleEntry, parse_entry_date
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 INSTANCE_DIR = PROJECT_ROOT / "instance"
@@ -29,6 +34,12 @@ XML_NS = "http://www.w3.org/XML/1998/namespace"
 NSMAP = {"m": MAIN_NS, "r": OFFICE_REL_NS}
 WORKBOOK_PATH = "xl/workbook.xml"
 
+LOCAL_FILE_HEADER = struct.Struct("<4s5H3L2H")
+LOCAL_FILE_SIGNATURE = b"PK\x03\x04"
+ZIP_ENCRYPTED_FLAG = 0x01
+ZIP_DEFLATE_OPTION_FLAGS = 0x06
+ZIP_DATA_DESCRIPTOR_FLAG = 0x08
+
 CELL_RE = re.compile(r"^([A-Z]{1,3})([1-9][0-9]*)$")
 COLUMN_RE = re.compile(r"^[A-Z]{1,3}$")
 POLISH_MONTHS = (
@@ -168,6 +179,7 @@ class ReportSettingsStore:
                 encoding="utf-8",
             )
             os.replace(temporary_path, self.settings_path)
+        clear_template_cache()
         return settings
 
 
@@ -275,16 +287,89 @@ def install_template(data: bytes, original_filename: str) -> Path:
         temporary_file.write(data)
         temporary_path = Path(temporary_file.name)
     os.replace(temporary_path, MANAGED_TEMPLATE_PATH)
+    clear_template_cache()
     return MANAGED_TEMPLATE_PATH
 
 
+@dataclass(frozen=True)
+class _CompiledTemplate:
+    """Template state shared by every report generated from one template and settings.
+
+    The pre-cleared worksheet is kept serialized, because lxml trees must not be
+    shared between request threads.
+    """
+
+    worksheet_path: str
+    worksheet_xml: bytes
+    comment: bytes
+    # Archive members in their original order with their compressed bytes,
+    # which are copied verbatim. The worksheet has none, because it is filled
+    # in and compressed for every report.
+    entries: tuple[tuple[ZipInfo, bytes | None], ...]
+
+
+_template_cache: dict[tuple[str, int, int, ReportSettings], _CompiledTemplate] = {}
+_template_cache_lock = threading.Lock()
+
+
+def clear_template_cache() -> None:
+    with _template_cache_lock:
+        _template_cache.clear()
+
+
+def _get_compiled_template(template_path: Path, settings: ReportSettings) -> _CompiledTemplate:
+    stat = template_path.stat()
+    key = (str(template_path), stat.st_mtime_ns, stat.st_size, settings)
+    with _template_cache_lock:
+        compiled = _template_cache.get(key)
+        if compiled is None:
+            compiled = _compile_template(template_path, settings)
+            # Only one template and settings combination is active at a time.
+            _template_cache.clear()
+            _template_cache[key] = compiled
+    return compiled
+
+
+def _compile_template(template_path: Path, settings: ReportSettings) -> _CompiledTemplate:
+    with ZipFile(template_path, "r") as source, template_path.open("rb") as raw_source:
+        _validate_archive(source)
+        worksheet_path = _resolve_worksheet_path(source, settings.worksheet)
+        worksheet_root = _prepare_worksheet(source.read(worksheet_path), settings)
+        entries = []
+        for archive_item in source.infolist():
+            if archive_item.filename == worksheet_path:
+                entries.append((archive_item, None))
+            elif archive_item.filename == WORKBOOK_PATH:
+                entries.append(
+                    _deflate_member(
+                        archive_item,
+                        _enable_automatic_recalculation(source.read(WORKBOOK_PATH)),
+                    )
+                )
+            elif archive_item.flag_bits & ZIP_ENCRYPTED_FLAG:
+                raise ReportConfigurationError("The XLSX template must not be encrypted.")
+            else:
+                entries.append((archive_item, _read_raw_member(raw_source, archive_item)))
+        return _CompiledTemplate(
+            worksheet_path=worksheet_path,
+            worksheet_xml=etree.tostring(worksheet_root),
+            comment=source.comment,
+            entries=tuple(entries),
+        )
+
+
 def generate_template_report(
     schedule_data: list[dict[str, Any]],
     username: str,
-    output_path: Path,
+    output: Path | BinaryIO,
     settings: ReportSettings | None = None,
     current_time: datetime | None = None,
 ) -> ReportIdentity:
+    """Fill the report template and write it to a path or a binary file object.
+
+    Paths are replaced atomically through a temporary file; file objects, such
+    as an in-memory buffer, are written directly.
+    """
     settings = settings or ReportSettingsStore().load()
     settings.validate()
     identity = build_report_identity(username, settings.activity_value, current_time)
@@ -295,21 +380,23 @@ def generate_template_report(
         )
 
     template_path = get_report_template_path()
-    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path = Path(output) if isinstance(output, (str, os.PathLike)) else None
+    if output_path is not None:
+        output_path.parent.mkdir(parents=True, exist_ok=True)
     temporary_output_path: Path | None = None
 
     try:
-        with ZipFile(template_path, "r") as source:
-            _validate_archive(source)
-            worksheet_path = _resolve_worksheet_path(source, settings.worksheet)
-            worksheet_xml = source.read(worksheet_path)
-            updated_xml = _populate_worksheet(
-                worksheet_xml, schedule_data, settings, identity
-            )
-            updated_workbook_xml = _enable_automatic_recalculation(
-                source.read(WORKBOOK_PATH)
-            )
+        compiled = _get_compiled_template(template_path, settings)
+        updated_xml = _fill_worksheet(
+            etree.fromstring(compiled.worksheet_xml, _xml_parser()),
+            schedule_data,
+            settings,
+            identity,
+        )
 
+        if output_path is None:
+            _write_report_archive(output, compiled, updated_xml)
+        else:
             with tempfile.NamedTemporaryFile(
                 dir=output_path.parent,
                 suffix=".xlsx.tmp",
@@ -317,18 +404,7 @@ def generate_template_report(
             ) as temporary_output:
                 temporary_output_path = Path(temporary_output.name)
 
-            with ZipFile(
-                temporary_output_path, "w", compression=ZIP_DEFLATED
-            ) as destination:
-                destination.comment = source.comment
-                for archive_item in source.infolist():
-                    if archive_item.filename == worksheet_path:
-                        content = updated_xml
-                    elif archive_item.filename == WORKBOOK_PATH:
-                        content = updated_workbook_xml
-                    else:
-                        content = source.read(archive_item.filename)
-                    destination.writestr(archive_item, content)
+            _write_report_archive(temporary_output_path, compiled, updated_xml)
             os.replace(temporary_output_path, output_path)
             temporary_output_path = None
     except (BadZipFile, KeyError, etree.XMLSyntaxError, OSError) as exc:
@@ -341,6 +417,75 @@ def generate_template_report(
     return identity
 
 
+def _write_report_archive(
+    destination_file: Path | BinaryIO,
+    compiled: _CompiledTemplate,
+    updated_xml: bytes,
+) -> None:
+    with ZipFile(destination_file, "w", compression=ZIP_DEFLATED) as destination:
+        destination.comment = compiled.comment
+        for archive_item, content in compiled.entries:
+            if content is None:
+                archive_item, content = _deflate_member(archive_item, updated_xml)
+            _write_raw_member(destination, archive_item, content)
+
+
+def _read_raw_member(archive_file: BinaryIO, archive_item: ZipInfo) -> bytes:
+    """Return a member's compressed bytes exactly as stored in the archive."""
+    archive_file.seek(archive_item.header_offset)
+    header = archive_file.read(LOCAL_FILE_HEADER.size)
+    if len(header) != LOCAL_FILE_HEADER.size:
+        raise BadZipFile(f"Truncated local header for {archive_item.filename}")
+    fields_ = LOCAL_FILE_HEADER.unpack(header)
+    if fields_[0] != LOCAL_FILE_SIGNATURE:
+        raise BadZipFile(f"Bad local header for {archive_item.filename}")
+    name_length, extra_length = fields_[9], fields_[10]
+    archive_file.seek(name_length + extra_length, os.SEEK_CUR)
+    content = archive_file.read(archive_item.compress_size)
+    if len(content) != archive_item.compress_size:
+        raise BadZipFile(f"Truncated data for {archive_item.filename}")
+    return content
+
+
+def _deflate_member(archive_item: ZipInfo, data: bytes) -> tuple[ZipInfo, bytes]:
+    """Compress new content for a member, keeping the rest of its metadata."""
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+    content = compressor.compress(data) + compressor.flush()
+    member = copy.copy(archive_item)
+    member.compress_type = ZIP_DEFLATED
+    member.flag_bits &= ~(ZIP_DEFLATE_OPTION_FLAGS | ZIP_DATA_DESCRIPTOR_FLAG)
+    member.CRC = zlib.crc32(data)
+    member.file_size = len(data)
+    member.compress_size = len(content)
+    return member, content
+
+
+def _write_raw_member(destination: ZipFile, archive_item: ZipInfo, content: bytes) -> None:
+    """Append an already compressed member to an archive opened for writing.
+
+    ZipFile has no public API for this, so the bookkeeping mirrors what its own
+    write handles do. The CRC and sizes are known up front and go straight
+    into the local header, so no data descriptor is needed.
+
+    This relies on private ZipFile members of CPython 3.12 (_seekable, fp,
+    start_dir, _writecheck and _didModify), the version pinned in
+    pyproject.toml. Check it against zipfile.py before moving to another
+    Python version; tests/test_reporting.py reopens the written archives.
+    """
+    member = copy.copy(archive_item)
+    member.flag_bits &= ~ZIP_DATA_DESCRIPTOR_FLAG
+    if destination._seekable:
+        destination.fp.seek(destination.start_dir)
+    member.header_offset = destination.fp.tell()
+    destination._writecheck(member)
+    destination._didModify = True
+    destination.fp.write(member.FileHeader())
+    destination.fp.write(content)
+    destination.start_dir = destination.fp.tell()
+    destination.filelist.append(member)
+    destination.NameToInfo[member.filename] = member
+
+
 def _validate_archive(workbook: ZipFile) -> None:
     entries = workbook.infolist()
     if len(entries) > 2_000:
@@ -431,10 +576,21 @@ def _populate_worksheet(
     settings: ReportSettings,
     identity: ReportIdentity,
 ) -> bytes:
-    root = etree.fromstring(worksheet_xml, _xml_parser())
+    root = _prepare_worksheet(worksheet_xml, settings)
+    return _fill_worksheet(root, schedule_data, settings, identity)
+
+
+def _sheet_data(root: etree._Element) -> etree._Element:
     sheet_data = root.find(f"{{{MAIN_NS}}}sheetData")
     if sheet_data is None:
         raise ReportConfigurationError("The report worksheet does not contain sheet data.")
+    return sheet_data
+
+
+def _prepare_worksheet(worksheet_xml: bytes, settings: ReportSettings) -> etree._Element:
+    """Parse the worksheet and clear the values left in the report's data rows."""
+    root = etree.fromstring(worksheet_xml, _xml_parser())
+    sheet = _SheetIndex(_sheet_data(root))
 
     data_columns = (
         settings.date_column,
@@ -444,43 +600,51 @@ def _populate_worksheet(
         settings.hours_column,
     )
     for row_number in range(settings.start_row, settings.end_row + 1):
-        row = _find_row(sheet_data, row_number)
-        if row is None:
+        if sheet.find_row(row_number) is None:
             continue
         for column in data_columns:
-            cell = _find_cell(row, f"{column}{row_number}")
+            cell = sheet.find_cell(f"{column}{row_number}")
             if cell is not None:
                 _clear_cell_value(cell)
+    return root
 
-    _write_inline_string(sheet_data, settings.full_name_cell, identity.full_name)
-    _write_inline_string(sheet_data, settings.month_cell, identity.month)
-    _write_number(sheet_data, settings.year_cell, identity.year)
+
+def _fill_worksheet(
+    root: etree._Element,
+    schedule_data: list[dict[str, Any]],
+    settings: ReportSettings,
+    identity: ReportIdentity,
+) -> bytes:
+    sheet = _SheetIndex(_sheet_data(root))
+    _write_inline_string(sheet, settings.full_name_cell, identity.full_name)
+    _write_inline_string(sheet, settings.month_cell, identity.month)
+    _write_number(sheet, settings.year_cell, identity.year)
 
     for offset, entry in enumerate(schedule_data):
         row_number = settings.start_row + offset
-        report_date = datetime.strptime(entry["date"], "%d.%m.%Y").date()
+        report_date = _entry_date(entry)
         _write_number(
-            sheet_data,
+            sheet,
             f"{settings.date_column}{row_number}",
             _excel_date_serial(report_date),
         )
         _write_inline_string(
-            sheet_data,
+            sheet,
             f"{settings.program_title_column}{row_number}",
             str(entry.get("program_title", "")),
         )
         _write_inline_string(
-            sheet_data,
+            sheet,
             f"{settings.description_column}{row_number}",
             str(entry.get("description", "")),
         )
         _write_inline_string(
-            sheet_data,
+            sheet,
             f"{settings.activity_column}{row_number}",
             settings.activity_value,
         )
         _write_number(
-            sheet_data,
+            sheet,
             f"{settings.hours_column}{row_number}",
             float(entry["duration"]),
         )
@@ -493,52 +657,77 @@ def _populate_worksheet(
     )
 
 
-def _excel_date_serial(value: date) -> int:
-    return (value - date(1899, 12, 30)).days
-
-
-def _find_row(sheet_data: etree._Element, row_number: int) -> etree._Element | None:
-    rows = sheet_data.xpath(f"m:row[@r='{row_number}']", namespaces=NSMAP)
-    return rows[0] if rows else None
-
+def _entry_date(entry: Any) -> date:
+    # Parsed entries carry a date object; plain row dicts a "D.MM.YYYY" string
+    value = entry.date if isinstance(entry, ScheduleEntry) else entry["date"]
+    return value if isinstance(value, date) else parse_entry_date(value)
 
-def _ensure_row(sheet_data: etree._Element, row_number: int) -> etree._Element:
-    existing = _find_row(sheet_data, row_number)
-    if existing is not None:
-        return existing
-    row = etree.Element(f"{{{MAIN_NS}}}row", r=str(row_number))
-    for index, candidate in enumerate(sheet_data.findall(f"{{{MAIN_NS}}}row")):
-        if int(candidate.get("r", "0")) > row_number:
-            sheet_data.insert(index, row)
-            return row
-    sheet_data.append(row)
-    return row
-
-
-def _find_cell(row: etree._Element, reference: str) -> etree._Element | None:
-    cells = row.xpath(f"m:c[@r='{reference}']", namespaces=NSMAP)
-    return cells[0] if cells else None
 
+def _excel_date_serial(value: date) -> int:
+    return (value - date(1899, 12, 30)).days
 
-def _ensure_cell(sheet_data: etree._Element, reference: str) -> etree._Element:
-    match = CELL_RE.fullmatch(reference)
-    if not match:
-        raise ReportConfigurationError(f"Invalid Excel cell reference: {reference}")
-    column, row_text = match.groups()
-    row = _ensure_row(sheet_data, int(row_text))
-    existing = _find_cell(row, reference)
-    if existing is not None:
-        return existing
 
-    cell = etree.Element(f"{{{MAIN_NS}}}c", r=reference)
-    column_index = _column_index(column)
-    for index, candidate in enumerate(row.findall(f"{{{MAIN_NS}}}c")):
-        candidate_match = CELL_RE.fullmatch(candidate.get("r", ""))
-        if candidate_match and _column_index(candidate_match.group(1)) > column_index:
-            row.insert(index, cell)
-            return cell
-    row.append(cell)
-    return cell
+class _SheetIndex:
+    """Row and cell lookup tables for one sheetData element, built in a single pass.
+
+    Only the first row carrying a given number is indexed, together with its
+    cells, which matches what the former per-lookup XPath queries returned.
+    """
+
+    def __init__(self, sheet_data: etree._Element):
+        self.sheet_data = sheet_data
+        self._rows: dict[int, etree._Element] = {}
+        self._cells: dict[str, etree._Element] = {}
+        for row in sheet_data.iterfind(f"{{{MAIN_NS}}}row"):
+            row_text = row.get("r", "")
+            if not row_text.isdigit() or int(row_text) in self._rows:
+                continue
+            self._rows[int(row_text)] = row
+            for cell in row.iterfind(f"{{{MAIN_NS}}}c"):
+                self._cells.setdefault(cell.get("r", ""), cell)
+        self._row_numbers = sorted(self._rows)
+
+    def find_row(self, row_number: int) -> etree._Element | None:
+        return self._rows.get(row_number)
+
+    def find_cell(self, reference: str) -> etree._Element | None:
+        return self._cells.get(reference)
+
+    def ensure_row(self, row_number: int) -> etree._Element:
+        existing = self._rows.get(row_number)
+        if existing is not None:
+            return existing
+        row = etree.Element(f"{{{MAIN_NS}}}row", r=str(row_number))
+        position = bisect.bisect_right(self._row_numbers, row_number)
+        if position < len(self._row_numbers):
+            self._rows[self._row_numbers[position]].addprevious(row)
+        else:
+            self.sheet_data.append(row)
+        self._rows[row_number] = row
+        self._row_numbers.insert(position, row_number)
+        return row
+
+    def ensure_cell(self, reference: str) -> etree._Element:
+        existing = self._cells.get(reference)
+        if existing is not None:
+            return existing
+        match = CELL_RE.fullmatch(reference)
+        if not match:
+            raise ReportConfigurationError(f"Invalid Excel cell reference: {reference}")
+        column, row_text = match.groups()
+        row = self.ensure_row(int(row_text))
+
+        cell = etree.Element(f"{{{MAIN_NS}}}c", r=reference)
+        column_index = _column_index(column)
+        for candidate in row.iterfind(f"{{{MAIN_NS}}}c"):
+            candidate_match = CELL_RE.fullmatch(candidate.get("r", ""))
+            if candidate_match and _column_index(candidate_match.group(1)) > column_index:
+                candidate.addprevious(cell)
+                break
+        else:
+            row.append(cell)
+        self._cells[reference] = cell
+        return cell
 
 
 def _column_index(column: str) -> int:
@@ -559,10 +748,8 @@ def _clear_cell_value(cell: etree._Element) -> None:
             cell.remove(child)
 
 
-def _write_inline_string(
-    sheet_data: etree._Element, reference: str, value: str
-) -> None:
-    cell = _ensure_cell(sheet_data, reference)
+def _write_inline_string(sheet: _SheetIndex, reference: str, value: str) -> None:
+    cell = sheet.ensure_cell(reference)
     _clear_cell_value(cell)
     cell.set("t", "inlineStr")
     inline_string = etree.SubElement(cell, f"{{{MAIN_NS}}}is")
@@ -572,10 +759,8 @@ def _write_inline_string(
     text.text = value
 
 
-def _write_number(
-    sheet_data: etree._Element, reference: str, value: int | float
-) -> None:
-    cell = _ensure_cell(sheet_data, reference)
+def _write_number(sheet: _SheetIndex, reference: str, value: int | float) -> None:
+    cell = sheet.ensure_cell(reference)
     _clear_cell_value(cell)
     cell_value = etree.SubElement(cell, f"{{{MAIN_NS}}}v")
     cell_value.text = format(value, ".15g")
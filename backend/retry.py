@@ -0,0 +1,141 @@
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+import httpx
+import requests
+
+from backend.circuit_breaker import CircuitBreaker
+from backend.config import ScraperConfig
+
+
+# Responses that usually mean a temporary upstream problem
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """How often and how patiently a single idempotent request is retried"""
+    attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 10.0
+
+    def backoff(self, retry_number: int) -> float:
+        """Full-jitter exponential backoff for the given retry (0-based)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** retry_number))
+
+
+class RetryBudget:
+    """Retries and time one export may spend, shared by all of its requests
+
+    Once the budget or the deadline is used up, failures are returned to the
+    caller immediately, so a degraded upstream cannot hold a worker for long.
+    """
+
+    def __init__(self, retries: int, deadline_seconds: float):
+        self._retries_left = retries
+        self._deadline = time.monotonic() + deadline_seconds
+        self._lock = threading.Lock()
+
+    def remaining_seconds(self) -> float:
+        return max(0.0, self._deadline - time.monotonic())
+
+    def try_spend(self, delay: float) -> bool:
+        """Take one retry if it is available and its delay ends before the deadline"""
+        with self._lock:
+            if self._retries_left < 1 or delay >= self.remaining_seconds():
+                return False
+            self._retries_left -= 1
+            return True
+
+
+# Failures before or during a response that a later attempt may not hit,
+# raised by requests (ScheduleScraper) and httpx (AsyncScheduleScraper)
+TRANSIENT_ERRORS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    httpx.TimeoutException,
+    httpx.NetworkError,
+    httpx.RemoteProtocolError,
+)
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, TRANSIENT_ERRORS):
+        return True
+    response = getattr(error, 'response', None)
+    return response is not None and response.status_code in RETRYABLE_STATUS_CODES
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Delay requested by the server's Retry-After header, in seconds or as an HTTP date"""
+    response = getattr(error, 'response', None)
+    value = response.headers.get('Retry-After', '').strip() if response is not None else ''
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class ExportRetries:
+    """Retry decisions for the requests of one export, shared by both scrapers
+
+    Combines the per-request RetryPolicy with the export's RetryBudget and
+    reports every outcome to the circuit breaker. Client errors such as 404
+    mean GPT is up and answering, so only retryable errors count as failures.
+    """
+
+    def __init__(self, config: ScraperConfig, circuit_breaker: CircuitBreaker):
+        self.config = config
+        self.circuit_breaker = circuit_breaker
+        self.policy = RetryPolicy(config.retry_attempts, config.retry_base_delay, config.retry_max_delay)
+        self.budget = RetryBudget(config.retry_budget, config.export_deadline)
+
+    def request_timeout(self) -> Optional[float]:
+        """Timeout for the next request, or None once the export deadline has passed"""
+        remaining = self.budget.remaining_seconds()
+        if remaining <= 0:
+            return None
+        return min(self.config.request_timeout, remaining)
+
+    def record_success(self) -> None:
+        self.circuit_breaker.record_success()
+
+    def record_login_error(self, error: Exception) -> None:
+        # A working login page alone does not prove the schedule pages
+        # work, so logins only ever count as failures
+        if is_retryable(error):
+            self.circuit_breaker.record_failure(self.config.circuit_failure_threshold)
+
+    def retry_delay(self, error: Exception, retry_number: int) -> Optional[float]:
+        """Record a failed request and return the seconds to wait before retrying it
+
+        Returns None when the request must not be retried.
+        """
+        if is_retryable(error):
+            self.circuit_breaker.record_failure(self.config.circuit_failure_threshold)
+        else:
+            self.circuit_breaker.record_success()
+        if not is_retryable(error) or retry_number + 1 >= self.policy.attempts:
+            return None
+        delay = retry_after_seconds(error)
+        if delay is None:
+            delay = self.policy.backoff(retry_number)
+        if not self.budget.try_spend(delay):
+            logging.warning("Retry budget or deadline of this export is exhausted")
+            return None
+        return delay
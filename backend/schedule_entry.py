@@ -0,0 +1,131 @@
+import sys
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Any, Iterator, Optional
+
+
+# Keys of the dict view, in the order of as_tuple()
+FIELDS = ('date', 'program_title', 'description', 'activity', 'duration', 'start_time', 'end_time', 'editor')
+
+
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if type(value) is str else value
+
+
+@lru_cache(maxsize=4096)
+def parse_entry_date(value: str) -> date:
+    """Parse a "D.MM.YYYY" row date, once per distinct value"""
+    return datetime.strptime(value, '%d.%m.%Y').date()
+
+
+@lru_cache(maxsize=4096)
+def format_entry_date(value: date) -> str:
+    """Format a row date as the exports show it, with the day not zero-padded"""
+    return sys.intern(f"{value.day}.{value.month:02d}.{value.year}")
+
+
+def _entry_date(value: date | str | None) -> Optional[date]:
+    if value is None or isinstance(value, date):
+        return value
+    return parse_entry_date(value)
+
+
+class ScheduleEntry:
+    """One parsed schedule row
+
+    A year of the general schedule has tens of thousands of rows, so entries
+    keep their values in slots instead of a dict each, and the strings that
+    repeat from row to row (dates, titles, descriptions, times, editors) are
+    interned. Item access, get(), keys() and as_dict() keep code written for
+    the former row dicts working; personal rows have no 'editor' key.
+
+    `date` is a date object; it is formatted as "D.MM.YYYY" only for the
+    dict view, as_tuple() and the exports. `duration` is in hours rounded to
+    two decimals, as shown in the exports;
+    `duration_minutes` is exact, so sums over many rows stay exact too. It is
+    derived from `duration` when not given and is not part of the dict view.
+    """
+
+    __slots__ = FIELDS + ('duration_minutes',)
+
+    def __init__(
+        self,
+        date: date | str | None,
+        program_title: str,
+        description: str,
+        activity: str,
+        duration: float,
+        start_time: str,
+        end_time: str,
+        editor: Optional[str] = None,
+        duration_minutes: Optional[int] = None,
+    ):
+        self.date = _entry_date(date)
+        self.program_title = _intern(program_title)
+        self.description = _intern(description)
+        self.activity = _intern(activity)
+        self.duration = duration
+        self.start_time = _intern(start_time)
+        self.end_time = _intern(end_time)
+        self.editor = _intern(editor)
+        # Hours are rounded to 0.01 h (0.6 min), so the minutes round back exactly
+        self.duration_minutes = round(float(duration) * 60) if duration_minutes is None else duration_minutes
+
+    @classmethod
+    def from_dict(cls, row: dict) -> 'ScheduleEntry':
+        return cls(**row)
+
+    @classmethod
+    def coerce(cls, row: Any) -> 'ScheduleEntry':
+        """Accept an entry, a row dict or a row tuple from as_tuple()"""
+        if isinstance(row, cls):
+            return row
+        if isinstance(row, dict):
+            return cls.from_dict(row)
+        return cls(*row)
+
+    def keys(self) -> tuple:
+        return FIELDS if self.editor is not None else FIELDS[:-1]
+
+    @property
+    def date_text(self) -> Optional[str]:
+        return format_entry_date(self.date) if self.date is not None else None
+
+    def as_tuple(self) -> tuple:
+        """Values in the order of keys(), e.g. for pickling or JSON"""
+        return tuple(self.__value(name) for name in self.keys())
+
+    def as_dict(self) -> dict:
+        return {name: self.__value(name) for name in self.keys()}
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.__value(key) if key in self.keys() else default
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.keys():
+            raise KeyError(key)
+        return self.__value(key)
+
+    def __value(self, name: str) -> Any:
+        return self.date_text if name == 'date' else getattr(self, name)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.keys()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, ScheduleEntry):
+            return self.as_tuple() == other.as_tuple()
+        if isinstance(other, dict):
+            return self.as_dict() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"ScheduleEntry({self.as_dict()!r})"
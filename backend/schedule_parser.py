@@ -1,107 +1,234 @@
+import itertools
 import logging
-from datetime import datetime, timedelta
+import sqlite3
+import sys
+from datetime import date
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import BinaryIO, Iterator, List, Dict, Optional, Tuple
 
+import lxml.html
 from bs4 import BeautifulSoup
+from lxml import etree
 from openpyxl import Workbook
 from openpyxl.utils import get_column_letter
 
 from backend.config import ScheduleConfig
+from backend.program_titles import ProgramTitles, TitleIndex
 from backend.reporting import generate_template_report
+from backend.schedule_entry import ScheduleEntry
+from backend.title_store import TitleStore
+
+
+# Parser name that selects the lxml.html backend instead of BeautifulSoup
+LXML_PARSER = 'lxml'
+# Parser name that streams rows through lxml without keeping the page tree
+LXML_STREAM_PARSER = 'lxml-stream'
+# Characters of the page fed to the streaming parser at a time
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def _has_class(class_name: str) -> str:
+    """XPath predicate matching one token of a multi-valued class attribute"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')"
+
+
+# Pre-compiled XPath mirroring the BeautifulSoup lookups used by the default backend
+_ROWS = etree.XPath('//tr')
+_DATE_HEADER = etree.XPath(f".//th[{_has_class('gpt-table-section-header')}]")
+_CELLS = etree.XPath('.//td')
+_FIRST_TABLE = etree.XPath('(.//table)[1]')
+_FIRST_SPAN = etree.XPath('(.//span)[1]')
+_GENERAL_TIME = etree.XPath(f"(.//tr[{_has_class('text-bold')}])[1]")
+_PERSONAL_TIME = etree.XPath(f"(.//span[{_has_class('text-bold')}])[1]")
+# Equivalent of BeautifulSoup's .text that also works on plain etree elements
+_TEXT = etree.XPath('string()', smart_strings=False)
+
+
+def _discard(element: etree._Element) -> None:
+    """Free a fully processed element and the already processed siblings before it"""
+    element.clear(keep_tail=True)
+    parent = element.getparent()
+    if parent is None:
+        return
+    while element.getprevious() is not None:
+        del parent[0]
+
+
+def _stream_rows(html_content: str) -> Iterator[etree._Element]:
+    """Yield every <tr> in document order while the page is parsed incrementally
+
+    Rows are yielded once their outermost <tr> is complete and dropped right
+    after, together with everything outside the rows (navigation, scripts,
+    modals), so the parsed tree never holds more than one top-level row.
+    """
+    if not html_content.strip():
+        # lxml reports empty documents as syntax errors; there are no rows anyway
+        return
+
+    pull_parser = etree.HTMLPullParser(events=('start', 'end'))
+    # Slices of the text itself are fed, so the page is never copied as bytes
+    chunks = (
+        html_content[offset:offset + STREAM_CHUNK_SIZE]
+        for offset in range(0, len(html_content), STREAM_CHUNK_SIZE)
+    )
+    depth = 0
+
+    for chunk in itertools.chain(chunks, [None]):
+        if chunk is None:
+            pull_parser.close()
+        else:
+            pull_parser.feed(chunk)
 
+        for event, element in pull_parser.read_events():
+            if element.tag != 'tr':
+                if event == 'end' and depth == 0:
+                    _discard(element)
+                continue
+            if event == 'start':
+                depth += 1
+                continue
 
-class ScheduleParser:
-    def __init__(self, html_content: str, schedule_config: ScheduleConfig):
-        self.soup = BeautifulSoup(html_content, 'html.parser')
-        self.schedule_data = []
-        self.schedule_config = schedule_config
+            depth -= 1
+            if depth == 0:
+                # iter() includes the row itself followed by its nested rows,
+                # the same order BeautifulSoup's find_all('tr') produces
+                yield from element.iter('tr')
+                _discard(element)
 
-    @staticmethod
-    def __calculate_duration(start_time: str, end_time: str) -> float:
-        """Calculate duration between two times, handling day changes"""
-        start = datetime.strptime(start_time, '%H:%M')
-        end = datetime.strptime(end_time, '%H:%M')
 
-        if end < start:
-            end += timedelta(days=1)
+# Minutes since midnight of every zero-padded "HH:MM" time
+_MINUTES_BY_TIME = {f"{hour:02d}:{minute:02d}": hour * 60 + minute for hour in range(24) for minute in range(60)}
+MINUTES_PER_DAY = 24 * 60
 
-        duration = end - start
-        hours = duration.total_seconds() / 3600
-        return round(hours, 2)
 
-    @staticmethod
-    def __convert_date(date: str) -> str:
-        """Convert date to ISO format from dates like 'poniedziałek, 1 stycznia 2025'"""
-        date_parts = date.split(', ')
-        date_string = date_parts[1]
-        day, month, year = date_string.split(' ')
-
-        months = {
-            'stycznia': '01',
-            'lutego': '02',
-            'marca': '03',
-            'kwietnia': '04',
-            'maja': '05',
-            'czerwca': '06',
-            'lipca': '07',
-            'sierpnia': '08',
-            'września': '09',
-            'października': '10',
-            'listopada': '11',
-            'grudnia': '12'
-        }
-
-        month = months[month]
-        return f"{day}.{month}.{year}"
+def time_to_minutes(value: str) -> int:
+    """Convert an "HH:MM" time to minutes since midnight"""
+    minutes = _MINUTES_BY_TIME.get(value)
+    if minutes is not None:
+        return minutes
+    # Times without zero padding, e.g. "8:05", which strptime accepted as well
+    hours, separator, rest = value.partition(':')
+    if separator and hours.isdigit() and rest.isdigit() and int(hours) < 24 and int(rest) < 60:
+        return int(hours) * 60 + int(rest)
+    raise ValueError(f"time data {value!r} does not match format '%H:%M'")
+
+
+def duration_minutes(start_time: str, end_time: str) -> int:
+    """Minutes between two times, ending on the next day when the end is earlier"""
+    return (time_to_minutes(end_time) - time_to_minutes(start_time)) % MINUTES_PER_DAY
+
+
+_MONTHS = {
+    'stycznia': 1,
+    'lutego': 2,
+    'marca': 3,
+    'kwietnia': 4,
+    'maja': 5,
+    'czerwca': 6,
+    'lipca': 7,
+    'sierpnia': 8,
+    'września': 9,
+    'października': 10,
+    'listopada': 11,
+    'grudnia': 12,
+}
+
+
+@lru_cache(maxsize=1024)
+def convert_date_header(header: str) -> date:
+    """Convert a date header like 'poniedziałek, 1 stycznia 2025' to a date
+
+    A week page has one header per day and the same days repeat across
+    exports, so each distinct header is converted only once.
+    """
+    day, month, year = header.split(', ')[1].split(' ')
+    return date(int(year), _MONTHS[month], int(day))
+
+
+class ScheduleParser:
+    def __init__(
+        self,
+        html_content: str,
+        schedule_config: ScheduleConfig,
+        parser: str = 'html.parser',
+        title_cache: Optional[Dict[str, str]] = None,
+    ):
+        self.parser = parser
+        # Resolved titles by description; an export passes one dict to all of its weeks
+        self.title_cache = {} if title_cache is None else title_cache
+        self.soup = None
+        self.document = None
+        self.html_content = None
+        if parser == LXML_STREAM_PARSER:
+            # Parsed lazily, row by row, when the schedule is parsed
+            self.html_content = html_content
+        elif parser == LXML_PARSER:
+            try:
+                self.document = lxml.html.fromstring(
+                    html_content.encode('utf-8'),
+                    parser=lxml.html.HTMLParser(encoding='utf-8'),
+                )
+            except etree.ParserError:
+                # lxml refuses empty documents; treat them as having no rows
+                self.document = None
+        else:
+            self.soup = BeautifulSoup(html_content, parser)
+        self.schedule_data = []
+        self.schedule_config = schedule_config
 
     @staticmethod
     def __is_date_row(row) -> bool:
         """Check if the row contains a date header"""
         return bool(row.find('th', class_='gpt-table-section-header'))
 
-    def __get_date_from_row(self, row) -> Optional[str]:
+    def __get_date_from_row(self, row) -> Optional[date]:
         """Extract and convert date from a date row"""
         date_header = row.find('th', class_='gpt-table-section-header')
         if date_header:
-            return self.__convert_date(date_header.text.strip())
+            return convert_date_header(date_header.text.strip())
         return None
 
-    def __get_program_title_from_description(self, description: str) -> str:
-        """Get program title for given description from titles dictionary
-
-        Args:
-            description: Program description to look up
-
-        Returns:
-            Matching program title or original description if not found
-        """
-
-        if not description:
-            return ''
-
-        # Cache titles dictionary as class attribute to avoid multiple reads
-        if not hasattr(self, '_titles_dict'):
+    def __get_title_resolver(self) -> TitleStore | TitleIndex:
+        """The titles store when configured, otherwise the index of the titles dictionary"""
+        if not hasattr(self, '_title_resolver'):
+            store = self.schedule_config.get_program_titles_store()
+            if store:
+                self._title_resolver = store
+                return store
             try:
-                self._titles_dict = self.schedule_config.get_program_titles_dict()
-                if not self._titles_dict:
+                titles = self.schedule_config.get_program_titles_dict()
+                if not titles:
                     logging.warning("Program titles dictionary is empty.")
             except Exception as e:
                 logging.error(f"Failed to load program titles: {e}")
-                self._titles_dict = {}
+                titles = {}
+            self._title_resolver = ProgramTitles.index_for(titles)
+        return self._title_resolver
 
+    def __attach_titles(self, entries: List[ScheduleEntry]) -> None:
+        """Resolve the program titles of parsed rows in one batch
 
-        # Return mapped title or nothing if not found
-        program_title = self._titles_dict.get(description)
-        if not program_title:
-            logging.debug(f"Program title not found for description: {description}")
-            return ''
-
-        return program_title
-
-
-    def parse_general_schedule(self) -> List[Dict]:
-        """Parse schedule data from HTML content with sequential row processing"""
+        Descriptions repeat across rows, so each distinct one is looked up
+        once, and only if the export's title cache does not know it yet.
+        """
+        pending = {entry.description for entry in entries if entry.description} - self.title_cache.keys()
+        if pending:
+            try:
+                titles = self.__get_title_resolver().lookup_many(pending)
+            except sqlite3.Error as e:
+                logging.error(f"Failed to look up program titles: {e}")
+                titles = {}
+            for description in pending:
+                title = self.title_cache[description] = sys.intern(titles.get(description, ''))
+                if not title:
+                    logging.debug(f"Program title not found for description: {description}")
+
+        for entry in entries:
+            entry.program_title = self.title_cache.get(entry.description, '')
+
+    def __soup_general_rows(self) -> Iterator[Tuple[Optional[date], str, str, str]]:
+        """Yield (date, description, time text, editor) for general schedule rows"""
         current_date = None
         all_rows = self.soup.find_all('tr')
 
@@ -124,41 +251,61 @@ class ScheduleParser:
                 continue
 
             try:
-                program_description = program_cell.text.strip()
-
                 time_cell = cells[4].find('tr', class_='text-bold')
                 if not time_cell:
                     continue
 
-                times = time_cell.text.strip().replace('\xa0', ' ').split(' ')
-                start_time = times[0].replace('\n', '')
-                end_time = times[2].replace('\n', '')
-                duration = self.__calculate_duration(start_time, end_time)
-                editor = cells[11].text.strip()
-
-                # Get program title from description
-                program_title = self.__get_program_title_from_description(program_description)
-                
-                self.schedule_data.append({
-                    'date': current_date,
-                    'program_title': program_title,
-                    'description': program_description,
-                    'activity': '', # Always empty as per client request
-                    'duration': duration,
-                    'start_time': start_time,
-                    'end_time': end_time,
-                    'editor': editor
-                })
+                yield current_date, program_cell.text.strip(), time_cell.text, cells[11].text.strip()
             except AttributeError as e:
                 logging.warning(f"Error parsing row: {e}")
                 continue
             except IndexError:
                 continue
 
-        return self.schedule_data
+    def __lxml_rows(self) -> Iterator[etree._Element]:
+        """Return the <tr> elements from the lxml document or the streaming parser"""
+        if self.parser == LXML_STREAM_PARSER:
+            return _stream_rows(self.html_content or '')
+        if self.document is None:
+            return iter(())
+        return iter(_ROWS(self.document))
 
-    def parse_personal_schedule(self) -> List[Dict]:
-        """Parse personal schedule data with sequential row processing"""
+    def __lxml_general_rows(self) -> Iterator[Tuple[Optional[date], str, str, str]]:
+        """Yield (date, description, time text, editor) using lxml elements"""
+        current_date = None
+
+        for row in self.__lxml_rows():
+            date_headers = _DATE_HEADER(row)
+            if date_headers:
+                current_date = convert_date_header(_TEXT(date_headers[0]).strip())
+                continue
+
+            if not current_date:
+                continue
+
+            cells = _CELLS(row)
+            if not cells:
+                continue
+
+            program_cells = _FIRST_SPAN(row)
+            if not program_cells:
+                continue
+
+            if len(cells) <= 4:
+                continue
+            time_cells = _GENERAL_TIME(cells[4])
+            if not time_cells or len(cells) <= 11:
+                continue
+
+            yield (
+                current_date,
+                _TEXT(program_cells[0]).strip(),
+                _TEXT(time_cells[0]),
+                _TEXT(cells[11]).strip(),
+            )
+
+    def __soup_personal_rows(self) -> Iterator[Tuple[Optional[date], str, str]]:
+        """Yield (date, description, time text) for personal schedule rows"""
         current_date = None
         all_rows = self.soup.find_all('tr')
 
@@ -185,37 +332,102 @@ class ScheduleParser:
                 if not program_cell:
                     continue
 
-                program_description = program_cell.text.strip()
-
                 time_cell = row.find('span', class_='text-bold')
                 if not time_cell:
                     continue
 
-                # Parse time information
-                times = time_cell.text.strip().split('-')
-                if len(times) != 2:
-                    continue
-
-                start_time = times[0].strip().replace('\xa0', '')
-                end_time = times[1].strip().replace('\xa0', '')
-                duration = self.__calculate_duration(start_time, end_time)
-
-                # Get program title from description
-                program_title = self.__get_program_title_from_description(program_description)
-                
-                self.schedule_data.append({
-                    'date': current_date,
-                    'program_title': program_title,
-                    'description': program_description,
-                    'activity': '', # Always empty as per client request
-                    'duration': duration,
-                    'start_time': start_time,
-                    'end_time': end_time,
-                })
+                yield current_date, program_cell.text.strip(), time_cell.text
             except (AttributeError, IndexError) as e:
                 logging.warning(f"Error parsing row: {e}")
                 continue
 
+    def __lxml_personal_rows(self) -> Iterator[Tuple[Optional[date], str, str]]:
+        """Yield (date, description, time text) using lxml elements"""
+        current_date = None
+
+        for row in self.__lxml_rows():
+            date_headers = _DATE_HEADER(row)
+            if date_headers:
+                current_date = convert_date_header(_TEXT(date_headers[0]).strip())
+                continue
+
+            if not current_date:
+                continue
+
+            cells = _CELLS(row)
+            if not cells:
+                continue
+
+            program_tables = _FIRST_TABLE(cells[0])
+            if not program_tables:
+                continue
+
+            program_cells = _FIRST_SPAN(program_tables[0])
+            if not program_cells:
+                continue
+
+            time_cells = _PERSONAL_TIME(row)
+            if not time_cells:
+                continue
+
+            yield current_date, _TEXT(program_cells[0]).strip(), _TEXT(time_cells[0])
+
+    def parse_general_schedule(self) -> List[ScheduleEntry]:
+        """Parse schedule data from HTML content with sequential row processing"""
+        first_row = len(self.schedule_data)
+        rows = self.__soup_general_rows() if self.soup is not None else self.__lxml_general_rows()
+
+        for current_date, program_description, time_text, editor in rows:
+            try:
+                times = time_text.strip().replace('\xa0', ' ').split(' ')
+                start_time = times[0].replace('\n', '')
+                end_time = times[2].replace('\n', '')
+            except IndexError:
+                continue
+            minutes = duration_minutes(start_time, end_time)
+
+            self.schedule_data.append(ScheduleEntry(
+                date=current_date,
+                program_title='', # Resolved for all rows at once below
+                description=program_description,
+                activity='', # Always empty as per client request
+                duration=round(minutes / 60, 2),
+                duration_minutes=minutes,
+                start_time=start_time,
+                end_time=end_time,
+                editor=editor,
+            ))
+
+        self.__attach_titles(self.schedule_data[first_row:])
+        return self.schedule_data
+
+    def parse_personal_schedule(self) -> List[ScheduleEntry]:
+        """Parse personal schedule data with sequential row processing"""
+        first_row = len(self.schedule_data)
+        rows = self.__soup_personal_rows() if self.soup is not None else self.__lxml_personal_rows()
+
+        for current_date, program_description, time_text in rows:
+            # Parse time information
+            times = time_text.strip().split('-')
+            if len(times) != 2:
+                continue
+
+            start_time = times[0].strip().replace('\xa0', '')
+            end_time = times[1].strip().replace('\xa0', '')
+            minutes = duration_minutes(start_time, end_time)
+
+            self.schedule_data.append(ScheduleEntry(
+                date=current_date,
+                program_title='', # Resolved for all rows at once below
+                description=program_description,
+                activity='', # Always empty as per client request
+                duration=round(minutes / 60, 2),
+                duration_minutes=minutes,
+                start_time=start_time,
+                end_time=end_time,
+            ))
+
+        self.__attach_titles(self.schedule_data[first_row:])
         return self.schedule_data
 
     def parse_schedule(self) -> None:
@@ -225,54 +437,63 @@ class ScheduleParser:
         else:
             self.parse_general_schedule()
 
-    def get_parsed_data(self) -> List[Dict]:
+    def get_parsed_data(self) -> List[ScheduleEntry]:
         """Return the parsed schedule data"""
         return self.schedule_data
 
-    def set_parsed_data(self, data: List[Dict]) -> None:
-        """Set the parsed schedule data directly"""
-        self.schedule_data = data
+    def set_parsed_data(self, data: List[ScheduleEntry | Dict]) -> None:
+        """Set the parsed schedule data directly, accepting entries or row dicts"""
+        self.schedule_data = [ScheduleEntry.coerce(entry) for entry in data]
+
+    def save_to_xlsx(self, output: Optional[BinaryIO] = None) -> str:
+        """Save parsed schedule to Excel file with proper Polish locale handling
+
+        Args:
+            output: Binary file object to write the workbook to instead of the
+                configured output path, e.g. an in-memory buffer
 
-    def save_to_xlsx(self) -> str:
-        """Save parsed schedule to Excel file with proper Polish locale handling"""
+        Returns:
+            Filename suggested for the download
+        """
         if self.schedule_config.is_personal and self.schedule_config.use_template_export:
             identity = generate_template_report(
                 schedule_data=self.schedule_data,
                 username=self.schedule_config.username,
-                output_path=self.schedule_config.get_full_output_path(),
+                output=output or self.schedule_config.get_full_output_path(),
             )
             logging.info(
                 "Template report saved successfully to %s",
-                self.schedule_config.get_full_output_path(),
+                "memory" if output else self.schedule_config.get_full_output_path(),
             )
             return identity.filename
 
-        self._save_legacy_xlsx()
+        self._save_legacy_xlsx(output)
         return self.schedule_config.output_filename
 
-    def _save_legacy_xlsx(self) -> None:
+    def _save_legacy_xlsx(self, output: Optional[BinaryIO] = None) -> None:
         """Save parsed schedule as plain cells without styles or an Excel table."""
         headers = ['Data', 'Tytuł programu', 'Opis', 'Czynność', 'Liczba godzin', 'Od', 'Do'] if self.schedule_config.is_personal \
             else ['Data', 'Tytuł programu', 'Opis', 'Czynność', 'Liczba godzin', 'Od', 'Do', 'Montażysta']
 
         output_file_path = self.schedule_config.get_full_output_path()
-        output_dir = Path(self.schedule_config.output_dir)
-        output_dir.mkdir(parents=True, exist_ok=True)
+        if output is None:
+            output_dir = Path(self.schedule_config.output_dir)
+            output_dir.mkdir(parents=True, exist_ok=True)
 
         # Prepare data for DataFrame
         data = []
         for entry in self.schedule_data:
             row = [
-                entry['date'],
-                entry['program_title'],
-                entry['description'],
-                entry['activity'],
-                float(entry['duration']),
-                entry['start_time'],
-                entry['end_time']
+                entry.date_text,
+                entry.program_title,
+                entry.description,
+                entry.activity,
+                float(entry.duration),
+                entry.start_time,
+                entry.end_time
             ]
             if not self.schedule_config.is_personal:
-                row.append(entry['editor'])
+                row.append(entry.editor)
             data.append(row)
 
         try:
@@ -288,8 +509,8 @@ class ScheduleParser:
             worksheet.append(headers)
             for row in data:
                 worksheet.append(row)
-            workbook.save(output_file_path)
-            logging.info(f"Schedule saved successfully to {output_file_path}")
+            workbook.save(output_file_path if output is None else output)
+            logging.info(f"Schedule saved successfully to {'memory' if output else output_file_path}")
 
         except PermissionError:
             logging.error(f"Permission denied when saving to {output_file_path}")
@@ -1,11 +1,26 @@
 import logging
-from typing import Optional, List
-from datetime import datetime, timedelta
 import os
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import BinaryIO, Callable, Iterator, Optional, List, Tuple
+from datetime import datetime, timedelta
+from urllib.parse import urlparse
+import threading
+import time
 import requests
 
 from backend.config import ScheduleConfig, ScraperConfig
+from backend.circuit_breaker import CircuitBreaker
+from backend.parse_pool import ParsePool, parse_week_rows
+from backend.parsed_week_cache import ParsedWeekCache
+from backend.program_titles import NORMALIZATION_VERSION
+from backend.retry import ExportRetries
 from backend.schedule_parser import ScheduleParser
+from backend.session_pool import SessionPool
+from backend.upstream_limiter import UpstreamLimiter
+from backend.single_flight import SingleFlight
+from backend.week_cache import CachedWeek, WeekCache
 
 # Configure logging
 logging.basicConfig(
@@ -28,152 +43,565 @@ class ScheduleFetchError(Exception):
     pass
 
 
-class ScheduleScraper:
-    def __init__(self, schedule_config: ScheduleConfig):
-        self.config = ScraperConfig()
-        self.session = requests.Session()
-        self.schedule_data = []
-        self.schedule_config = schedule_config
+# Present on every schedule page, but not on the login page GPT redirects to
+SCHEDULE_PAGE_MARKER = 'gpt-table-section-header'
 
-    @staticmethod
-    def __convert_date_to_url_format(date: str) -> str:
-        """Convert date to URL format from dates like '01/01/2025'"""
-        day, month, year = date.split('.')
-        return f"{month}%2F{day}%2F{year}%2000%3A00%3A00"
+# Logged-in sessions shared by all exports in this process
+SESSION_POOL = SessionPool()
 
-    @staticmethod
-    def __parse_date(date_str: str) -> datetime:
-        """Parse date string in format DD.MM.YYYY to datetime object"""
-        year, month, day = map(int, date_str.split('-'))
-        return datetime(year, month, day)
+# Identical exports running at the same time share one fetch and parse
+SCHEDULE_FLIGHTS = SingleFlight()
 
-    @staticmethod
-    def __format_date(date: datetime) -> str:
-        """Format datetime object to string in format DD.MM.YYYY"""
-        return date.strftime("%d.%m.%Y")
+# Bounds the rate and concurrency of requests to GPT from all exports
+UPSTREAM_LIMITER = UpstreamLimiter()
 
-    def __get_dates_in_range(self) -> List[str]:
-        """Get first day of each week in range from start_date to end_date"""
-        start_date = self.__parse_date(self.schedule_config.start_date)
-        end_date = self.__parse_date(self.schedule_config.end_date)
+# Worker processes parsing fetched weeks for all exports, when enabled
+PARSE_POOL = ParsePool()
 
-        # If end_date is before start_date, swap them
-        if end_date < start_date:
-            start_date, end_date = end_date, start_date
+# Stops calling GPT for a while when it keeps failing, instead of letting
+# every export wait for its timeouts
+CIRCUIT_BREAKER = CircuitBreaker()
 
-        # Get first day of each week in range
-        dates = []
+# Shown by GPT on the login page when the credentials are wrong
+INVALID_CREDENTIALS_TEXT = "Niepoprawny identyfikator lub hasło."
+
+INVALID_CREDENTIALS_ERROR = {"title": "Błąd uwierzytelniania", "message": "Niepoprawny identyfikator lub hasło."}
+SCHEDULE_FETCH_ERROR = {"title": "Błąd pobierania grafiku", "message": "Z jakiegoś powodu nie udało się pobrać planu. :("}
+
+
+def week_fetch_error(date: str) -> ScheduleFetchError:
+    """Error for a week that could not be fetched even after retries"""
+    return ScheduleFetchError({
+        "title": SCHEDULE_FETCH_ERROR["title"],
+        "message": f"Nie udało się pobrać grafiku na tydzień od {date}. Spróbuj ponownie później.",
+    })
 
-        # Adjust start_date to the beginning of the week (Monday)
-        # In Python, weekday() returns 0 for Monday, 6 for Sunday
-        days_to_subtract = start_date.weekday()
-        current_date = start_date - timedelta(days=days_to_subtract)
 
-        # Iterate through weeks until we pass the end_date
-        while current_date <= end_date:
-            dates.append(self.__format_date(current_date))
-            # Move to next Monday
-            current_date += timedelta(days=7)
+def _parse_date(date_str: str) -> datetime:
+    """Parse date string in format YYYY-MM-DD to datetime object"""
+    year, month, day = map(int, date_str.split('-'))
+    return datetime(year, month, day)
+
+
+def _format_date(date: datetime) -> str:
+    """Format datetime object to string in format DD.MM.YYYY"""
+    return date.strftime("%d.%m.%Y")
+
+
+def week_start_dates(start: str, end: str) -> List[str]:
+    """Get first day of each week in range from start to end (YYYY-MM-DD)"""
+    start_date = _parse_date(start)
+    end_date = _parse_date(end)
+
+    # If end_date is before start_date, swap them
+    if end_date < start_date:
+        start_date, end_date = end_date, start_date
+
+    # Get first day of each week in range
+    dates = []
+
+    # Adjust start_date to the beginning of the week (Monday)
+    # In Python, weekday() returns 0 for Monday, 6 for Sunday
+    days_to_subtract = start_date.weekday()
+    current_date = start_date - timedelta(days=days_to_subtract)
+
+    # Iterate through weeks until we pass the end_date
+    while current_date <= end_date:
+        dates.append(_format_date(current_date))
+        # Move to next Monday
+        current_date += timedelta(days=7)
+
+    return dates
+
+
+def schedule_page_url(config: ScraperConfig, is_personal: bool, date: str) -> str:
+    """Build the schedule URL for the week starting on a DD.MM.YYYY date"""
+    schedule_url = config.personal_schedule_url if is_personal else config.general_schedule_url
+    day, month, year = date.split('.')
+    return f"{schedule_url}?date={month}%2F{day}%2F{year}%2000%3A00%3A00"
+
+
+def is_login_page_url(config: ScraperConfig, url: str) -> bool:
+    """Check whether a response URL is the login page GPT redirects expired sessions to"""
+    return urlparse(config.login_url).path in str(url)
+
+
+def save_rows(rows: list, schedule_config: ScheduleConfig, output: Optional[BinaryIO] = None) -> str:
+    """Save the combined rows of an export, returning the download filename"""
+    try:
+        # Create a new parser with the combined data
+        combined_parser = ScheduleParser("", schedule_config)
+        combined_parser.set_parsed_data(rows)
+        download_filename = combined_parser.save_to_xlsx(output)
+    except PermissionError as e:
+        raise PermissionError({"title": e.args[0]["title"],
+                               "message": e.args[0]["message"]})
+
+    logging.info(f"Schedule saved as {download_filename}")
+    return download_filename
+
+
+def report_week(
+    date: str,
+    index: int,
+    total: int,
+    fetched: bool,
+    rows: int,
+    fetch_seconds: float,
+    parse_seconds: float,
+    progress: Optional[Callable[[int, int], None]],
+    on_week: Optional[Callable[[dict], None]],
+) -> None:
+    """Log a processed week and pass it to the export's progress callbacks"""
+    logging.info(
+        f"Week starting {date}: {rows} rows, "
+        f"fetched in {fetch_seconds:.2f} s, parsed in {parse_seconds:.2f} s"
+    )
+    if on_week:
+        on_week({
+            "week": date,
+            "index": index,
+            "total": total,
+            "fetched": fetched,
+            "rows": rows,
+            "fetchSeconds": round(fetch_seconds, 3),
+            "parseSeconds": round(parse_seconds, 3),
+        })
+    if progress:
+        progress(index, total)
+
+
+@dataclass
+class WeekCacheLookup:
+    """One week's entry in the on-disk week cache, shared by both scrapers
+
+    `fresh_html` is the cached page when it can be used without asking GPT;
+    otherwise the page is requested with `request_headers()` and GPT's answer
+    is passed to `html_from_response`, which also refreshes the cache.
+    """
+    date: str
+    cache: Optional[WeekCache] = None
+    key: str = ''
+    cached: Optional[CachedWeek] = None
+
+    @classmethod
+    def open(cls, config: ScraperConfig, schedule_config: ScheduleConfig, date: str) -> 'WeekCacheLookup':
+        if not config.week_cache_enabled:
+            return cls(date)
+        cache = WeekCache(
+            config.week_cache_dir,
+            config.week_cache_ttl,
+            config.week_cache_closed_after_days,
+            config.week_cache_max_age_days * 24 * 3600,
+        )
+        key = cache.key(schedule_config.username, schedule_config.is_personal, date)
+        return cls(date, cache, key, cache.load(key))
+
+    @property
+    def fresh_html(self) -> Optional[str]:
+        if self.cached and self.cache.is_fresh(self.cached, self.date):
+            return self.cached.html
+        return None
+
+    def request_headers(self) -> dict:
+        """Conditional headers that let GPT answer 304 when the cached page is current"""
+        return self.cached.validators() if self.cached else {}
+
+    def html_from_response(self, response) -> str:
+        """Page from a successful response of GPT, storing it in the cache"""
+        if self.cached and response.status_code == 304:
+            logging.info(f"Cached schedule for week starting {self.date} is still current")
+            self.cached.fetched_at = time.time()
+            self.cache.store(self.key, self.cached)
+            return self.cached.html
+
+        html_content = response.text
+        if self.cache and SCHEDULE_PAGE_MARKER in html_content:
+            self.cache.store(self.key, CachedWeek(
+                html=html_content,
+                fetched_at=time.time(),
+                etag=response.headers.get('ETag', ''),
+                last_modified=response.headers.get('Last-Modified', ''),
+            ))
+        return html_content
+
+
+@dataclass
+class _LoadedWeek:
+    """Result of loading one week: page HTML to parse, or rows from the shared cache"""
+    html: Optional[str] = None
+    rows: Optional[list] = None
+    seconds: float = 0.0
+    # Shared cache key and lease, when this export is the one refreshing the week
+    cache_key: Optional[str] = None
+    lease: Optional[str] = None
+    # Rows being parsed in a worker process while later weeks are fetched
+    parsed: Optional[Future] = None
 
-        return dates
+
+class ScheduleScraper:
+    def __init__(self, schedule_config: ScheduleConfig):
+        self.config = ScraperConfig()
+        self.session = requests.Session()
+        self.schedule_data = []
+        self.schedule_config = schedule_config
+        self.__login_lock = threading.Lock()
+        self.__login_generation = 0
+        self.__retries = ExportRetries(self.config, CIRCUIT_BREAKER)
+        # Token of the half-open probe, when this export holds it
+        self.__probe = None
+        self.__upstream_wait = 0.0
+        self.__upstream_wait_lock = threading.Lock()
+        # Program titles resolved during the current export
+        self.__title_cache = {}
+
+    @contextmanager
+    def __upstream_slot(self) -> Iterator[None]:
+        """Wait for the process-wide limiter before sending a request to GPT"""
+        with UPSTREAM_LIMITER.slot(
+            self.config.upstream_max_in_flight,
+            self.config.upstream_rate,
+            self.config.upstream_burst,
+            self.config.upstream_lock_dir,
+        ) as waited:
+            with self.__upstream_wait_lock:
+                self.__upstream_wait += waited
+            yield
+
+    def __check_circuit(self) -> None:
+        """Fail fast once the circuit breaker has opened, or is half-open for another export's probe"""
+        if CIRCUIT_BREAKER.is_open(self.__probe):
+            raise ScheduleFetchError(SCHEDULE_FETCH_ERROR)
 
     def __login(self) -> bool:
         """Perform login to the system"""
+        self.__check_circuit()
         try:
             payload = {
                 'username': self.schedule_config.username,
                 'password': self.schedule_config.password
             }
-            response = self.session.post(
-                self.config.login_url,
-                data=payload,
-                timeout=self.config.request_timeout
-            )
+            with self.__upstream_slot():
+                response = self.session.post(
+                    self.config.login_url,
+                    data=payload,
+                    timeout=self.config.request_timeout
+                )
             response.raise_for_status()
 
             # Check for error message in response
-            error_message = "Niepoprawny identyfikator lub hasło."
-            if error_message in response.text:
+            if INVALID_CREDENTIALS_TEXT in response.text:
                 logging.error("Invalid credentials")
                 return False
 
             logging.info("Login successful")
             return True
         except requests.exceptions.RequestException as e:
+            self.__retries.record_login_error(e)
             logging.error(f"Login error: {e}")
             return False
 
-    def __fetch_schedule(self, date: str) -> Optional[str]:
-        """Fetch schedule HTML content for a specific date"""
-        schedule_url = self.config.personal_schedule_url if self.schedule_config.is_personal else self.config.general_schedule_url
-
-        date_url = self.__convert_date_to_url_format(date)
-
-        schedule_url += f"?date={date_url}"  # Add date to URL
+    def __authenticate(self) -> bool:
+        """Reuse a pooled session for these credentials or log in and pool the new one"""
+        pool_key = SessionPool.key(self.schedule_config.username, self.schedule_config.password)
+        if self.config.session_pool_size > 0:
+            pooled_session = SESSION_POOL.acquire(pool_key, self.config.session_ttl)
+            if pooled_session is not None:
+                logging.info("Reusing pooled login session")
+                self.session = pooled_session
+                return True
 
+        if not self.__login():
+            return False
+        SESSION_POOL.release(pool_key, self.session, self.config.session_pool_size)
+        return True
+
+    def __is_login_redirect(self, response: requests.Response) -> bool:
+        """Check whether GPT redirected a request to the login page because the session expired"""
+        return is_login_page_url(self.config, getattr(response, 'url', ''))
+
+    def __relogin(self, seen_generation: int) -> None:
+        """Log in again after the session expired, once for all concurrently fetched weeks"""
+        with self.__login_lock:
+            if self.__login_generation != seen_generation:
+                return  # Another week already renewed the session
+            logging.info("Login session expired, logging in again")
+            if not self.__login():
+                SESSION_POOL.discard(SessionPool.key(self.schedule_config.username, self.schedule_config.password))
+                raise LoginError(INVALID_CREDENTIALS_ERROR)
+            self.__login_generation += 1
+
+    def __get(self, url: str, **options) -> requests.Response:
+        """GET a page with the logged-in session, logging in again if it has expired
+
+        Transient failures are retried with backoff within the export's budget.
+        """
+        retry_number = 0
+        while True:
+            options['timeout'] = self.__retries.request_timeout()
+            if options['timeout'] is None:
+                raise requests.exceptions.Timeout("Export deadline exceeded")
+
+            self.__check_circuit()
+            login_generation = self.__login_generation
+            try:
+                with self.__upstream_slot():
+                    response = self.session.get(url, **options)
+                if self.__is_login_redirect(response):
+                    self.__relogin(login_generation)
+                    with self.__upstream_slot():
+                        response = self.session.get(url, **options)
+                response.raise_for_status()
+                self.__retries.record_success()
+                return response
+            except requests.exceptions.RequestException as e:
+                delay = self.__retries.retry_delay(e, retry_number)
+                if delay is None:
+                    raise
+                logging.warning(f"Retrying in {delay:.1f} s after request error: {e}")
+                time.sleep(delay)
+                retry_number += 1
+
+    def __fetch_schedule(self, date: str) -> str:
+        """Fetch schedule HTML content for a specific date, using the week cache when possible
+
+        A week that cannot be fetched fails the whole export, so a workbook
+        never silently lacks a week.
+        """
+        schedule_url = schedule_page_url(self.config, self.schedule_config.is_personal, date)
+
+        lookup = WeekCacheLookup.open(self.config, self.schedule_config, date)
+        if lookup.fresh_html is not None:
+            logging.info(f"Using cached schedule for week starting {date}")
+            return lookup.fresh_html
+
+        request_options = {}
+        if lookup.request_headers():
+            request_options['headers'] = lookup.request_headers()
+
+        logging.info(f"Fetching schedule for week starting {date}")
         try:
-            response = self.session.get(
-                schedule_url,
-                timeout=self.config.request_timeout
-            )
-            response.raise_for_status()
-            return response.text
+            response = self.__get(schedule_url, **request_options)
         except requests.exceptions.RequestException as e:
             logging.error(f"Error fetching schedule for date {date}: {e}")
-            return None
-
-    def scrape_schedule(self) -> str:
-        """Main execution function"""
-        if not self.__login():
-            logging.error("Login failed")
-            raise LoginError({"title": "Błąd uwierzytelniania", "message": "Niepoprawny identyfikator lub hasło."})
+            raise week_fetch_error(date) from e
+        return lookup.html_from_response(response)
 
-        # Get first day of each week in range
-        dates = self.__get_dates_in_range()
-
-        # Create a directory for temporary files if needed
-        temp_dir = os.path.join(self.schedule_config.output_dir, "temp_schedules")
-        os.makedirs(temp_dir, exist_ok=True)
-
-        all_data = []
-
-        # Fetch schedule for each week
-        for date in dates:
-            logging.info(f"Fetching schedule for week starting {date}")
-            html_content = self.__fetch_schedule(date)
-            if not html_content:
+    def __get_shared_cache(self) -> Optional[ParsedWeekCache]:
+        # Only the general schedule is identical for every user
+        if self.schedule_config.is_personal or not self.config.shared_week_cache_enabled:
+            return None
+        return ParsedWeekCache(
+            self.config.shared_week_cache_path,
+            self.config.shared_week_cache_ttl,
+            self.config.shared_week_lease_seconds,
+            self.config.week_cache_closed_after_days,
+            self.config.shared_week_cache_max_age_days * 24 * 3600,
+        )
+
+    def __release_lease(self, week: _LoadedWeek) -> None:
+        """Let other workers refresh a week this export will not store after all"""
+        if not week.lease:
+            return
+        shared_cache = self.__get_shared_cache()
+        if shared_cache:
+            shared_cache.release(week.cache_key, week.lease)
+        week.lease = None
+
+    def __titles_version(self) -> str:
+        title_store = self.schedule_config.get_program_titles_store()
+        if title_store:
+            return f"store:{title_store.version()}"
+        try:
+            stat = os.stat(self.schedule_config.program_titles_csv)
+        except OSError:
+            return ''
+        return f"{stat.st_mtime_ns}:{stat.st_size}:{NORMALIZATION_VERSION}"
+
+    def __load_week(self, date: str) -> _LoadedWeek:
+        """Load a week from the shared cache or fetch it, measuring how long it took"""
+        started = time.perf_counter()
+        shared_cache = self.__get_shared_cache()
+        week = _LoadedWeek()
+        if shared_cache:
+            week.cache_key = shared_cache.key(date, self.__titles_version())
+            week.rows = shared_cache.load(week.cache_key)
+            if week.rows is None:
+                week.lease = shared_cache.try_lease(week.cache_key)
+                if week.lease is None:
+                    logging.info(f"Waiting for another worker to refresh week starting {date}")
+                    week.rows = shared_cache.wait_for(week.cache_key)
+            if week.rows is not None:
+                logging.info(f"Using shared parsed rows for week starting {date}")
+
+        if week.rows is None:
+            try:
+                week.html = self.__fetch_schedule(date)
+            except BaseException:
+                self.__release_lease(week)
+                raise
+            if week.html and self.config.parse_workers > 0:
+                week.parsed = PARSE_POOL.submit(
+                    week.html, self.schedule_config, self.config.parser, self.config.parse_workers
+                )
+        week.seconds = time.perf_counter() - started
+        return week
+
+    def __fetch_weeks(self, dates: List[str]) -> Iterator[Tuple[str, _LoadedWeek]]:
+        """Load weeks with bounded concurrency, yielding them in date order
+
+        All workers share the logged-in session, so its cookie jar is reused.
+        """
+        workers = max(1, min(self.config.fetch_workers, len(dates)))
+        if workers == 1:
+            for date in dates:
+                yield date, self.__load_week(date)
+            return
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="schedule-fetch") as executor:
+            loads = [executor.submit(self.__load_week, date) for date in dates]
+            try:
+                # Weeks are yielded in submission order, so they can be parsed
+                # as soon as they arrive while later weeks are still loading
+                for date, load in zip(dates, loads):
+                    yield date, load.result()
+            finally:
+                # When the export fails part-way, weeks loaded but never
+                # parsed must not stay leased
+                for load in loads:
+                    if not load.cancel() and load.exception() is None:
+                        self.__release_lease(load.result())
+
+    def __parse_week(self, date: str, week: _LoadedWeek) -> list:
+        """Parse a freshly fetched week and share the rows with other workers"""
+        if week.rows is not None:
+            return week.rows
+        try:
+            if not week.html:
                 logging.error(f"Failed to fetch schedule for week starting {date}")
-                continue
+                return []
+
+            if week.parsed:
+                week_data = week.parsed.result()
+            else:
+                week_data = parse_week_rows(week.html, self.schedule_config, self.config.parser, self.__title_cache)
+            shared_cache = self.__get_shared_cache() if week.cache_key else None
+            if shared_cache and SCHEDULE_PAGE_MARKER in week.html:
+                shared_cache.store(week.cache_key, date, week_data, week.lease)
+                week.lease = None
+            return week_data
+        finally:
+            self.__release_lease(week)
+
+    def __flight_key(self, dates: List[str]) -> tuple:
+        """Identify exports that fetch exactly the same rows
+
+        The general schedule is the same for every editor, so only personal
+        schedules are keyed by user.
+        """
+        if self.schedule_config.is_personal:
+            return 'personal', self.schedule_config.username.strip().lower(), tuple(dates)
+        return 'general', tuple(dates)
+
+    def __collect_rows(
+        self,
+        dates: List[str],
+        progress: Optional[Callable[[int, int], None]] = None,
+        on_week: Optional[Callable[[dict], None]] = None,
+    ) -> list:
+        """Fetch and parse every week, returning the combined rows"""
+        all_data = []
 
-            # Parse the schedule
-            parser = ScheduleParser(html_content, self.schedule_config)
-            parser.parse_schedule()
+        if progress:
+            progress(0, len(dates))
 
-            # Add the parsed data to the combined data
-            all_data.extend(parser.get_parsed_data())
+        # Fetch schedule for each week
+        weeks = self.__fetch_weeks(dates)
+        try:
+            for completed_weeks, (date, week) in enumerate(weeks, start=1):
+                parse_started = time.perf_counter()
+                # Parse the schedule and add it to the combined data
+                week_data = self.__parse_week(date, week)
+                all_data.extend(week_data)
+                parse_seconds = time.perf_counter() - parse_started
+                fetch_seconds = week.seconds
+
+                report_week(
+                    date, completed_weeks, len(dates), bool(week.html) or week.rows is not None,
+                    len(week_data), fetch_seconds, parse_seconds, progress, on_week,
+                )
+        finally:
+            # Stops loading further weeks and releases their leases right away
+            weeks.close()
 
         if not all_data:
             logging.error("No schedule data was fetched")
-            raise ScheduleFetchError(
-                {"title": "Błąd pobierania grafiku", "message": "Z jakiegoś powodu nie udało się pobrać planu. :("})
-
-        # Save the combined data
+            raise ScheduleFetchError(SCHEDULE_FETCH_ERROR)
+
+        return all_data
+
+    def scrape_schedule(
+        self,
+        output: Optional[BinaryIO] = None,
+        progress: Optional[Callable[[int, int], None]] = None,
+        on_week: Optional[Callable[[dict], None]] = None,
+    ) -> str:
+        """Main execution function
+
+        Args:
+            output: Binary file object receiving the workbook; when omitted it is
+                saved to the configured output path
+            progress: Called with (completed weeks, total weeks) after each week
+            on_week: Called after each week with its date, row count and
+                fetch/parse timings
+
+        Returns:
+            Filename suggested for the download
+        """
+        admission = CIRCUIT_BREAKER.allow(self.config.circuit_reset_timeout)
+        if not admission:
+            logging.warning("GPT circuit breaker is open, failing fast")
+            raise ScheduleFetchError(SCHEDULE_FETCH_ERROR)
+        self.__probe = admission.probe
         try:
-            # Create a new parser with the combined data
-            combined_parser = ScheduleParser("", self.schedule_config)
-            combined_parser.set_parsed_data(all_data)
-            download_filename = combined_parser.save_to_xlsx()
-        except PermissionError as e:
-            raise PermissionError({"title": e.args[0]["title"],
-                                   "message": e.args[0]["message"]})
-
-        logging.info(f"Schedule saved to {self.schedule_config.output_filename}")
+            return self.__scrape_schedule(output, progress, on_week)
+        finally:
+            # Exports served without reaching GPT (pooled session, cached
+            # weeks) must not keep the half-open probe slot
+            CIRCUIT_BREAKER.release_probe(self.__probe)
+
+    def __scrape_schedule(
+        self,
+        output: Optional[BinaryIO],
+        progress: Optional[Callable[[int, int], None]],
+        on_week: Optional[Callable[[dict], None]],
+    ) -> str:
+        self.__retries = ExportRetries(self.config, CIRCUIT_BREAKER)
+        self.__upstream_wait = 0.0
+        self.__title_cache = {}
+
+        # Every export logs in with its own credentials, even when it then
+        # joins another export's fetch, so rows are never handed to a user
+        # who could not have fetched them
+        if not self.__authenticate():
+            logging.error("Login failed")
+            raise LoginError(INVALID_CREDENTIALS_ERROR)
 
-        # Clean up temporary files
-        try:
-            import shutil
-            shutil.rmtree(temp_dir)
-        except Exception as e:
-            logging.warning(f"Failed to clean up temporary files: {e}")
+        # Get first day of each week in range
+        dates = week_start_dates(self.schedule_config.start_date, self.schedule_config.end_date)
+
+        all_data, shared = SCHEDULE_FLIGHTS.do(
+            self.__flight_key(dates),
+            lambda: self.__collect_rows(dates, progress, on_week),
+        )
+        if shared:
+            logging.info("Joined an identical export already in progress")
+            all_data = list(all_data)
+            if progress:
+                progress(len(dates), len(dates))
+
+        download_filename = save_rows(all_data, self.schedule_config, output)
+        if self.__upstream_wait:
+            logging.info(f"Export waited {self.__upstream_wait:.2f} s in total for upstream request slots")
 
         return download_filename
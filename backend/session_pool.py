@@ -0,0 +1,64 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import requests
+
+
+class SessionPool:
+    """Bounded, process-wide pool of logged-in sessions
+
+    Sessions are keyed by a hash of the credentials, so a pooled session is
+    only ever handed to someone who knows the password it was opened with.
+    Entries idle for longer than the TTL are dropped; the least recently used
+    entry is evicted when the pool is full. Evicted sessions are not closed,
+    because another export may still be using them.
+    """
+
+    def __init__(self):
+        self._sessions: "OrderedDict[str, tuple[requests.Session, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(username: str, password: str) -> str:
+        credentials = f"{username.strip().lower()}\0{password}"
+        return hashlib.sha256(credentials.encode('utf-8')).hexdigest()
+
+    def acquire(self, key: str, ttl: float) -> Optional[requests.Session]:
+        """Return the pooled session for the key, or None if missing or idle too long"""
+        with self._lock:
+            entry = self._sessions.get(key)
+            if entry is None:
+                return None
+            session, last_used = entry
+            now = time.monotonic()
+            if now - last_used > ttl:
+                del self._sessions[key]
+                return None
+            self._sessions[key] = (session, now)
+            self._sessions.move_to_end(key)
+            return session
+
+    def release(self, key: str, session: requests.Session, max_size: int) -> None:
+        """Store a freshly logged-in session, evicting the least recently used ones"""
+        if max_size < 1:
+            return
+        with self._lock:
+            self._sessions[key] = (session, time.monotonic())
+            self._sessions.move_to_end(key)
+            while len(self._sessions) > max_size:
+                self._sessions.popitem(last=False)
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            self._sessions.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._sessions.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
@@ -0,0 +1,71 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator
+
+
+class SQLiteConnections:
+    """Per-thread connections to one SQLite database shared by worker processes
+
+    A thread opens its connection on first use and keeps it. Only the first
+    connection switches the database to WAL and creates `schema`. Connections
+    run in autocommit mode; `transaction()` groups statements.
+    """
+
+    def __init__(self, path: str, schema: str):
+        self.path = Path(path)
+        self.schema = schema
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+
+    def get(self) -> sqlite3.Connection:
+        """Connection of the calling thread, opened on its first query"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            return connection
+        with self._schema_lock:
+            if not self._schema_ready:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            try:
+                if not self._schema_ready:
+                    connection.execute("PRAGMA journal_mode=WAL")
+                    connection.executescript(self.schema)
+                    self._schema_ready = True
+            except BaseException:
+                connection.close()
+                raise
+        self._local.connection = connection
+        return connection
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run the block in one write transaction, rolled back if it raises"""
+        connection = self.get()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def close(self) -> None:
+        """Close the calling thread's connection; the next query opens a new one"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            self._local.connection = None
+            connection.close()
+
+
+_connections: Dict[Path, SQLiteConnections] = {}
+_connections_lock = threading.Lock()
+
+
+def get_connections(path: str, schema: str) -> SQLiteConnections:
+    """Process-wide connections to the database at `path`, shared by all its users"""
+    with _connections_lock:
+        return _connections.setdefault(Path(path), SQLiteConnections(path, schema))
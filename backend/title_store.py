@@ -0,0 +1,171 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from backend.program_titles import (
+    NORMALIZATION_VERSION,
+    description_prefixes,
+    normalize_description,
+    read_titles_csv,
+)
+from backend.sqlite_connections import get_connections
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS titles (
+    description TEXT NOT NULL,
+    normalized TEXT NOT NULL,
+    title TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS titles_description ON titles (description);
+CREATE INDEX IF NOT EXISTS titles_normalized ON titles (normalized);
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+# Bound parameters per query, below SQLite's historical limit of 999
+QUERY_CHUNK_SIZE = 500
+
+
+def _chunks(values: list) -> Iterable[list]:
+    for start in range(0, len(values), QUERY_CHUNK_SIZE):
+        yield values[start:start + QUERY_CHUNK_SIZE]
+
+
+class TitleStore:
+    """Program titles in an indexed SQLite database shared by all worker processes
+
+    An alternative to loading the whole CSV dictionary into every process.
+    It is imported in bulk from the same CSV format and answers the titles
+    of many descriptions in a few queries, matching like TitleIndex: exact
+    description, normalized description, then longest whole-word prefix.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._connections = get_connections(path, SCHEMA)
+
+    def close(self) -> None:
+        """Close the calling thread's connection; the next query opens a new one"""
+        self._connections.close()
+
+    def version(self) -> str:
+        """Identifier that changes with every import"""
+        return self.__meta('version') or ''
+
+    def import_csv(self, csv_path: str, only_if_changed: bool = False) -> bool:
+        """Replace all titles with the CSV dictionary, in one transaction
+
+        With `only_if_changed` the import is skipped when this CSV file was
+        already imported unchanged, e.g. by another worker process.
+        """
+        source = self.__source_id(csv_path)
+        if only_if_changed and self.__meta('source') == source:
+            return False
+        titles = read_titles_csv(csv_path)
+        rows = [
+            (description, normalize_description(description), title)
+            for description, title in titles.items()
+            if title
+        ]
+
+        with self._connections.transaction() as connection:
+            if only_if_changed and self.__read_meta(connection, 'source') == source:
+                return False
+            connection.execute("DELETE FROM titles")
+            # Insertion order decides between near-duplicate keys, as in TitleIndex
+            connection.executemany(
+                "INSERT INTO titles (description, normalized, title) VALUES (?, ?, ?)", rows
+            )
+            connection.executemany(
+                "INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)",
+                [('source', source), ('version', uuid.uuid4().hex)],
+            )
+        logging.info(f"Imported {len(rows)} program titles into {self.path}")
+        return True
+
+    def lookup_many(self, descriptions: Iterable[str]) -> Dict[str, str]:
+        """Titles of all given descriptions; unmatched ones map to ''"""
+        pending = list(dict.fromkeys(description for description in descriptions if description))
+        found: Dict[str, str] = {}
+        if not pending:
+            return found
+
+        connection = self._connections.get()
+        for chunk in _chunks(pending):
+            placeholders = ', '.join('?' * len(chunk))
+            for description, title in connection.execute(
+                f"SELECT description, title FROM titles WHERE description IN ({placeholders})", chunk
+            ):
+                found[description] = title
+
+        prefixes = {
+            description: description_prefixes(normalize_description(description))
+            for description in pending
+            if description not in found
+        }
+        candidates = list(dict.fromkeys(prefix for options in prefixes.values() for prefix in options))
+        titles_by_prefix: Dict[str, str] = {}
+        for chunk in _chunks(candidates):
+            placeholders = ', '.join('?' * len(chunk))
+            for normalized, title in connection.execute(
+                f"SELECT normalized, title FROM titles WHERE normalized IN ({placeholders}) ORDER BY rowid",
+                chunk,
+            ):
+                # The first of several near-duplicate keys wins
+                titles_by_prefix.setdefault(normalized, title)
+
+        for description, options in prefixes.items():
+            found[description] = next(
+                (titles_by_prefix[prefix] for prefix in options if prefix in titles_by_prefix), ''
+            )
+        return found
+
+    def lookup(self, description: str) -> str:
+        return self.lookup_many([description]).get(description, '')
+
+    def __meta(self, name: str) -> Optional[str]:
+        return self.__read_meta(self._connections.get(), name)
+
+    @staticmethod
+    def __read_meta(connection: sqlite3.Connection, name: str) -> Optional[str]:
+        row = connection.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def __source_id(csv_path: str) -> str:
+        stat = os.stat(csv_path)
+        # The normalized column is rebuilt when normalization changes
+        return f"{os.path.abspath(csv_path)}:{stat.st_mtime_ns}:{stat.st_size}:{NORMALIZATION_VERSION}"
+
+
+_stores: Dict[str, TitleStore] = {}
+_checked_at: Dict[str, float] = {}
+_stores_lock = threading.Lock()
+
+
+def get_title_store(path: str, csv_path: str, check_interval: float) -> Optional[TitleStore]:
+    """Process-wide store for `path`, imported from the CSV whenever that file changes
+
+    The CSV is compared with the last import at most once per
+    `check_interval` seconds. None is returned when the store cannot be
+    used, so callers fall back to the in-memory dictionary.
+    """
+    with _stores_lock:
+        store = _stores.setdefault(path, TitleStore(path))
+        now = time.monotonic()
+        if now - _checked_at.get(path, float('-inf')) < check_interval:
+            return store
+        try:
+            store.import_csv(csv_path, only_if_changed=True)
+        except (OSError, sqlite3.Error, ValueError, IndexError) as e:
+            logging.error(f"Program titles store unavailable: {e}")
+            return None
+        _checked_at[path] = now
+        return store
@@ -0,0 +1,157 @@
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows development machines
+    fcntl = None
+
+
+# Interval for re-checking slots held by other worker processes
+SHARED_SLOT_POLL_SECONDS = 0.05
+
+
+class UpstreamLimiter:
+    """Limits requests to GPT by a token bucket and a maximum number in flight
+
+    One instance is shared by all scrapers of a process. When `lock_dir` is
+    given and fcntl is available, the limits are enforced across all worker
+    processes: in-flight slots are lock files held with flock, and the token
+    bucket state lives in a file updated under an exclusive lock.
+
+    Limits are passed to every call, so they can come from configuration read
+    after this object was created. Time spent waiting is recorded in stats().
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._tokens: Optional[float] = None
+        self._updated = 0.0
+        self._requests = 0
+        self._wait_seconds = 0.0
+        self._max_wait_seconds = 0.0
+
+    @contextmanager
+    def slot(
+        self,
+        max_in_flight: int,
+        rate: float,
+        burst: int,
+        lock_dir: Optional[str] = None,
+    ) -> Iterator[float]:
+        """Wait for permission to send one request; yields the seconds waited"""
+        started = time.monotonic()
+        shared_dir = Path(lock_dir) if lock_dir and fcntl else None
+        slot_file = None
+
+        if shared_dir:
+            shared_dir.mkdir(parents=True, exist_ok=True)
+            if max_in_flight > 0:
+                slot_file = self.__acquire_shared_slot(shared_dir, max_in_flight)
+            # The lock files enforce the limit; the local count only feeds stats()
+            self.__acquire_local_slot(0)
+        else:
+            self.__acquire_local_slot(max_in_flight)
+        try:
+            if rate > 0:
+                if shared_dir:
+                    self.__take_shared_token(shared_dir / 'token_bucket', rate, burst)
+                else:
+                    self.__take_local_token(rate, burst)
+            waited = time.monotonic() - started
+            self.__record_wait(waited)
+            yield waited
+        finally:
+            if slot_file is not None:
+                fcntl.flock(slot_file, fcntl.LOCK_UN)
+                slot_file.close()
+            with self._condition:
+                self._in_flight -= 1
+                self._condition.notify_all()
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {
+                "requests": self._requests,
+                "inFlight": self._in_flight,
+                "waitSeconds": round(self._wait_seconds, 3),
+                "maxWaitSeconds": round(self._max_wait_seconds, 3),
+            }
+
+    def reset(self) -> None:
+        with self._condition:
+            self._tokens = None
+            self._requests = 0
+            self._wait_seconds = 0.0
+            self._max_wait_seconds = 0.0
+
+    def __acquire_local_slot(self, max_in_flight: int) -> None:
+        with self._condition:
+            if max_in_flight > 0:
+                self._condition.wait_for(lambda: self._in_flight < max_in_flight)
+            self._in_flight += 1
+
+    def __take_local_token(self, rate: float, burst: int) -> None:
+        capacity = max(1, burst)
+        while True:
+            with self._condition:
+                now = time.monotonic()
+                if self._tokens is None:
+                    self._tokens = float(capacity)
+                else:
+                    self._tokens = min(capacity, self._tokens + (now - self._updated) * rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                delay = (1 - self._tokens) / rate
+            time.sleep(delay)
+
+    @staticmethod
+    def __acquire_shared_slot(directory: Path, max_in_flight: int):
+        while True:
+            for index in range(max_in_flight):
+                slot_file = open(directory / f"slot-{index}.lock", 'a')
+                try:
+                    fcntl.flock(slot_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    return slot_file
+                except BlockingIOError:
+                    slot_file.close()
+            time.sleep(SHARED_SLOT_POLL_SECONDS)
+
+    @staticmethod
+    def __take_shared_token(path: Path, rate: float, burst: int) -> None:
+        capacity = max(1, burst)
+        while True:
+            with open(path, 'a+') as bucket:
+                fcntl.flock(bucket, fcntl.LOCK_EX)
+                bucket.seek(0)
+                now = time.time()
+                try:
+                    tokens, updated = map(float, bucket.read().split())
+                    tokens = min(capacity, tokens + max(0.0, now - updated) * rate)
+                except ValueError:
+                    tokens = float(capacity)
+                delay = 0.0 if tokens >= 1 else (1 - tokens) / rate
+                if not delay:
+                    tokens -= 1
+                bucket.seek(0)
+                bucket.truncate()
+                bucket.write(f"{tokens} {now}")
+            if not delay:
+                return
+            time.sleep(delay)
+
+    def __record_wait(self, waited: float) -> None:
+        with self._condition:
+            self._requests += 1
+            self._wait_seconds += waited
+            self._max_wait_seconds = max(self._max_wait_seconds, waited)
+        if waited >= 1:
+            logging.info(f"Waited {waited:.1f} s for an upstream request slot (pid {os.getpid()})")
@@ -0,0 +1,139 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+
+# Seconds between scans of a cache directory for unused entries
+PRUNE_INTERVAL = 3600
+
+# Last scan per cache directory in this process
+_pruned_at: dict[Path, float] = {}
+_pruned_at_lock = threading.Lock()
+
+
+def is_week_closed(week_start: str, closed_after_days: int, today: date | None = None) -> bool:
+    """Check whether a week (DD.MM.YYYY) ended more than `closed_after_days` ago"""
+    week_end = datetime.strptime(week_start, '%d.%m.%Y').date() + timedelta(days=6)
+    today = today or date.today()
+    return week_end < today - timedelta(days=closed_after_days)
+
+
+@dataclass
+class CachedWeek:
+    html: str
+    fetched_at: float
+    etag: str = ''
+    last_modified: str = ''
+
+    def validators(self) -> dict:
+        """Conditional request headers for revalidating this entry"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class WeekCache:
+    """On-disk cache of schedule pages, one gzip-compressed JSON file per week
+
+    Weeks that ended more than `closed_after_days` ago are never refreshed,
+    because the schedule cannot change once payroll is closed. Other weeks are
+    fresh for `ttl` seconds and are then revalidated with a conditional GET.
+
+    Loading an entry updates its file's modification time, and entries not
+    used for `max_age` seconds are deleted while storing, at most once per
+    PRUNE_INTERVAL per directory and process, so the cache does not keep
+    every week of every user forever.
+    """
+
+    def __init__(self, directory: str, ttl: int, closed_after_days: int, max_age: int = 0):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.closed_after_days = closed_after_days
+        # 0 keeps entries until they are replaced
+        self.max_age = max_age
+
+    @staticmethod
+    def key(username: str, is_personal: bool, week_start: str) -> str:
+        """Build a file-safe key without storing the username in clear text"""
+        schedule_type = 'personal' if is_personal else 'general'
+        identity = f"{username.strip().lower()}\0{schedule_type}\0{week_start}"
+        return hashlib.sha256(identity.encode('utf-8')).hexdigest()
+
+    def __path(self, key: str) -> Path:
+        return self.directory / f"{key}.json.gz"
+
+    def load(self, key: str) -> CachedWeek | None:
+        path = self.__path(key)
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                entry = CachedWeek(**json.load(f))
+            # Marks the entry as used, so pruning keeps it
+            os.utime(path)
+            return entry
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, TypeError) as e:
+            logging.warning(f"Ignoring unreadable schedule cache entry {key}: {e}")
+            return None
+
+    def store(self, key: str, entry: CachedWeek) -> None:
+        temporary_path = None
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(dir=self.directory, suffix='.tmp', delete=False) as temporary_file:
+                temporary_path = Path(temporary_file.name)
+                with gzip.open(temporary_file, 'wt', encoding='utf-8') as f:
+                    json.dump(asdict(entry), f, ensure_ascii=False)
+            os.replace(temporary_path, self.__path(key))
+            temporary_path = None
+        except OSError as e:
+            # The cache is an optimisation only, so failures must not break exports
+            logging.warning(f"Failed to write schedule cache entry {key}: {e}")
+        finally:
+            if temporary_path is not None:
+                temporary_path.unlink(missing_ok=True)
+        self.prune()
+
+    def prune(self, force: bool = False) -> int:
+        """Delete entries not used for `max_age` seconds, returning how many were deleted"""
+        if self.max_age <= 0:
+            return 0
+        now = time.time()
+        with _pruned_at_lock:
+            if not force and time.monotonic() - _pruned_at.get(self.directory, float('-inf')) < PRUNE_INTERVAL:
+                return 0
+            _pruned_at[self.directory] = time.monotonic()
+
+        deleted = 0
+        try:
+            paths = list(self.directory.glob('*.json.gz'))
+        except OSError:
+            return 0
+        for path in paths:
+            try:
+                if now - path.stat().st_mtime > self.max_age:
+                    path.unlink()
+                    deleted += 1
+            except OSError:
+                # Already deleted by another process
+                continue
+        if deleted:
+            logging.info(f"Deleted {deleted} unused schedule cache entries")
+        return deleted
+
+    def is_closed(self, week_start: str, today: date | None = None) -> bool:
+        return is_week_closed(week_start, self.closed_after_days, today)
+
+    def is_fresh(self, entry: CachedWeek, week_start: str) -> bool:
+        return self.is_closed(week_start) or time.time() - entry.fetched_at < self.ttl
@@ -0,0 +1,94 @@
+"""Measure template report generation time for templates of different sizes.
+
+Run from the project root:
+
+    uv run python -m benchmarks.report_generation
+"""
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import patch
+from zipfile import ZIP_DEFLATED, ZipFile
+
+from lxml import etree
+
+from backend import reporting
+from backend.reporting import (
+    MAIN_NS,
+    ReportSettings,
+    _resolve_worksheet_path,
+    generate_template_report,
+)
+
+
+ROW_COUNTS = (500, 2_000, 10_000)
+REPEATS = 3
+
+
+def _build_template(source_path: Path, target_path: Path, settings: ReportSettings) -> None:
+    """Copy the bundled template, resizing its report sheet to the settings' row range."""
+    data_columns = (
+        settings.date_column,
+        settings.program_title_column,
+        settings.description_column,
+        settings.activity_column,
+        settings.hours_column,
+    )
+    with ZipFile(source_path) as source, ZipFile(target_path, "w", ZIP_DEFLATED) as target:
+        worksheet_path = _resolve_worksheet_path(source, settings.worksheet)
+        root = etree.fromstring(source.read(worksheet_path))
+        sheet_data = root.find(f"{{{MAIN_NS}}}sheetData")
+        for row in sheet_data.findall(f"{{{MAIN_NS}}}row"):
+            if int(row.get("r")) >= settings.start_row:
+                sheet_data.remove(row)
+        for row_number in range(settings.start_row, settings.end_row + 1):
+            row = etree.SubElement(sheet_data, f"{{{MAIN_NS}}}row", r=str(row_number))
+            for column in data_columns:
+                etree.SubElement(row, f"{{{MAIN_NS}}}c", r=f"{column}{row_number}")
+        for item in source.infolist():
+            content = source.read(item.filename)
+            if item.filename == worksheet_path:
+                content = etree.tostring(root, xml_declaration=True, encoding="UTF-8")
+            target.writestr(item, content)
+
+
+def _schedule_data(count: int) -> list[dict]:
+    return [
+        {
+            "date": f"{day % 28 + 1}.05.2026",
+            "program_title": "Liga Polska",
+            "description": f"MECZ TESTOWY {index}",
+            "duration": 2.5,
+        }
+        for index, day in enumerate(range(count))
+    ]
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        workspace = Path(directory)
+        with patch.object(reporting, "MANAGED_TEMPLATE_PATH", workspace / "missing.xlsx"):
+            for row_count in ROW_COUNTS:
+                settings = ReportSettings(end_row=ReportSettings.start_row + row_count - 1)
+                template_path = workspace / f"template_{row_count}.xlsx"
+                _build_template(reporting.DEFAULT_TEMPLATE_PATH, template_path, settings)
+                data = _schedule_data(row_count)
+
+                timings = []
+                with patch.object(reporting, "DEFAULT_TEMPLATE_PATH", template_path):
+                    for _ in range(REPEATS):
+                        started = time.perf_counter()
+                        generate_template_report(
+                            data,
+                            "jan.kowalski",
+                            workspace / "result.xlsx",
+                            settings=settings,
+                            current_time=datetime(2026, 5, 20, 12, 0),
+                        )
+                        timings.append(time.perf_counter() - started)
+                print(f"{row_count:>6} rows: best {min(timings):.3f} s of {REPEATS}")
+
+
+if __name__ == "__main__":
+    main()
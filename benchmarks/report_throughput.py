@@ -0,0 +1,99 @@
+"""Measure how many template reports per second can be written.
+
+Reports are written twice: as before unchanged members were copied raw, with
+every member recompressed by writestr(), and with the current raw copies.
+
+Run from the project root:
+
+    uv run python -m benchmarks.report_throughput
+"""
+import copy
+import tempfile
+import time
+import zlib
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import patch
+from zipfile import ZIP_DEFLATED, ZipFile
+
+from backend import reporting
+from backend.reporting import (
+    ReportSettings,
+    clear_template_cache,
+    generate_template_report,
+    get_report_template_path,
+)
+
+
+DURATION_SECONDS = 5.0
+
+
+def _schedule_data(count: int) -> list[dict]:
+    return [
+        {
+            "date": f"{index % 28 + 1}.05.2026",
+            "program_title": "Liga Polska",
+            "description": f"MECZ TESTOWY {index}",
+            "duration": 2.5,
+        }
+        for index in range(count)
+    ]
+
+
+def _write_recompressed_archive(destination_file, compiled, updated_xml: bytes) -> None:
+    """Baseline writer: every member is deflated again by writestr()
+
+    The cached members are inflated first, which the former cache of
+    uncompressed members did not need; inflating is cheap next to deflating.
+    """
+    with ZipFile(destination_file, "w", compression=ZIP_DEFLATED) as destination:
+        destination.comment = compiled.comment
+        for archive_item, content in compiled.entries:
+            if content is None:
+                content = updated_xml
+            elif archive_item.compress_type == ZIP_DEFLATED:
+                content = zlib.decompress(content, -15)
+            destination.writestr(copy.copy(archive_item), content)
+
+
+def _measure(data: list[dict], settings: ReportSettings, output_path: Path) -> tuple[float, float]:
+    """Return the seconds of the first report and the reports per second after it"""
+    clear_template_cache()
+    started = time.perf_counter()
+    # The first report compiles the template; it is reported separately.
+    generate_template_report(
+        data, "jan.kowalski", output_path, settings, datetime(2026, 5, 20, 12, 0)
+    )
+    first_report = time.perf_counter() - started
+
+    reports = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < DURATION_SECONDS:
+        generate_template_report(
+            data, "jan.kowalski", output_path, settings, datetime(2026, 5, 20, 12, 0)
+        )
+        reports += 1
+    return first_report, reports / (time.perf_counter() - started)
+
+
+def main() -> None:
+    settings = ReportSettings()
+    data = _schedule_data(120)
+    print(f"Template: {get_report_template_path()}")
+    with tempfile.TemporaryDirectory() as directory:
+        output_path = Path(directory) / "result.xlsx"
+        with patch.object(reporting, "_write_report_archive", _write_recompressed_archive):
+            modes = [("writestr recompression", _measure(data, settings, output_path))]
+        modes.append(("raw member copies", _measure(data, settings, output_path)))
+
+        for name, (first_report, throughput) in modes:
+            print(
+                f"{name}: {throughput:.1f} reports/s "
+                f"({1000 / throughput:.1f} ms per report, first report {first_report:.3f} s)"
+            )
+        print(f"Report size: {output_path.stat().st_size / 1024:.0f} KiB")
+        print(f"Speed-up: {modes[1][1][1] / modes[0][1][1]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
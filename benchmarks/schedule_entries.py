@@ -0,0 +1,54 @@
+"""Compare the memory used by parsed rows held as dicts and as ScheduleEntry.
+
+Run from the project root:
+
+    uv run python -m benchmarks.schedule_entries
+"""
+import gc
+import tracemalloc
+from datetime import date, timedelta
+
+from backend.schedule_entry import ScheduleEntry
+
+
+# About a year of the general schedule
+ROW_COUNT = 40_000
+EDITORS = [f"Montażysta {index}" for index in range(25)]
+PROGRAMS = [f"MECZ TESTOWY {index}" for index in range(300)]
+
+
+def _row_values(index: int) -> tuple:
+    day = date(2026, 1, 1) + timedelta(days=index // 110)
+    # Built per row, like the text the parser extracts from every cell
+    return (
+        f"{day.day}.{day.month:02d}.{day.year}",
+        "".join(["Liga ", "Polska"]),
+        "".join([PROGRAMS[index % len(PROGRAMS)]]),
+        "",
+        2.5,
+        f"{index % 24:02d}:00",
+        f"{(index + 2) % 24:02d}:30",
+        "".join([EDITORS[index % len(EDITORS)]]),
+    )
+
+
+def _measure(build) -> float:
+    gc.collect()
+    tracemalloc.start()
+    rows = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del rows
+    return current / 1024 / 1024
+
+
+def main() -> None:
+    fields = ScheduleEntry.__slots__
+    dicts = _measure(lambda: [dict(zip(fields, _row_values(index))) for index in range(ROW_COUNT)])
+    entries = _measure(lambda: [ScheduleEntry(*_row_values(index)) for index in range(ROW_COUNT)])
+    print(f"{ROW_COUNT} rows as dicts:   {dicts:.1f} MiB")
+    print(f"{ROW_COUNT} rows as entries: {entries:.1f} MiB ({entries / dicts:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,11 +8,13 @@ document.addEventListener('alpine:init', () => {
         filename: defaultInstallationFilename,
         defaultInstallationFilename,
         templateExportEnabled: true,
+        exportEventsEnabled: false,
         filenameLocked: true,
         reportActivity: 'MONTAŻ',
         reportMonth: '',
         reportYear: '',
         message: '',
+        exportWeeks: [],
         minDate: '',
         maxDate: '',
 
@@ -53,6 +55,7 @@ document.addEventListener('alpine:init', () => {
                 if (response.ok) {
                     const config = await response.json();
                     this.templateExportEnabled = config.templateExportEnabled;
+                    this.exportEventsEnabled = Boolean(config.exportEventsEnabled);
                     this.reportActivity = config.activityValue;
                     this.reportMonth = config.month;
                     this.reportYear = config.year;
@@ -173,6 +176,75 @@ document.addEventListener('alpine:init', () => {
             }
         },
 
+        exportProgressMessage(job) {
+            if (!job.totalWeeks) {
+                return '⏳ Pobieranie grafiku...';
+            }
+            return `⏳ Pobieranie grafiku... (tydzień ${job.completedWeeks} z ${job.totalWeeks})`;
+        },
+
+        formatExportWeek(week) {
+            const result = week.fetched ? `${week.rows} poz.` : 'błąd pobierania';
+            return `${week.week}: ${result}, ${week.fetchSeconds.toFixed(1)} s`;
+        },
+
+        streamExportJob(job) {
+            return new Promise((resolve, reject) => {
+                const source = new EventSource(`/api/schedule/${job.jobId}/events`);
+                source.addEventListener('week', event => {
+                    const week = JSON.parse(event.data);
+                    this.exportWeeks.push(week);
+                    this.message = this.exportProgressMessage({
+                        completedWeeks: week.index,
+                        totalWeeks: week.total
+                    });
+                });
+                const finish = event => {
+                    source.close();
+                    resolve(JSON.parse(event.data));
+                };
+                source.addEventListener('done', finish);
+                source.addEventListener('failed', finish);
+                // The server closed a long stream; the rest of the export is polled
+                source.addEventListener('poll', finish);
+                source.onerror = () => {
+                    source.close();
+                    reject(new Error('Progress stream interrupted'));
+                };
+            });
+        },
+
+        async pollExportJob(job) {
+            while (job.status === 'queued' || job.status === 'running') {
+                await new Promise(resolve => setTimeout(resolve, 1000));
+                const response = await fetch(`/api/schedule/${job.jobId}?since=${this.exportWeeks.length}`);
+                if (!response.ok) {
+                    throw new Error(await this.getErrorMessage(response));
+                }
+                job = await response.json();
+                this.exportWeeks.push(...(job.weeks || []));
+                this.message = this.exportProgressMessage(job);
+            }
+            return job;
+        },
+
+        async waitForExportJob(job) {
+            // Each open stream holds a server worker, so it is used only when enabled
+            if (this.exportEventsEnabled && window.EventSource) {
+                try {
+                    job = await this.streamExportJob(job);
+                } catch (error) {
+                    // Fall back to polling when the stream is blocked or dropped
+                    console.warn('Could not stream export progress:', error);
+                }
+            }
+            job = await this.pollExportJob(job);
+            if (job.status !== 'done') {
+                throw new Error(job.message || 'Nie udało się pobrać grafiku.');
+            }
+            return job;
+        },
+
         async submitForm() {
             try {
                 // Save username to localStorage
@@ -187,16 +259,25 @@ document.addEventListener('alpine:init', () => {
                 };
 
                 this.message = '⏳ Pobieranie grafiku...';
+                this.exportWeeks = [];
                 this.scrollToMessage();
 
-                const response = await fetch('/api/schedule', {
+                // The export runs as a background job; poll it until the file is ready
+                const jobResponse = await fetch('/api/schedule', {
                     method: 'POST',
                     headers: {
                         'Content-Type': 'application/json',
                     },
-                    body: JSON.stringify(formData)
+                    body: JSON.stringify({ ...formData, async: true })
                 });
 
+                if (!jobResponse.ok) {
+                    throw new Error(await this.getErrorMessage(jobResponse));
+                }
+
+                const job = await this.waitForExportJob(await jobResponse.json());
+                const response = await fetch(`/api/schedule/${job.jobId}/file`);
+
                 if (!response.ok) {
                     throw new Error(await this.getErrorMessage(response));
                 }
@@ -218,6 +299,7 @@ document.addEventListener('alpine:init', () => {
 
                 setTimeout(() => {
                     this.message = '';
+                    this.exportWeeks = [];
                 }, 4000);
 
             } catch (error) {
@@ -1,7 +1,6 @@
 import base64
 import os
 import unittest
-from pathlib import Path
 from unittest.mock import patch
 
 from app import create_app
@@ -63,12 +62,10 @@ class AdminTests(unittest.TestCase):
                     config.output_filename == DEFAULT_INSTALLATION_FILENAME
                 )
 
-            def scrape_schedule(self):
+            def scrape_schedule(self, output):
                 if not self.assert_default_filename:
                     raise AssertionError("Unexpected default output filename")
-                Path(self.config.output_dir, self.config.output_filename).write_bytes(
-                    b"xlsx-content"
-                )
+                output.write(b"xlsx-content")
                 return "KOWALSKI_JAN_MONTAŻ_RAPORT_MAJ_2026.XLSX"
 
         with patch("backend.api.routes.ScheduleScraper", FakeScraper):
@@ -0,0 +1,265 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from pathlib import Path
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlsplit
+
+from openpyxl import load_workbook
+
+from backend.async_scraper import AsyncScheduleScraper
+from backend.config import DEFAULT_INSTALLATION_FILENAME, ScheduleConfig
+from backend.schedule_scraper import CIRCUIT_BREAKER, UPSTREAM_LIMITER, LoginError, ScheduleFetchError
+
+
+FIXTURES = Path(__file__).parent / "fixtures"
+SCRAPER_ENVIRONMENT = {
+    "SCHEDULE_CACHE": "false",
+    "SCHEDULE_RETRY_BUDGET": "8",
+    "SCHEDULE_UPSTREAM_RATE": "0",
+}
+SESSION_COOKIE = "ASP.NET_SessionId"
+
+
+class FakeGptHandler(BaseHTTPRequestHandler):
+    """Serves the login form and schedule pages the way GPT does"""
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        form = parse_qs(self.rfile.read(length).decode("utf-8"))
+        server = self.server
+        with server.lock:
+            server.logins += 1
+        if form.get("password") != ["secret"]:
+            self._send(200, "Niepoprawny identyfikator lub hasło.")
+            return
+        with server.lock:
+            token = f"session-{server.logins}"
+            server.sessions.add(token)
+        self._send(302, "", {"Location": "/", "Set-Cookie": f"{SESSION_COOKIE}={token}; path=/"})
+
+    def do_GET(self):
+        server = self.server
+        path = urlsplit(self.path).path
+        if path == "/":
+            self._send(200, "Zalogowano")
+            return
+        if path == "/Account/Login":
+            self._send(200, "<form>Logowanie</form>")
+            return
+
+        cookie = self.headers.get("Cookie", "")
+        with server.lock:
+            server.schedule_requests += 1
+            server.schedule_cookies.append(cookie)
+            server.active_requests += 1
+            server.peak_requests = max(server.peak_requests, server.active_requests)
+        try:
+            time.sleep(server.delay)
+            self._send_schedule(path, cookie)
+        finally:
+            with server.lock:
+                server.active_requests -= 1
+
+    def _send_schedule(self, path: str, cookie: str):
+        server = self.server
+        with server.lock:
+            logged_in = any(f"{SESSION_COOKIE}={token}" in cookie for token in server.sessions)
+            unavailable = server.unavailable > 0
+            if unavailable:
+                server.unavailable -= 1
+        if not logged_in:
+            self._send(302, "", {"Location": "/Account/Login?ReturnUrl=%2F"})
+            return
+        if unavailable:
+            self._send(503, "Service Unavailable")
+            return
+        fixture = "personal_schedule.html" if path == "/User/Schedule" else "general_schedule.html"
+        self._send(200, (FIXTURES / fixture).read_text(encoding="utf-8"), chunked=server.chunked)
+
+    def _send(self, status: int, text: str, headers: dict | None = None, chunked: bool = False):
+        body = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if chunked:
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for start in range(0, len(body), 4096):
+                chunk = body[start:start + 4096]
+                self.wfile.write(f"{len(chunk):x}\r\n".encode("ascii") + chunk + b"\r\n")
+            self.wfile.write(b"0\r\n\r\n")
+        else:
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+
+class AsyncScheduleScraperTests(unittest.TestCase):
+    def setUp(self):
+        environment = patch.dict(os.environ, SCRAPER_ENVIRONMENT)
+        environment.start()
+        self.addCleanup(environment.stop)
+
+        CIRCUIT_BREAKER.reset()
+        self.addCleanup(CIRCUIT_BREAKER.reset)
+        UPSTREAM_LIMITER.reset()
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), FakeGptHandler)
+        self.server.daemon_threads = True
+        self.server.lock = threading.Lock()
+        self.server.sessions = set()
+        self.server.logins = 0
+        self.server.schedule_requests = 0
+        self.server.active_requests = 0
+        self.server.peak_requests = 0
+        self.server.delay = 0
+        self.server.schedule_cookies = []
+        self.server.unavailable = 0
+        self.server.chunked = False
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def _scraper(self, password: str = "secret", end_date: str = "2026-05-20") -> AsyncScheduleScraper:
+        scraper = AsyncScheduleScraper(ScheduleConfig(
+            username="jan.kowalski",
+            password=password,
+            output_dir=self.directory,
+            output_filename=DEFAULT_INSTALLATION_FILENAME,
+            start_date="2026-05-20",
+            end_date=end_date,
+            is_personal=True,
+            use_template_export=False,
+        ))
+        scraper.config.login_url = f"{self.base_url}/Account/Login"
+        scraper.config.personal_schedule_url = f"{self.base_url}/User/Schedule"
+        scraper.config.general_schedule_url = f"{self.base_url}/Schedule/Editing"
+        return scraper
+
+    def _rows(self, content: bytes) -> list:
+        workbook = load_workbook(BytesIO(content), read_only=True)
+        try:
+            return list(workbook.active.iter_rows(values_only=True))
+        finally:
+            workbook.close()
+
+    def test_exports_schedule_from_fake_gpt(self):
+        output = BytesIO()
+        weeks = []
+
+        filename = asyncio.run(self._scraper().scrape_schedule(output, on_week=weeks.append))
+
+        self.assertEqual(filename, DEFAULT_INSTALLATION_FILENAME)
+        self.assertEqual(len(self._rows(output.getvalue())), 2)
+        self.assertEqual([week["week"] for week in weeks], ["18.05.2026"])
+        self.assertEqual(self.server.logins, 1)
+
+    def test_invalid_credentials_stop_before_schedule_request(self):
+        with self.assertRaises(LoginError):
+            asyncio.run(self._scraper(password="wrong").scrape_schedule(BytesIO()))
+        self.assertEqual(self.server.schedule_requests, 0)
+
+    def test_fetches_weeks_in_order_over_kept_alive_chunked_responses(self):
+        self.server.chunked = True
+        progress = []
+        weeks = []
+
+        asyncio.run(self._scraper(end_date="2026-06-10").scrape_schedule(
+            BytesIO(), progress=lambda done, total: progress.append(done), on_week=weeks.append,
+        ))
+
+        self.assertEqual(
+            [week["week"] for week in weeks],
+            ["18.05.2026", "25.05.2026", "01.06.2026", "08.06.2026"],
+        )
+        self.assertTrue(all(week["fetched"] for week in weeks))
+        self.assertEqual(progress, [0, 1, 2, 3, 4])
+
+    def test_many_exports_share_one_event_loop(self):
+        async def export_all():
+            outputs = [BytesIO() for _ in range(5)]
+            await asyncio.gather(*(
+                self._scraper(end_date="2026-05-27").scrape_schedule(output) for output in outputs
+            ))
+            return outputs
+
+        outputs = asyncio.run(export_all())
+
+        self.assertEqual(self.server.logins, 5)
+        self.assertEqual(self.server.schedule_requests, 10)
+        for output in outputs:
+            self.assertTrue(self._rows(output.getvalue()))
+
+    def test_requests_wait_for_the_upstream_limiter(self):
+        with patch.dict(os.environ, {"SCHEDULE_UPSTREAM_MAX_IN_FLIGHT": "1"}):
+            scraper = self._scraper(end_date="2026-06-10")
+        self.server.delay = 0.05
+
+        asyncio.run(scraper.scrape_schedule(BytesIO()))
+
+        self.assertEqual(self.server.peak_requests, 1)
+        # One login and four weeks
+        self.assertEqual(UPSTREAM_LIMITER.stats()["requests"], 5)
+        self.assertEqual(UPSTREAM_LIMITER.stats()["inFlight"], 0)
+
+    def test_session_cookie_is_not_sent_to_other_hosts(self):
+        scraper = self._scraper()
+        scraper.config.personal_schedule_url = scraper.config.personal_schedule_url.replace("127.0.0.1", "localhost")
+
+        with self.assertRaises(ScheduleFetchError):
+            asyncio.run(scraper.scrape_schedule(BytesIO()))
+
+        self.assertTrue(self.server.schedule_cookies)
+        self.assertFalse(any(SESSION_COOKIE in cookie for cookie in self.server.schedule_cookies))
+
+    def test_expired_session_logs_in_again_once(self):
+        scraper = self._scraper(end_date="2026-06-10")
+        original_login = FakeGptHandler.do_POST
+
+        def login_then_expire(handler):
+            original_login(handler)
+            # The first session expires right away, as if GPT restarted
+            with handler.server.lock:
+                if handler.server.logins == 1:
+                    handler.server.sessions.clear()
+
+        with patch.object(FakeGptHandler, "do_POST", login_then_expire):
+            asyncio.run(scraper.scrape_schedule(BytesIO()))
+
+        self.assertEqual(self.server.logins, 2)
+
+    def test_unavailable_upstream_is_retried(self):
+        self.server.unavailable = 2
+        weeks = []
+
+        asyncio.run(self._scraper().scrape_schedule(BytesIO(), on_week=weeks.append))
+
+        self.assertTrue(weeks[0]["fetched"])
+        self.assertEqual(self.server.schedule_requests, 3)
+
+    def test_failed_weeks_raise_fetch_error(self):
+        self.server.unavailable = 100
+
+        with self.assertRaises(ScheduleFetchError):
+            asyncio.run(self._scraper().scrape_schedule(BytesIO()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,309 @@
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from app import create_app
+from backend.config import DEFAULT_INSTALLATION_FILENAME, ExportJobConfig, ScheduleConfig
+from backend.export_jobs import (
+    JOB_DONE,
+    JOB_FAILED,
+    JOB_RUNNING,
+    ExportJob,
+    ExportJobQueue,
+    ExportJobStore,
+    ExportQueueFullError,
+)
+from backend.schedule_scraper import LoginError
+
+
+REQUEST = {
+    "username": "jan.kowalski",
+    "password": "secret",
+    "startDate": "2026-05-04",
+    "endDate": "2026-05-18",
+    "isPersonal": True,
+}
+
+
+def _schedule_config() -> ScheduleConfig:
+    return ScheduleConfig(
+        username="jan.kowalski",
+        password="secret",
+        output_dir="",
+        output_filename=DEFAULT_INSTALLATION_FILENAME,
+        start_date="2026-05-04",
+        end_date="2026-05-18",
+        is_personal=True,
+    )
+
+
+class FakeScraper:
+    def __init__(self, config):
+        self.config = config
+
+    def scrape_schedule(self, output, progress=None, on_week=None):
+        for week in range(4):
+            progress(week, 3)
+            if week:
+                on_week({"week": f"{week}.05.2026", "index": week, "total": 3, "rows": 2})
+        output.write(b"xlsx-content")
+        return "KOWALSKI_JAN_MONTAŻ_RAPORT_MAJ_2026.XLSX"
+
+
+def _wait_until_finished(queue: ExportJobQueue, job_id: str):
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job.finished:
+            return job
+        time.sleep(0.01)
+    raise AssertionError("Export job did not finish")
+
+
+class ExportJobTestCase(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.store_path = str(Path(directory.name) / "export_jobs.sqlite3")
+
+    def _queue(self, **config_options) -> ExportJobQueue:
+        options = {"workers": 1, "max_pending": 5, "result_ttl": 60, "store_path": self.store_path}
+        queue = ExportJobQueue(ExportJobConfig(**{**options, **config_options}))
+        # Running jobs still write to the store, which is deleted after the test
+        self.addCleanup(queue._executor.shutdown)
+        return queue
+
+
+class ExportJobQueueTests(ExportJobTestCase):
+    def test_job_reports_progress_and_keeps_workbook(self):
+        queue = self._queue()
+
+        job = queue.submit(_schedule_config(), FakeScraper)
+        job = _wait_until_finished(queue, job.id)
+
+        self.assertEqual(job.status, JOB_DONE)
+        self.assertEqual(job.data, b"xlsx-content")
+        self.assertEqual(
+            job.to_dict(),
+            {
+                "jobId": job.id,
+                "status": JOB_DONE,
+                "completedWeeks": 3,
+                "totalWeeks": 3,
+                "filename": "KOWALSKI_JAN_MONTAŻ_RAPORT_MAJ_2026.XLSX",
+            },
+        )
+
+    def test_scraper_error_payload_is_kept(self):
+        class FailingScraper(FakeScraper):
+            def scrape_schedule(self, output, progress=None, on_week=None):
+                raise LoginError({"title": "Błąd uwierzytelniania", "message": "Niepoprawny identyfikator lub hasło."})
+
+        queue = self._queue()
+
+        job = _wait_until_finished(queue, queue.submit(_schedule_config(), FailingScraper).id)
+
+        self.assertEqual(job.status, JOB_FAILED)
+        self.assertEqual(job.to_dict()["title"], "Błąd uwierzytelniania")
+        self.assertNotIn("filename", job.to_dict())
+
+    def test_pending_jobs_are_bounded(self):
+        release = threading.Event()
+
+        class BlockingScraper(FakeScraper):
+            def scrape_schedule(self, output, progress=None, on_week=None):
+                release.wait(5)
+                return super().scrape_schedule(output, progress, on_week)
+
+        queue = self._queue(max_pending=2)
+        self.addCleanup(release.set)
+        queue.submit(_schedule_config(), BlockingScraper)
+        queue.submit(_schedule_config(), BlockingScraper)
+
+        with self.assertRaises(ExportQueueFullError):
+            queue.submit(_schedule_config(), BlockingScraper)
+
+    def test_expired_results_are_forgotten(self):
+        queue = self._queue(result_ttl=0)
+        job = queue.submit(_schedule_config(), FakeScraper)
+        deadline = time.monotonic() + 5
+        while job.finished_at is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        time.sleep(0.01)
+        self.assertIsNone(queue.get(job.id))
+
+    def test_other_processes_see_progress_and_workbook(self):
+        queue = self._queue()
+        job = _wait_until_finished(queue, queue.submit(_schedule_config(), FakeScraper).id)
+
+        shared = self._queue().get(job.id)
+
+        self.assertIsNot(shared, job)
+        self.assertEqual(shared.to_dict(), job.to_dict())
+        self.assertEqual(shared.data, b"xlsx-content")
+        self.assertEqual([event["week"] for event in shared.events], ["1.05.2026", "2.05.2026", "3.05.2026"])
+
+    def test_other_processes_wait_for_events_of_running_job(self):
+        release = threading.Event()
+
+        class BlockingScraper(FakeScraper):
+            def scrape_schedule(self, output, progress=None, on_week=None):
+                release.wait(5)
+                return super().scrape_schedule(output, progress, on_week)
+
+        self.addCleanup(release.set)
+        job = self._queue().submit(_schedule_config(), BlockingScraper)
+        other_process = self._queue()
+
+        events, current = other_process.wait_for_events(job, 0, 0)
+        self.assertEqual((events, current.finished), ([], False))
+
+        release.set()
+        with patch("backend.export_jobs.STORE_POLL_INTERVAL", 0.01):
+            events, current = other_process.wait_for_events(job, 0, 5)
+        self.assertEqual(events[0]["week"], "1.05.2026")
+
+    def test_job_of_a_process_that_exited_is_reported_as_failed(self):
+        exited = subprocess.Popen([sys.executable, "-c", "pass"])
+        exited.wait()
+        store = ExportJobStore(self.store_path, result_ttl=60)
+        with patch("backend.export_jobs.os.getpid", return_value=exited.pid):
+            store.save(ExportJob(id="interrupted", status=JOB_RUNNING))
+
+        job = self._queue().get("interrupted")
+
+        self.assertEqual(job.status, JOB_FAILED)
+        self.assertEqual(job.to_dict()["title"], "Przerwane pobieranie")
+
+
+class ExportJobRouteTests(ExportJobTestCase):
+    def setUp(self):
+        super().setUp()
+        self.queue = self._queue(events_enabled=True, event_stream_max_seconds=60)
+        for target, replacement in (
+            ("backend.api.routes.get_export_queue", lambda: self.queue),
+            ("backend.api.routes.ScheduleScraper", FakeScraper),
+        ):
+            patcher = patch(target, replacement)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client = create_app().test_client()
+
+    def test_async_export_can_be_polled_and_downloaded(self):
+        response = self.client.post("/api/schedule", json={**REQUEST, "async": True})
+
+        self.assertEqual(response.status_code, 202)
+        job_id = response.get_json()["jobId"]
+        self.assertEqual(response.headers["Location"], f"/api/schedule/{job_id}")
+        _wait_until_finished(self.queue, job_id)
+
+        status = self.client.get(f"/api/schedule/{job_id}")
+        self.assertEqual(status.get_json()["status"], JOB_DONE)
+        self.assertEqual(status.get_json()["completedWeeks"], 3)
+
+        download = self.client.get(f"/api/schedule/{job_id}/file")
+        self.assertEqual(download.status_code, 200)
+        self.assertEqual(download.data, b"xlsx-content")
+        self.assertIn("KOWALSKI_JAN_", download.headers["Content-Disposition"])
+
+    def test_unfinished_job_file_is_not_served(self):
+        release = threading.Event()
+
+        class BlockingScraper(FakeScraper):
+            def scrape_schedule(self, output, progress=None, on_week=None):
+                release.wait(5)
+                return super().scrape_schedule(output, progress, on_week)
+
+        self.addCleanup(release.set)
+        with patch("backend.api.routes.ScheduleScraper", BlockingScraper):
+            job_id = self.client.post(
+                "/api/schedule", json={**REQUEST, "async": True}
+            ).get_json()["jobId"]
+
+        response = self.client.get(f"/api/schedule/{job_id}/file")
+
+        self.assertEqual(response.status_code, 409)
+
+    def test_event_stream_sends_each_week_and_final_status(self):
+        job_id = self.client.post(
+            "/api/schedule", json={**REQUEST, "async": True}
+        ).get_json()["jobId"]
+
+        response = self.client.get(f"/api/schedule/{job_id}/events")
+        body = response.get_data(as_text=True)
+
+        self.assertEqual(response.mimetype, "text/event-stream")
+        self.assertEqual(body.count("event: week\n"), 3)
+        self.assertIn('id: 0\ndata: {"week": "1.05.2026"', body)
+        self.assertTrue(body.rstrip().startswith("event: week"))
+        self.assertIn('event: done\ndata: {"jobId"', body)
+        self.assertLess(body.index("3.05.2026"), body.index("event: done"))
+
+    def test_event_stream_resumes_after_last_event_id(self):
+        job_id = self.client.post(
+            "/api/schedule", json={**REQUEST, "async": True}
+        ).get_json()["jobId"]
+
+        body = self.client.get(
+            f"/api/schedule/{job_id}/events", headers={"Last-Event-ID": "1"}
+        ).get_data(as_text=True)
+
+        self.assertEqual(body.count("event: week\n"), 1)
+        self.assertIn("id: 2\n", body)
+
+    def test_status_includes_weeks_since_requested_index(self):
+        job_id = self.client.post(
+            "/api/schedule", json={**REQUEST, "async": True}
+        ).get_json()["jobId"]
+        _wait_until_finished(self.queue, job_id)
+
+        status = self.client.get(f"/api/schedule/{job_id}?since=1").get_json()
+
+        self.assertEqual([week["week"] for week in status["weeks"]], ["2.05.2026", "3.05.2026"])
+        self.assertNotIn("weeks", self.client.get(f"/api/schedule/{job_id}").get_json())
+
+    def test_event_stream_is_closed_after_maximum_duration(self):
+        release = threading.Event()
+
+        class BlockingScraper(FakeScraper):
+            def scrape_schedule(self, output, progress=None, on_week=None):
+                release.wait(5)
+                return super().scrape_schedule(output, progress, on_week)
+
+        self.addCleanup(release.set)
+        self.queue.config.event_stream_max_seconds = 0.05
+        with patch("backend.api.routes.ScheduleScraper", BlockingScraper):
+            job_id = self.client.post(
+                "/api/schedule", json={**REQUEST, "async": True}
+            ).get_json()["jobId"]
+
+        body = self.client.get(f"/api/schedule/{job_id}/events").get_data(as_text=True)
+
+        self.assertIn('event: poll\ndata: {"jobId"', body)
+        self.assertNotIn("event: week", body)
+
+    def test_event_stream_is_disabled_by_default(self):
+        self.queue.config.events_enabled = False
+        job_id = self.client.post(
+            "/api/schedule", json={**REQUEST, "async": True}
+        ).get_json()["jobId"]
+
+        self.assertEqual(self.client.get(f"/api/schedule/{job_id}/events").status_code, 404)
+        self.assertFalse(self.client.get("/api/export-config").get_json()["exportEventsEnabled"])
+        with patch.dict("os.environ", {"SCHEDULE_EXPORT_EVENTS": ""}):
+            self.assertFalse(ExportJobConfig().events_enabled)
+
+    def test_unknown_job_returns_not_found(self):
+        self.assertEqual(self.client.get("/api/schedule/missing").status_code, 404)
+        self.assertEqual(self.client.get("/api/schedule/missing/file").status_code, 404)
+        self.assertEqual(self.client.get("/api/schedule/missing/events").status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
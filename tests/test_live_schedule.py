@@ -52,7 +52,11 @@ class LiveScheduleTests(unittest.TestCase):
                 use_template_export=False,
             )
 
-            filename = ScheduleScraper(config).scrape_schedule()
+            scraper = ScheduleScraper(config)
+            # Always exercise the live service rather than cached weeks
+            scraper.config.week_cache_enabled = False
+            scraper.config.shared_week_cache_enabled = False
+            filename = scraper.scrape_schedule()
 
             self.assertEqual(filename, DEFAULT_INSTALLATION_FILENAME)
             workbook = load_workbook(
@@ -0,0 +1,73 @@
+import unittest
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from unittest.mock import patch
+
+from backend.config import ScheduleConfig
+from backend.parse_pool import ParsePool, parse_week_rows, rows_from_tuples, rows_to_tuples
+
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def _config(is_personal: bool) -> ScheduleConfig:
+    return ScheduleConfig(
+        username="jan.kowalski",
+        password="secret",
+        output_dir=".",
+        output_filename="test.xlsx",
+        start_date="2026-05-18",
+        end_date="2026-05-18",
+        is_personal=is_personal,
+        use_template_export=False,
+    )
+
+
+class ParsePoolTests(unittest.TestCase):
+    def setUp(self):
+        self.pool = ParsePool()
+        self.addCleanup(self.pool.shutdown)
+
+    def test_row_tuples_round_trip_personal_and_general_rows(self):
+        for is_personal, fixture in ((True, "personal_schedule.html"), (False, "general_schedule.html")):
+            with self.subTest(fixture=fixture):
+                html = (FIXTURES / fixture).read_text(encoding="utf-8")
+                rows = parse_week_rows(html, _config(is_personal), "html.parser")
+
+                self.assertTrue(rows)
+                self.assertEqual(rows_from_tuples(rows_to_tuples(rows)), rows)
+
+    def test_worker_processes_parse_like_the_exporting_thread(self):
+        html = (FIXTURES / "general_schedule.html").read_text(encoding="utf-8")
+        config = _config(is_personal=False)
+
+        futures = [self.pool.submit(html, config, "lxml", workers=2) for _ in range(3)]
+
+        expected = parse_week_rows(html, config, "lxml")
+        for future in futures:
+            self.assertEqual(future.result(timeout=60), expected)
+
+    def test_without_workers_parses_in_the_calling_thread(self):
+        html = (FIXTURES / "personal_schedule.html").read_text(encoding="utf-8")
+
+        with patch("backend.parse_pool.ProcessPoolExecutor") as executor:
+            future = self.pool.submit(html, _config(is_personal=True), "html.parser", workers=0)
+
+        self.assertTrue(future.done())
+        self.assertEqual(len(future.result()), 1)
+        executor.assert_not_called()
+
+    def test_broken_pool_falls_back_to_local_parsing_and_restarts(self):
+        html = (FIXTURES / "personal_schedule.html").read_text(encoding="utf-8")
+
+        with patch("backend.parse_pool.ProcessPoolExecutor") as executor:
+            executor.return_value.submit.side_effect = BrokenProcessPool()
+            future = self.pool.submit(html, _config(is_personal=True), "html.parser", workers=2)
+            self.pool.submit(html, _config(is_personal=True), "html.parser", workers=2)
+
+        self.assertEqual(len(future.result()), 1)
+        self.assertEqual(executor.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
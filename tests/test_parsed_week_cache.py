@@ -0,0 +1,97 @@
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from datetime import date
+from pathlib import Path
+from unittest.mock import patch
+
+from backend.parsed_week_cache import ParsedWeekCache
+from backend.schedule_entry import ScheduleEntry
+
+
+ROWS = [ScheduleEntry("18.05.2026", "Liga Polska", "MECZ TESTOWY", "", 2.5, "22:30", "01:00")]
+
+
+class ParsedWeekCacheTests(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / "parsed_weeks.sqlite3"
+
+    def _cache(self, ttl: int = 300, lease_seconds: int = 5) -> ParsedWeekCache:
+        return ParsedWeekCache(str(self.path), ttl, lease_seconds, closed_after_days=35)
+
+    def test_rows_are_shared_between_cache_instances(self):
+        key = ParsedWeekCache.key("18.05.2026", "1:10")
+        self._cache().store(key, "18.05.2026", ROWS)
+
+        self.assertEqual(self._cache().load(key), ROWS)
+        self.assertIsNone(self._cache().load(ParsedWeekCache.key("18.05.2026", "2:10")))
+
+    def test_stale_rows_expire_unless_week_is_closed(self):
+        cache = self._cache(ttl=0)
+        key = ParsedWeekCache.key("18.05.2026", "")
+        cache.store(key, "18.05.2026", ROWS)
+
+        with patch("backend.week_cache.date") as today:
+            today.today.return_value = date(2026, 5, 20)
+            self.assertIsNone(cache.load(key))
+            today.today.return_value = date(2026, 8, 1)
+            self.assertEqual(cache.load(key), ROWS)
+
+    def test_only_one_worker_holds_the_lease(self):
+        key = ParsedWeekCache.key("18.05.2026", "")
+        owner = self._cache().try_lease(key)
+
+        self.assertIsNotNone(owner)
+        self.assertIsNone(self._cache().try_lease(key))
+        self._cache().release(key, owner)
+        self.assertIsNotNone(self._cache().try_lease(key))
+
+    def test_expired_lease_can_be_taken_over(self):
+        key = ParsedWeekCache.key("18.05.2026", "")
+        self.assertIsNotNone(self._cache(lease_seconds=0).try_lease(key))
+
+        self.assertIsNotNone(self._cache().try_lease(key))
+
+    def test_waiting_worker_receives_rows_of_lease_holder(self):
+        key = ParsedWeekCache.key("18.05.2026", "")
+        owner = self._cache().try_lease(key)
+
+        def refresh():
+            time.sleep(0.1)
+            self._cache().store(key, "18.05.2026", ROWS, owner)
+
+        worker = threading.Thread(target=refresh)
+        worker.start()
+        rows = self._cache().wait_for(key, poll_interval=0.02)
+        worker.join()
+
+        self.assertEqual(rows, ROWS)
+        self.assertIsNotNone(self._cache().try_lease(key))
+
+    def test_store_prunes_replaced_and_old_rows_and_expired_leases(self):
+        old_week = ParsedWeekCache.key("11.05.2026", "1:10")
+        with patch("backend.parsed_week_cache.time.time", return_value=time.time() - 3600):
+            self._cache().store(old_week, "11.05.2026", ROWS)
+        self._cache().store(ParsedWeekCache.key("18.05.2026", "1:10"), "18.05.2026", ROWS)
+        self._cache(lease_seconds=0).try_lease(ParsedWeekCache.key("25.05.2026", "1:10"))
+
+        new_version = ParsedWeekCache.key("18.05.2026", "2:10")
+        cache = ParsedWeekCache(str(self.path), 300, 5, closed_after_days=35, max_age=60)
+        cache.store(new_version, "18.05.2026", ROWS)
+
+        connection = sqlite3.connect(self.path)
+        try:
+            keys = [key for key, in connection.execute("SELECT key FROM weeks")]
+            leases = connection.execute("SELECT COUNT(*) FROM leases").fetchone()[0]
+        finally:
+            connection.close()
+        self.assertEqual(keys, [new_version])
+        self.assertEqual(leases, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
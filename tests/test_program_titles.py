@@ -0,0 +1,137 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from backend.program_titles import ProgramTitles, TitleIndex, normalize_description
+
+
+class TitleIndexTests(unittest.TestCase):
+    def test_normalization_folds_case_diacritics_spacing_and_episodes(self):
+        self.assertEqual(normalize_description("  Piłkarski   MŁYN - odc. 12 "), "pilkarski mlyn")
+        self.assertEqual(normalize_description("LIGA MISTRZÓW (3/10)"), "liga mistrzow")
+        self.assertEqual(normalize_description("Studio Tenis S02E05"), "studio tenis")
+        self.assertEqual(normalize_description("LIGA 1"), "liga 1")
+        self.assertEqual(normalize_description("Odcinek 2"), "odcinek 2")
+
+    def test_episode_markers_must_start_a_word(self):
+        self.assertEqual(normalize_description("Mecz 1"), "mecz 1")
+        self.assertEqual(normalize_description("Gracz 2"), "gracz 2")
+        self.assertEqual(normalize_description("Step 3"), "step 3")
+        self.assertEqual(normalize_description("Kids 2/3"), "kids")
+        self.assertEqual(normalize_description("Mecz cz. 1"), "mecz")
+        self.assertEqual(normalize_description("Mecz (ep 4)"), "mecz")
+
+    def test_lookup_prefers_exact_then_normalized_then_longest_prefix(self):
+        index = TitleIndex({
+            "LIGA MISTRZÓW": "UEFA Champions League",
+            "LIGA MISTRZÓW SKRÓT": "Skróty LM",
+            "liga mistrzow skrot": "Duplicate",
+            "ESA SKRÓT": "Liga Polska - Ekstraklasa",
+        })
+
+        self.assertEqual(index.lookup("liga mistrzow skrot"), "Duplicate")
+        self.assertEqual(index.lookup("Liga Mistrzów  Skrót"), "Skróty LM")
+        self.assertEqual(index.lookup("LIGA MISTRZÓW SKRÓT - Real Madryt"), "Skróty LM")
+        self.assertEqual(index.lookup("LIGA MISTRZÓW: studio"), "UEFA Champions League")
+        self.assertEqual(index.lookup("ESA SKRÓT odc. 4"), "Liga Polska - Ekstraklasa")
+        self.assertEqual(index.lookup("ESA"), "")
+        self.assertEqual(index.lookup("LIGA"), "")
+
+    def test_large_dictionaries_are_indexed(self):
+        titles = {f"PROGRAM {number} MAGAZYN": f"Tytuł {number}" for number in range(100_000)}
+        index = TitleIndex(titles)
+
+        self.assertEqual(len(index), 100_000)
+        self.assertEqual(index.lookup("Program 99999 magazyn - odc. 3"), "Tytuł 99999")
+        self.assertEqual(index.lookup("PROGRAM 100000 MAGAZYN"), "")
+
+    def test_index_is_built_once_per_loaded_dictionary(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "program_titles.csv"
+            path.write_text("MECZ TESTOWY;Liga Polska\n", encoding="utf-8")
+            previous = ProgramTitles._titles_dict, ProgramTitles._titles_index, ProgramTitles._last_modified
+            self.addCleanup(
+                lambda: setattr(ProgramTitles, "_titles_dict", previous[0])
+                or setattr(ProgramTitles, "_titles_index", previous[1])
+                or setattr(ProgramTitles, "_last_modified", previous[2])
+            )
+
+            ProgramTitles.reload_titles(str(path))
+            titles = ProgramTitles().get_titles(str(path))
+            index = ProgramTitles.index_for(titles)
+
+            self.assertIs(ProgramTitles.index_for(titles), index)
+            self.assertEqual(index.lookup("Mecz testowy"), "Liga Polska")
+
+            path.write_text("MECZ TESTOWY;Ekstraklasa\n", encoding="utf-8")
+            os.utime(path, (path.stat().st_atime, path.stat().st_mtime + 10))
+            reloaded = ProgramTitles.index_for(ProgramTitles().get_titles(str(path)))
+
+            self.assertIsNot(reloaded, index)
+            self.assertEqual(reloaded.lookup("Mecz testowy"), "Ekstraklasa")
+
+
+
+class ProgramTitlesFreshnessTests(unittest.TestCase):
+    def setUp(self):
+        previous = {
+            name: getattr(ProgramTitles, name)
+            for name in ("_titles_dict", "_titles_index", "_csv_path", "_last_modified", "_checked_at")
+        }
+        self.addCleanup(lambda: [setattr(ProgramTitles, name, value) for name, value in previous.items()])
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / "program_titles.csv"
+        self.path.write_text("MECZ TESTOWY;Liga Polska\n", encoding="utf-8")
+        ProgramTitles.reload_titles(str(self.path))
+
+    def test_file_is_checked_at_most_once_per_interval(self):
+        with patch("backend.program_titles.os.path.getmtime", wraps=os.path.getmtime) as getmtime:
+            for _ in range(100):
+                ProgramTitles().get_titles(str(self.path), check_interval=60)
+            self.assertEqual(getmtime.call_count, 0)
+
+            ProgramTitles._checked_at -= 61
+            ProgramTitles().get_titles(str(self.path), check_interval=60)
+            self.assertEqual(getmtime.call_count, 1)
+
+    def test_reload_increments_generation(self):
+        generation = ProgramTitles.generation
+        titles = ProgramTitles().get_titles(str(self.path), check_interval=60)
+
+        self.path.write_text("MECZ TESTOWY;Ekstraklasa\n", encoding="utf-8")
+        ProgramTitles.reload_titles(str(self.path))
+
+        self.assertEqual(ProgramTitles.generation, generation + 1)
+        reloaded = ProgramTitles().get_titles(str(self.path), check_interval=60)
+        self.assertIsNot(reloaded, titles)
+        self.assertEqual(reloaded["MECZ TESTOWY"], "Ekstraklasa")
+
+    def test_concurrent_callers_load_a_changed_file_once(self):
+        os.utime(self.path, (time.time() + 10, time.time() + 10))
+        ProgramTitles._checked_at -= 10
+        load_titles = ProgramTitles._load_titles
+
+        def slow_load(csv_path):
+            time.sleep(0.05)
+            return load_titles(csv_path)
+
+        with patch.object(ProgramTitles, "_load_titles", side_effect=slow_load) as loader:
+            threads = [
+                threading.Thread(target=ProgramTitles().get_titles, args=(str(self.path), 5))
+                for _ in range(8)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(loader.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,9 @@
 import os
+import shutil
 import tempfile
 import unittest
 from datetime import datetime
+from io import BytesIO
 from pathlib import Path
 from unittest.mock import patch
 from zipfile import ZipFile
@@ -10,12 +12,16 @@ from lxml import etree
 from openpyxl import load_workbook
 
 from backend.config import ScheduleConfig
+from backend import reporting
 from backend.reporting import (
     NSMAP,
     ReportConfigurationError,
+    ReportSettings,
     WORKBOOK_PATH,
+    _populate_worksheet,
     _resolve_worksheet_path,
     build_report_identity,
+    clear_template_cache,
     generate_template_report,
 )
 from backend.schedule_parser import ScheduleParser
@@ -92,6 +98,13 @@ class ReportingTests(unittest.TestCase):
                 self.assertEqual(
                     set(changed_entries), {worksheet_path, WORKBOOK_PATH}
                 )
+                self.assertIsNone(result.testzip())
+                for name in set(source.namelist()) - set(changed_entries):
+                    source_item, result_item = source.getinfo(name), result.getinfo(name)
+                    self.assertEqual(source_item.CRC, result_item.CRC)
+                    self.assertEqual(
+                        source_item.compress_size, result_item.compress_size
+                    )
                 self.assertEqual(
                     source.read(worksheet_path).count(b"<f"),
                     result.read(worksheet_path).count(b"<f"),
@@ -246,6 +259,110 @@ class ReportingTests(unittest.TestCase):
             )
             workbook.close()
 
+    def test_compiled_template_is_reused_until_template_or_settings_change(self):
+        data = [
+            {
+                "date": "18.05.2026",
+                "program_title": "Liga Polska",
+                "description": "Mecz testowy",
+                "duration": 2.5,
+            }
+        ]
+        clear_template_cache()
+        with tempfile.TemporaryDirectory() as directory:
+            managed_template = Path(directory) / "managed.xlsx"
+            shutil.copyfile(TEMPLATE_PATH, managed_template)
+            with (
+                patch("backend.reporting.MANAGED_TEMPLATE_PATH", managed_template),
+                patch(
+                    "backend.reporting._compile_template",
+                    wraps=reporting._compile_template,
+                ) as compile_template,
+            ):
+                def generate(name, settings=None):
+                    output_path = Path(directory) / name
+                    generate_template_report(
+                        data,
+                        "jan.kowalski",
+                        output_path,
+                        settings=settings or ReportSettings(),
+                        current_time=datetime(2026, 5, 20, 12, 0),
+                    )
+                    return output_path
+
+                first = generate("first.xlsx")
+                in_memory = BytesIO()
+                generate_template_report(
+                    data,
+                    "jan.kowalski",
+                    in_memory,
+                    settings=ReportSettings(),
+                    current_time=datetime(2026, 5, 20, 12, 0),
+                )
+                self.assertEqual(in_memory.getvalue(), first.read_bytes())
+                second = generate("second.xlsx")
+                self.assertEqual(compile_template.call_count, 1)
+                with ZipFile(first) as one, ZipFile(second) as two:
+                    self.assertEqual(
+                        {name: one.read(name) for name in one.namelist()},
+                        {name: two.read(name) for name in two.namelist()},
+                    )
+
+                stat = managed_template.stat()
+                os.utime(
+                    managed_template,
+                    ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000),
+                )
+                generate("third.xlsx")
+                self.assertEqual(compile_template.call_count, 2)
+
+                generate("fourth.xlsx", ReportSettings(end_row=400))
+                self.assertEqual(compile_template.call_count, 3)
+        clear_template_cache()
+
+    def test_missing_rows_and_cells_are_inserted_in_order(self):
+        worksheet_xml = (
+            b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+            b'<sheetData>'
+            b'<row r="1"><c r="A1"><v>1</v></c></row>'
+            b'<row r="3"><c r="E3"><v>5</v></c><c r="K3"><f>SUM(J3)</f><v>0</v></c></row>'
+            b'<row r="9"><c r="A9"><v>9</v></c></row>'
+            b'</sheetData></worksheet>'
+        )
+        settings = ReportSettings(
+            start_row=2,
+            end_row=4,
+            full_name_cell="B1",
+            month_cell="C10",
+            year_cell="D10",
+        )
+        identity = build_report_identity(
+            "jan.kowalski", current_time=datetime(2026, 5, 20, 12, 0)
+        )
+        data = [
+            {"date": "18.05.2026", "program_title": "A", "description": "B", "duration": 1},
+            {"date": "19.05.2026", "program_title": "C", "description": "D", "duration": 2},
+        ]
+
+        root = etree.fromstring(
+            _populate_worksheet(worksheet_xml, data, settings, identity)
+        )
+
+        rows = root.xpath("//m:row", namespaces=NSMAP)
+        self.assertEqual([row.get("r") for row in rows], ["1", "2", "3", "9", "10"])
+        self.assertEqual(
+            [cell.get("r") for cell in rows[0]], ["A1", "B1"]
+        )
+        self.assertEqual(
+            [cell.get("r") for cell in rows[2]],
+            ["E3", "F3", "G3", "H3", "J3", "K3"],
+        )
+        self.assertEqual(self._cell_value(root, "E3"), "46161")
+        self.assertEqual(self._cell_text(root, "C10"), "MAJ")
+        self.assertEqual(
+            root.xpath("//m:c[@r='K3']/m:f/text()", namespaces=NSMAP), ["SUM(J3)"]
+        )
+
     @staticmethod
     def _cell(root, reference):
         return root.xpath(f"//m:c[@r='{reference}']", namespaces=NSMAP)[0]
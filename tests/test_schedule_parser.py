@@ -1,9 +1,18 @@
 import unittest
+from datetime import date
 from pathlib import Path
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
 from backend.config import ScheduleConfig
-from backend.schedule_parser import ScheduleParser
+from backend.schedule_entry import ScheduleEntry
+from backend.schedule_parser import (
+    LXML_PARSER,
+    LXML_STREAM_PARSER,
+    ScheduleParser,
+    convert_date_header,
+    duration_minutes,
+    time_to_minutes,
+)
 
 
 FIXTURES = Path(__file__).parent / "fixtures"
@@ -92,6 +101,142 @@ class ScheduleParserTests(unittest.TestCase):
 
         self.assertEqual(parser.get_parsed_data(), [])
 
+    def test_lxml_backends_match_html_parser_output(self):
+        multi_day = """
+            <table>
+                <tr><th class="gpt-table-section-header wide">wtorek, 19 maja 2026</th></tr>
+                <tr>
+                    <td><table><tr><td><span>SKRÓT&nbsp;MECZU</span></td></tr></table></td>
+                    <td><span class="small text-bold">08:00&nbsp;-&nbsp;09:15</span></td>
+                </tr>
+                <tr><th class="gpt-table-section-header">środa, 20 maja 2026</th></tr>
+                <tr>
+                    <td><table><tr><td><span>MECZ TESTOWY</span></td></tr></table></td>
+                    <td><span class="text-bold">23:00 - 23:00</span></td>
+                </tr>
+            </table>
+        """
+        cases = [
+            (True, (FIXTURES / "personal_schedule.html").read_text(encoding="utf-8")),
+            (False, (FIXTURES / "general_schedule.html").read_text(encoding="utf-8")),
+            (True, multi_day),
+            (False, ""),
+        ]
+        for is_personal, html in cases:
+            with self.subTest(is_personal=is_personal, html=html[:40]):
+                results = []
+                for parser_name in ("html.parser", LXML_PARSER, LXML_STREAM_PARSER):
+                    config = _config(is_personal)
+                    with patch.object(
+                        config,
+                        "get_program_titles_dict",
+                        return_value={"MECZ TESTOWY": "Liga Polska"},
+                    ):
+                        parser = ScheduleParser(html, config, parser_name)
+                        parser.parse_schedule()
+                    results.append(parser.get_parsed_data())
+                for result in results[1:]:
+                    self.assertEqual(repr(results[0]), repr(result))
+
+    def test_stream_parser_reads_the_page_in_small_text_chunks(self):
+        html = (FIXTURES / "personal_schedule.html").read_text(encoding="utf-8")
+        results = []
+        for parser_name in ("html.parser", LXML_STREAM_PARSER):
+            config = _config(is_personal=True)
+            with patch("backend.schedule_parser.STREAM_CHUNK_SIZE", 7), patch.object(
+                config, "get_program_titles_dict", return_value={"MECZ TESTOWY": "Liga Polska"}
+            ):
+                parser = ScheduleParser(html, config, parser_name)
+                parser.parse_schedule()
+            results.append(repr(parser.get_parsed_data()))
+
+        self.assertEqual(results[0], results[1])
+
+    def test_entries_keep_the_row_dict_interface_and_share_strings(self):
+        config = _config(is_personal=False)
+        html = (FIXTURES / "general_schedule.html").read_text(encoding="utf-8")
+        parser = ScheduleParser(html + html, config)
+        parser.parse_schedule()
+
+        first, second = parser.get_parsed_data()[:2]
+        self.assertIsInstance(first, ScheduleEntry)
+        self.assertEqual(dict(first), first.as_dict())
+        self.assertEqual(first["editor"], first.editor)
+        self.assertEqual(first.get("missing", "-"), "-")
+        self.assertIs(first.description, second.description)
+
+        personal = ScheduleEntry("18.05.2026", "", "MECZ", "", 1.0, "10:00", "11:00")
+        self.assertNotIn("editor", personal)
+        with self.assertRaises(KeyError):
+            personal["editor"]
+
+    def test_set_parsed_data_accepts_row_dicts(self):
+        parser = ScheduleParser("", _config(is_personal=True))
+        row = {
+            "date": "18.05.2026",
+            "program_title": "Liga Polska",
+            "description": "MECZ TESTOWY",
+            "activity": "",
+            "duration": 2.5,
+            "start_time": "22:30",
+            "end_time": "01:00",
+        }
+
+        parser.set_parsed_data([row])
+
+        self.assertEqual(parser.get_parsed_data(), [ScheduleEntry.from_dict(row)])
+        self.assertEqual(parser.get_parsed_data()[0].as_dict(), row)
+
+    def test_durations_are_exact_minutes_across_midnight(self):
+        self.assertEqual(time_to_minutes("00:00"), 0)
+        self.assertEqual(time_to_minutes("23:59"), 1439)
+        self.assertEqual(time_to_minutes("8:05"), 485)
+        self.assertEqual(duration_minutes("22:30", "01:00"), 150)
+        self.assertEqual(duration_minutes("23:00", "23:00"), 0)
+        for value in ("24:00", "12:60", "12.30", ""):
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                time_to_minutes(value)
+
+        entry = ScheduleEntry("18.05.2026", "", "MECZ", "", 0.33, "10:00", "10:20")
+        self.assertEqual(entry.duration_minutes, 20)
+        self.assertNotIn("duration_minutes", entry.as_dict())
+
+    def test_date_headers_become_memoized_date_objects(self):
+        convert_date_header.cache_clear()
+        html = (FIXTURES / "general_schedule.html").read_text(encoding="utf-8")
+        parser = ScheduleParser(html + html, _config(is_personal=False), LXML_PARSER)
+        parser.parse_schedule()
+
+        first, second = parser.get_parsed_data()[:2]
+        self.assertEqual(first.date, date(2026, 5, 18))
+        self.assertIs(first.date, second.date)
+        self.assertEqual(first["date"], "18.05.2026")
+        self.assertEqual(convert_date_header.cache_info().misses, 1)
+        self.assertEqual(
+            ScheduleEntry("4.05.2026", "", "MECZ", "", 1.0, "10:00", "11:00").as_tuple()[0],
+            "4.05.2026",
+        )
+
+    def test_titles_are_resolved_once_per_distinct_description_and_export(self):
+        config = _config(is_personal=False)
+        html = (FIXTURES / "general_schedule.html").read_text(encoding="utf-8")
+        resolver = Mock()
+        resolver.lookup_many.side_effect = lambda descriptions: {
+            description: "Liga Polska" for description in descriptions
+        }
+        title_cache = {}
+
+        with patch("backend.schedule_parser.ProgramTitles.index_for", return_value=resolver):
+            for _ in range(2):
+                parser = ScheduleParser(html * 3, config, LXML_PARSER, title_cache)
+                parser.parse_schedule()
+
+        resolver.lookup_many.assert_called_once_with({"MECZ TESTOWY"})
+        self.assertEqual(title_cache, {"MECZ TESTOWY": "Liga Polska"})
+        self.assertEqual(
+            [entry.program_title for entry in parser.get_parsed_data()], ["Liga Polska"] * 3
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,13 +1,29 @@
+import os
+import sqlite3
 import tempfile
+import threading
+import time
 import unittest
+from datetime import date, timedelta
+from io import BytesIO
 from pathlib import Path
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 
 import requests
 from openpyxl import load_workbook
 
 from backend.config import DEFAULT_INSTALLATION_FILENAME, ScheduleConfig
-from backend.schedule_scraper import LoginError, ScheduleFetchError, ScheduleScraper
+from backend.circuit_breaker import CLOSED, HALF_OPEN, OPEN, Admission
+from backend.schedule_scraper import (
+    CIRCUIT_BREAKER,
+    PARSE_POOL,
+    SCHEDULE_FLIGHTS,
+    SESSION_POOL,
+    LoginError,
+    ScheduleFetchError,
+    ScheduleScraper,
+)
+from backend.week_cache import CachedWeek, WeekCache
 
 
 FIXTURES = Path(__file__).parent / "fixtures"
@@ -20,34 +36,69 @@ GENERAL_URL = (
     "https://gpt.canalplus.pl/Schedule/Editing"
     "?date=05%2F18%2F2026%2000%3A00%3A00"
 )
+# Keeps the process-wide caches and limits from leaking between tests
+SCRAPER_ENVIRONMENT = {
+    "SCHEDULE_CACHE": "false",
+    "SCHEDULE_SESSION_POOL_SIZE": "0",
+    "SCHEDULE_UPSTREAM_RATE": "0",
+}
 
 
-def _response(text: str) -> Mock:
+def _response(
+    text: str, status_code: int = 200, headers: dict | None = None, url: str = ""
+) -> Mock:
     response = Mock()
     response.text = text
+    response.status_code = status_code
+    response.headers = headers or {}
+    response.url = url
     response.raise_for_status.return_value = None
     return response
 
 
-class ScheduleScraperTests(unittest.TestCase):
-    def _config(self, directory: str, is_personal: bool) -> ScheduleConfig:
-        return ScheduleConfig(
-            username="jan.kowalski",
-            password="secret",
-            output_dir=directory,
-            output_filename=DEFAULT_INSTALLATION_FILENAME,
-            start_date="2026-05-20",
-            end_date="2026-05-20",
-            is_personal=is_personal,
-            use_template_export=False,
-        )
+def _schedule_config(
+    directory: str = "",
+    is_personal: bool = True,
+    start_date: str = "2026-05-20",
+    username: str = "jan.kowalski",
+    password: str = "secret",
+) -> ScheduleConfig:
+    return ScheduleConfig(
+        username=username,
+        password=password,
+        output_dir=directory,
+        output_filename=DEFAULT_INSTALLATION_FILENAME,
+        start_date=start_date,
+        end_date=start_date,
+        is_personal=is_personal,
+        use_template_export=False,
+    )
+
+
+class ScraperTestCase(unittest.TestCase):
+    """Runs every test with SCRAPER_ENVIRONMENT plus `environment` and a closed circuit"""
+
+    environment: dict = {}
 
+    def setUp(self):
+        environment = patch.dict(os.environ, {**SCRAPER_ENVIRONMENT, **self.environment})
+        environment.start()
+        self.addCleanup(environment.stop)
+        CIRCUIT_BREAKER.reset()
+        self.addCleanup(CIRCUIT_BREAKER.reset)
+
+    def _scraper(self, **config_options) -> ScheduleScraper:
+        """Scraper whose mocked session logs in successfully"""
+        scraper = ScheduleScraper(_schedule_config(**config_options))
+        scraper.session = Mock()
+        scraper.session.post.return_value = _response("Zalogowano")
+        return scraper
+
+
+class ScheduleScraperTests(ScraperTestCase):
     def _run_successful_scrape(self, is_personal: bool, fixture: str, url: str):
         with tempfile.TemporaryDirectory() as directory:
-            config = self._config(directory, is_personal)
-            scraper = ScheduleScraper(config)
-            scraper.session = Mock()
-            scraper.session.post.return_value = _response("Zalogowano")
+            scraper = self._scraper(directory=directory, is_personal=is_personal)
             scraper.session.get.return_value = _response(
                 (FIXTURES / fixture).read_text(encoding="utf-8")
             )
@@ -85,10 +136,18 @@ class ScheduleScraperTests(unittest.TestCase):
             url=GENERAL_URL,
         )
 
+    def test_weeks_can_be_parsed_in_worker_processes(self):
+        self.addCleanup(PARSE_POOL.shutdown)
+        with patch.dict(os.environ, {"SCHEDULE_PARSE_WORKERS": "1"}):
+            self._run_successful_scrape(
+                is_personal=False,
+                fixture="general_schedule.html",
+                url=GENERAL_URL,
+            )
+
     def test_invalid_credentials_stop_before_schedule_request(self):
         with tempfile.TemporaryDirectory() as directory:
-            scraper = ScheduleScraper(self._config(directory, is_personal=True))
-            scraper.session = Mock()
+            scraper = self._scraper(directory=directory)
             scraper.session.post.return_value = _response(
                 "Niepoprawny identyfikator lub hasło."
             )
@@ -100,9 +159,7 @@ class ScheduleScraperTests(unittest.TestCase):
 
     def test_schedule_http_error_becomes_fetch_error(self):
         with tempfile.TemporaryDirectory() as directory:
-            scraper = ScheduleScraper(self._config(directory, is_personal=True))
-            scraper.session = Mock()
-            scraper.session.post.return_value = _response("Zalogowano")
+            scraper = self._scraper(directory=directory)
             failed_response = _response("")
             failed_response.raise_for_status.side_effect = requests.HTTPError("503")
             scraper.session.get.return_value = failed_response
@@ -112,9 +169,7 @@ class ScheduleScraperTests(unittest.TestCase):
 
     def test_unrecognized_html_contract_becomes_fetch_error(self):
         with tempfile.TemporaryDirectory() as directory:
-            scraper = ScheduleScraper(self._config(directory, is_personal=True))
-            scraper.session = Mock()
-            scraper.session.post.return_value = _response("Zalogowano")
+            scraper = self._scraper(directory=directory)
             scraper.session.get.return_value = _response(
                 "<html><body><p>Struktura strony uległa zmianie</p></body></html>"
             )
@@ -126,6 +181,534 @@ class ScheduleScraperTests(unittest.TestCase):
                 (Path(directory) / DEFAULT_INSTALLATION_FILENAME).exists()
             )
 
+    def test_workbook_can_be_written_to_memory_without_touching_disk(self):
+        with tempfile.TemporaryDirectory() as directory:
+            scraper = self._scraper(directory=directory)
+            scraper.session.get.return_value = _response(
+                (FIXTURES / "personal_schedule.html").read_text(encoding="utf-8")
+            )
+            output = BytesIO()
+
+            filename = scraper.scrape_schedule(output)
+
+            self.assertEqual(filename, DEFAULT_INSTALLATION_FILENAME)
+            self.assertEqual(list(Path(directory).iterdir()), [])
+            workbook = load_workbook(output, read_only=True)
+            try:
+                rows = list(workbook.active.iter_rows(values_only=True))
+            finally:
+                workbook.close()
+            self.assertEqual(rows[1][2], "MECZ TESTOWY")
+
+    def test_weeks_are_fetched_concurrently_and_kept_in_date_order(self):
+        template = (FIXTURES / "personal_schedule.html").read_text(encoding="utf-8")
+        headers = {
+            "05%2F04%2F2026": ("poniedziałek, 4 maja 2026", 0.15),
+            "05%2F11%2F2026": ("poniedziałek, 11 maja 2026", 0.05),
+            "05%2F18%2F2026": ("poniedziałek, 18 maja 2026", 0.0),
+        }
+
+        def fetch(url, timeout):
+            # Earlier weeks respond last, so completion order is reversed.
+            header, delay = next(
+                value for key, value in headers.items() if key in url
+            )
+            time.sleep(delay)
+            return _response(
+                template.replace("poniedziałek, 18 maja 2026", header)
+            )
+
+        with tempfile.TemporaryDirectory() as directory:
+            scraper = self._scraper(directory=directory)
+            scraper.schedule_config.start_date = "2026-05-04"
+            scraper.config.fetch_workers = 3
+            scraper.session.get.side_effect = fetch
+
+            weeks = []
+            scraper.scrape_schedule(on_week=weeks.append)
+
+            self.assertEqual(scraper.session.get.call_count, 3)
+            self.assertEqual(
+                [(week["week"], week["index"], week["rows"]) for week in weeks],
+                [("04.05.2026", 1, 1), ("11.05.2026", 2, 1), ("18.05.2026", 3, 1)],
+            )
+            self.assertGreaterEqual(weeks[0]["fetchSeconds"], 0.15)
+            workbook = load_workbook(
+                Path(directory) / DEFAULT_INSTALLATION_FILENAME, read_only=True
+            )
+            try:
+                dates = [
+                    row[0]
+                    for row in workbook.active.iter_rows(min_row=2, values_only=True)
+                ]
+            finally:
+                workbook.close()
+            self.assertEqual(dates, ["4.05.2026", "11.05.2026", "18.05.2026"])
+
+
+def _http_error_response(status_code: int, headers: dict | None = None) -> Mock:
+    response = _response("", status_code=status_code, headers=headers)
+    response.raise_for_status.side_effect = requests.HTTPError(
+        f"{status_code} Server Error", response=response
+    )
+    return response
+
+
+class RetryTests(ScraperTestCase):
+    environment = {"SCHEDULE_RETRY_ATTEMPTS": "3", "SCHEDULE_RETRY_BUDGET": "8"}
+
+    def setUp(self):
+        super().setUp()
+        sleep = patch("backend.schedule_scraper.time.sleep")
+        self.sleep = sleep.start()
+        self.addCleanup(sleep.stop)
+        self.html = (FIXTURES / "personal_schedule.html").read_text(encoding="utf-8")
+
+    def test_transient_errors_are_retried_with_backoff(self):
+        scraper = self._scraper()
+        scraper.session.get.side_effect = [
+            _http_error_response(502),
+            requests.ConnectionError("reset"),
+            _response(self.html),
+        ]
+
+        scraper.scrape_schedule(BytesIO())
+
+        self.assertEqual(scraper.session.get.call_count, 3)
+        self.assertEqual(self.sleep.call_count, 2)
+        for (delay,), _ in self.sleep.call_args_list:
+            self.assertLessEqual(delay, 10.0)
+
+    def test_retry_after_header_is_honored(self):
+        scraper = self._scraper()
+        scraper.session.get.side_effect = [
+            _http_error_response(503, headers={"Retry-After": "7"}),
+            _response(self.html),
+        ]
+
+        scraper.scrape_schedule(BytesIO())
+
+        self.sleep.assert_called_once_with(7.0)
+
+    def test_client_errors_are_not_retried(self):
+        scraper = self._scraper()
+        scraper.session.get.return_value = _http_error_response(404)
+
+        with self.assertRaises(ScheduleFetchError):
+            scraper.scrape_schedule(BytesIO())
+
+        scraper.session.get.assert_called_once()
+        self.sleep.assert_not_called()
+
+    def test_retries_stop_when_export_budget_is_spent(self):
+        with patch.dict(os.environ, {"SCHEDULE_RETRY_ATTEMPTS": "10", "SCHEDULE_RETRY_BUDGET": "2"}):
+            scraper = self._scraper()
+        scraper.session.get.return_value = _http_error_response(502)
+
+        with self.assertRaises(ScheduleFetchError):
+            scraper.scrape_schedule(BytesIO())
+
+        self.assertEqual(scraper.session.get.call_count, 3)
+
+    def test_week_failing_after_retries_fails_the_export(self):
+        scraper = self._scraper(start_date="2026-05-11")
+        scraper.schedule_config.end_date = "2026-05-20"
+        scraper.session.get.side_effect = lambda url, **options: (
+            _http_error_response(502) if "05%2F11%2F2026" in url else _response(self.html)
+        )
+        output = BytesIO()
+
+        with self.assertRaises(ScheduleFetchError) as raised:
+            scraper.scrape_schedule(output)
+
+        self.assertIn("11.05.2026", raised.exception.args[0]["message"])
+        self.assertEqual(output.getvalue(), b"")
+
+    def test_retry_after_beyond_deadline_is_not_awaited(self):
+        with patch.dict(os.environ, {"SCHEDULE_EXPORT_DEADLINE": "60"}):
+            scraper = self._scraper()
+        scraper.session.get.return_value = _http_error_response(
+            503, headers={"Retry-After": "3600"}
+        )
+
+        with self.assertRaises(ScheduleFetchError):
+            scraper.scrape_schedule(BytesIO())
+
+        scraper.session.get.assert_called_once()
+        self.sleep.assert_not_called()
+
+
+class CircuitBreakerTests(ScraperTestCase):
+    environment = {
+        "SCHEDULE_RETRY_ATTEMPTS": "1",
+        "SCHEDULE_CIRCUIT_FAILURES": "2",
+        "SCHEDULE_CIRCUIT_RESET": "30",
+    }
+
+    def _scraper(self) -> ScheduleScraper:
+        scraper = super()._scraper()
+        scraper.session.get.side_effect = requests.Timeout("read timed out")
+        return scraper
+
+    def _trip(self):
+        for _ in range(2):
+            with self.assertRaises(ScheduleFetchError):
+                self._scraper().scrape_schedule(BytesIO())
+        self.assertEqual(CIRCUIT_BREAKER.state, OPEN)
+
+    def test_open_circuit_fails_fast_without_contacting_upstream(self):
+        self._trip()
+        scraper = self._scraper()
+
+        with self.assertRaises(ScheduleFetchError) as raised:
+            scraper.scrape_schedule(BytesIO())
+
+        self.assertEqual(raised.exception.args[0]["title"], "Błąd pobierania grafiku")
+        scraper.session.post.assert_not_called()
+        scraper.session.get.assert_not_called()
+
+    def test_successful_probe_closes_circuit(self):
+        self._trip()
+        html = (FIXTURES / "personal_schedule.html").read_text(encoding="utf-8")
+        probe = self._scraper()
+        probe.session.get.side_effect = None
+        probe.session.get.return_value = _response(html)
+
+        with patch("backend.circuit_breaker.time.monotonic", return_value=time.monotonic() + 31):
+            probe.scrape_schedule(BytesIO())
+
+        self.assertEqual(CIRCUIT_BREAKER.state, CLOSED)
+
+    def test_failed_probe_reopens_circuit(self):
+        self._trip()
+
+        with patch("backend.circuit_breaker.time.monotonic", return_value=time.monotonic() + 31):
+            with self.assertRaises(ScheduleFetchError):
+                self._scraper().scrape_schedule(BytesIO())
+
+        self.assertEqual(CIRCUIT_BREAKER.state, OPEN)
+
+    def test_only_one_probe_is_let_through_while_half_open(self):
+        self._trip()
+
+        with patch("backend.circuit_breaker.time.monotonic", return_value=time.monotonic() + 31):
+            probe = CIRCUIT_BREAKER.allow(30).probe
+            self.assertIsNotNone(probe)
+            self.assertEqual(CIRCUIT_BREAKER.state, HALF_OPEN)
+            self.assertFalse(CIRCUIT_BREAKER.allow(30))
+            CIRCUIT_BREAKER.release_probe(probe)
+            self.assertTrue(CIRCUIT_BREAKER.allow(30))
+
+    def test_exports_started_before_opening_do_not_release_the_probe(self):
+        started_while_closed = CIRCUIT_BREAKER.allow(30)
+        self.assertTrue(started_while_closed)
+        self.assertIsNone(started_while_closed.probe)
+        self._trip()
+
+        with patch("backend.circuit_breaker.time.monotonic", return_value=time.monotonic() + 31):
+            probe = CIRCUIT_BREAKER.allow(30)
+            self.assertIsNotNone(probe.probe)
+            CIRCUIT_BREAKER.release_probe(started_while_closed.probe)
+
+            self.assertFalse(CIRCUIT_BREAKER.allow(30))
+            # Only the probe may keep sending requests while half-open
+            self.assertTrue(CIRCUIT_BREAKER.is_open(started_while_closed.probe))
+            self.assertFalse(CIRCUIT_BREAKER.is_open(probe.probe))
+
+    def test_running_export_stops_while_another_export_probes(self):
+        self._trip()
+        html = (FIXTURES / "personal_schedule.html").read_text(encoding="utf-8")
+        scraper = self._scraper()
+        scraper.session.get.side_effect = None
+        scraper.session.get.return_value = _response(html)
+
+        with patch("backend.circuit_breaker.time.monotonic", return_value=time.monotonic() + 31):
+            probe = CIRCUIT_BREAKER.allow(30)
+            with patch.object(CIRCUIT_BREAKER, "allow", return_value=Admission(True)):
+                with self.assertRaises(ScheduleFetchError):
+                    scraper.scrape_schedule(BytesIO())
+            scraper.session.post.assert_not_called()
+            self.assertFalse(CIRCUIT_BREAKER.allow(30))
+            CIRCUIT_BREAKER.release_probe(probe.probe)
+
+    def test_client_errors_do_not_trip_circuit(self):
+        for _ in range(3):
+            scraper = self._scraper()
+            scraper.session.get.side_effect = None
+            scraper.session.get.return_value = _http_error_response(404)
+            with self.assertRaises(ScheduleFetchError):
+                scraper.scrape_schedule(BytesIO())
+
+        self.assertEqual(CIRCUIT_BREAKER.state, CLOSED)
+
+
+class WeekCacheTests(ScraperTestCase):
+    def _scraper(self, directory: str, start_date: str) -> ScheduleScraper:
+        scraper = super()._scraper(directory=directory, start_date=start_date)
+        scraper.config.week_cache_enabled = True
+        scraper.config.week_cache_dir = str(Path(directory) / "cache")
+        scraper.config.week_cache_ttl = 600
+        scraper.config.week_cache_closed_after_days = 35
+        return scraper
+
+    def test_closed_weeks_are_served_from_cache(self):
+        html = (FIXTURES / "personal_schedule.html").read_text(encoding="utf-8")
+        with tempfile.TemporaryDirectory() as directory:
+            first = self._scraper(directory, "2026-05-20")
+            first.session.get.return_value = _response(html)
+            first.scrape_schedule(BytesIO())
+
+            second = self._scraper(directory, "2026-05-20")
+            with patch("backend.week_cache.date") as today:
+                today.today.return_value = date(2026, 8, 1)
+                second.scrape_schedule(BytesIO())
+
+            first.session.get.assert_called_once()
+            second.session.get.assert_not_called()
+            second.session.post.assert_called_once()
+
+    def test_stale_open_week_is_revalidated_with_conditional_get(self):
+        monday = date.today() - timedelta(days=date.today().weekday())
+        html = (FIXTURES / "personal_schedule.html").read_text(encoding="utf-8")
+        with tempfile.TemporaryDirectory() as directory:
+            first = self._scraper(directory, monday.isoformat())
+            first.session.get.return_value = _response(
+                html,
+                headers={"ETag": '"v1"', "Last-Modified": "Mon, 18 May 2026 08:00:00 GMT"},
+            )
+            first.scrape_schedule(BytesIO())
+
+            second = self._scraper(directory, monday.isoformat())
+            second.config.week_cache_ttl = 0
+            second.session.get.return_value = _response("", status_code=304)
+            output = BytesIO()
+            second.scrape_schedule(output)
+
+            _, options = second.session.get.call_args
+            self.assertEqual(
+                options["headers"],
+                {
+                    "If-None-Match": '"v1"',
+                    "If-Modified-Since": "Mon, 18 May 2026 08:00:00 GMT",
+                },
+            )
+            workbook = load_workbook(output, read_only=True)
+            try:
+                rows = list(workbook.active.iter_rows(values_only=True))
+            finally:
+                workbook.close()
+            self.assertEqual(rows[1][2], "MECZ TESTOWY")
+
+    def test_pages_without_schedule_are_not_cached(self):
+        with tempfile.TemporaryDirectory() as directory:
+            scraper = self._scraper(directory, "2026-05-20")
+            scraper.session.get.return_value = _response("<html>Logowanie</html>")
+
+            with self.assertRaises(ScheduleFetchError):
+                scraper.scrape_schedule(BytesIO())
+
+            self.assertFalse((Path(directory) / "cache").exists())
+
+    def test_entries_not_used_within_max_age_are_pruned(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = WeekCache(directory, ttl=600, closed_after_days=35, max_age=3600)
+            entry = CachedWeek(html="<html></html>", fetched_at=time.time())
+            for key in ("unused", "used"):
+                cache.store(key, entry)
+                two_hours_ago = time.time() - 7200
+                os.utime(Path(directory) / f"{key}.json.gz", (two_hours_ago, two_hours_ago))
+
+            self.assertIsNotNone(cache.load("used"))
+            self.assertEqual(cache.prune(force=True), 1)
+
+            self.assertIsNone(cache.load("unused"))
+            self.assertIsNotNone(cache.load("used"))
+
+
+class SessionPoolTests(ScraperTestCase):
+    environment = {"SCHEDULE_SESSION_POOL_SIZE": "4"}
+
+    def setUp(self):
+        super().setUp()
+        SESSION_POOL.clear()
+        self.addCleanup(SESSION_POOL.clear)
+
+    def test_logged_in_session_is_reused_by_next_export(self):
+        html = (FIXTURES / "personal_schedule.html").read_text(encoding="utf-8")
+        first = self._scraper()
+        first.session.get.return_value = _response(html)
+        first.scrape_schedule(BytesIO())
+
+        second = self._scraper()
+        unused_session = second.session
+        second.scrape_schedule(BytesIO())
+
+        self.assertIs(second.session, first.session)
+        first.session.post.assert_called_once()
+        self.assertEqual(first.session.get.call_count, 2)
+        unused_session.post.assert_not_called()
+
+    def test_pooled_session_requires_matching_password(self):
+        html = (FIXTURES / "personal_schedule.html").read_text(encoding="utf-8")
+        first = self._scraper()
+        first.session.get.return_value = _response(html)
+        first.scrape_schedule(BytesIO())
+
+        second = self._scraper(password="wrong")
+        second.session.post.return_value = _response(
+            "Niepoprawny identyfikator lub hasło."
+        )
+
+        with self.assertRaises(LoginError):
+            second.scrape_schedule(BytesIO())
+
+        self.assertIsNot(second.session, first.session)
+        first.session.get.assert_called_once()
+
+    def test_expired_session_logs_in_again_and_retries(self):
+        html = (FIXTURES / "personal_schedule.html").read_text(encoding="utf-8")
+        scraper = self._scraper()
+        scraper.session.get.side_effect = [
+            _response("<html>Logowanie</html>", url=LOGIN_URL + "?ReturnUrl=%2FUser%2FSchedule"),
+            _response(html),
+        ]
+
+        scraper.scrape_schedule(BytesIO())
+
+        self.assertEqual(scraper.session.post.call_count, 2)
+        self.assertEqual(scraper.session.get.call_count, 2)
+
+    def test_failed_relogin_raises_login_error(self):
+        scraper = self._scraper()
+        scraper.session.post.side_effect = [
+            _response("Zalogowano"),
+            _response("Niepoprawny identyfikator lub hasło."),
+        ]
+        scraper.session.get.return_value = _response(
+            "<html>Logowanie</html>", url=LOGIN_URL
+        )
+
+        with self.assertRaises(LoginError):
+            scraper.scrape_schedule(BytesIO())
+
+        self.assertEqual(len(SESSION_POOL), 0)
+
+
+class ExportCoalescingTests(ScraperTestCase):
+    def _scraper(self, username: str) -> ScheduleScraper:
+        return super()._scraper(username=username, is_personal=False)
+
+    def test_identical_concurrent_exports_share_one_fetch(self):
+        html = (FIXTURES / "general_schedule.html").read_text(encoding="utf-8")
+        fetch_started = threading.Event()
+        release = threading.Event()
+
+        def slow_fetch(url, timeout):
+            fetch_started.set()
+            release.wait(5)
+            return _response(html)
+
+        leader = self._scraper("jan.kowalski")
+        leader.session.get.side_effect = slow_fetch
+        follower = self._scraper("anna.nowak")
+        outputs = {"leader": BytesIO(), "follower": BytesIO()}
+        threads = [
+            threading.Thread(target=leader.scrape_schedule, args=(outputs["leader"],)),
+            threading.Thread(target=follower.scrape_schedule, args=(outputs["follower"],)),
+        ]
+
+        threads[0].start()
+        self.assertTrue(fetch_started.wait(5))
+        threads[1].start()
+        deadline = time.monotonic() + 5
+        while not follower.session.post.called and time.monotonic() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.05)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        leader.session.get.assert_called_once()
+        follower.session.post.assert_called_once()
+        follower.session.get.assert_not_called()
+        self.assertEqual(len(SCHEDULE_FLIGHTS), 0)
+        for output in outputs.values():
+            workbook = load_workbook(output, read_only=True)
+            try:
+                rows = list(workbook.active.iter_rows(min_row=2, values_only=True))
+            finally:
+                workbook.close()
+            self.assertTrue(rows)
+
+    def test_general_weeks_are_shared_through_parsed_week_cache(self):
+        html = (FIXTURES / "general_schedule.html").read_text(encoding="utf-8")
+        with tempfile.TemporaryDirectory() as directory:
+            scrapers = [self._scraper("jan.kowalski"), self._scraper("anna.nowak")]
+            for scraper in scrapers:
+                scraper.config.shared_week_cache_enabled = True
+                scraper.config.shared_week_cache_path = str(Path(directory) / "weeks.sqlite3")
+                scraper.session.get.return_value = _response(html)
+            first_output, second_output = BytesIO(), BytesIO()
+
+            scrapers[0].scrape_schedule(first_output)
+            scrapers[1].scrape_schedule(second_output)
+
+            scrapers[0].session.get.assert_called_once()
+            scrapers[1].session.post.assert_called_once()
+            scrapers[1].session.get.assert_not_called()
+            rows = []
+            for output in (first_output, second_output):
+                workbook = load_workbook(output, read_only=True)
+                try:
+                    rows.append(list(workbook.active.iter_rows(values_only=True)))
+                finally:
+                    workbook.close()
+            self.assertEqual(rows[0], rows[1])
+
+    def _assert_lease_released_after_failure(self, scraper: ScheduleScraper, path: Path):
+        with self.assertRaises((ScheduleFetchError, ValueError)):
+            scraper.scrape_schedule(BytesIO())
+
+        connection = sqlite3.connect(path)
+        try:
+            self.assertEqual(connection.execute("SELECT COUNT(*) FROM leases").fetchone()[0], 0)
+        finally:
+            connection.close()
+
+    def test_failed_fetch_releases_shared_week_lease(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "weeks.sqlite3"
+            scraper = self._scraper("jan.kowalski")
+            scraper.config.shared_week_cache_enabled = True
+            scraper.config.shared_week_cache_path = str(path)
+            scraper.session.get.return_value = _http_error_response(404)
+
+            self._assert_lease_released_after_failure(scraper, path)
+
+    def test_failed_parse_releases_shared_week_lease(self):
+        html = (FIXTURES / "general_schedule.html").read_text(encoding="utf-8")
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "weeks.sqlite3"
+            scraper = self._scraper("jan.kowalski")
+            scraper.config.shared_week_cache_enabled = True
+            scraper.config.shared_week_cache_path = str(path)
+            scraper.session.get.return_value = _response(html)
+
+            with patch("backend.schedule_scraper.parse_week_rows", side_effect=ValueError("broken row")):
+                self._assert_lease_released_after_failure(scraper, path)
+
+    def test_failed_login_does_not_join_export(self):
+        scraper = self._scraper("jan.kowalski")
+        scraper.session.post.return_value = _response(
+            "Niepoprawny identyfikator lub hasło."
+        )
+
+        with patch.object(SCHEDULE_FLIGHTS, "do") as join:
+            with self.assertRaises(LoginError):
+                scraper.scrape_schedule(BytesIO())
+
+        join.assert_not_called()
+
 
 if __name__ == "__main__":
     unittest.main()
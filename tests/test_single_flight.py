@@ -0,0 +1,48 @@
+import threading
+import unittest
+
+from backend.single_flight import SingleFlight
+
+
+class SingleFlightTests(unittest.TestCase):
+    def test_concurrent_callers_share_result(self):
+        flights = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+        results = []
+
+        def work():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return ["row"]
+
+        leader = threading.Thread(target=lambda: results.append(flights.do("key", work)))
+        leader.start()
+        self.assertTrue(started.wait(5))
+        follower = threading.Thread(target=lambda: results.append(flights.do("key", work)))
+        follower.start()
+        follower.join(0.05)
+        release.set()
+        leader.join(5)
+        follower.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertCountEqual(results, [(["row"], False), (["row"], True)])
+        self.assertEqual(len(flights), 0)
+
+    def test_exception_is_raised_and_key_released(self):
+        flights = SingleFlight()
+
+        def fail():
+            raise ValueError("upstream")
+
+        with self.assertRaises(ValueError):
+            flights.do("key", fail)
+
+        self.assertEqual(flights.do("key", lambda: 1), (1, False))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import sqlite3
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from backend.sqlite_connections import SQLiteConnections, get_connections
+
+
+SCHEMA = "CREATE TABLE IF NOT EXISTS items (name TEXT PRIMARY KEY);"
+
+
+class SQLiteConnectionsTests(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = str(Path(directory.name) / "nested" / "items.sqlite3")
+
+    def test_each_thread_keeps_one_connection(self):
+        connections = SQLiteConnections(self.path, SCHEMA)
+        self.addCleanup(connections.close)
+
+        with patch("backend.sqlite_connections.sqlite3.connect", wraps=sqlite3.connect) as connect:
+            self.assertIs(connections.get(), connections.get())
+            worker = threading.Thread(target=lambda: connections.get().execute("SELECT * FROM items"))
+            worker.start()
+            worker.join()
+
+        self.assertEqual(connect.call_count, 2)
+
+    def test_transaction_is_rolled_back_when_the_block_raises(self):
+        connections = SQLiteConnections(self.path, SCHEMA)
+        self.addCleanup(connections.close)
+
+        with self.assertRaises(ValueError):
+            with connections.transaction() as connection:
+                connection.execute("INSERT INTO items (name) VALUES ('lost')")
+                raise ValueError("broken")
+        with connections.transaction() as connection:
+            connection.execute("INSERT INTO items (name) VALUES ('kept')")
+
+        self.assertEqual(connections.get().execute("SELECT name FROM items").fetchall(), [("kept",)])
+
+    def test_users_of_one_database_share_its_connections(self):
+        self.assertIs(get_connections(self.path, SCHEMA), get_connections(self.path, SCHEMA))
+
+
+if __name__ == "__main__":
+    unittest.main()
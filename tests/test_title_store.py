@@ -0,0 +1,114 @@
+import sqlite3
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from backend.config import ScheduleConfig
+from backend.program_titles import TitleIndex, read_titles_csv
+from backend.schedule_parser import ScheduleParser
+from backend.title_store import TitleStore, get_title_store
+
+
+FIXTURES = Path(__file__).parent / "fixtures"
+TITLES_CSV = """Opis;Tytuł programu
+LIGA MISTRZÓW;UEFA Champions League
+LIGA MISTRZÓW SKRÓT;Skróty LM
+liga mistrzow skrot;Duplicate
+ESA SKRÓT;Liga Polska - Ekstraklasa
+MECZ TESTOWY;Liga Polska
+PUSTY;
+"""
+
+
+class TitleStoreTests(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        self.csv_path = self.directory / "program_titles.csv"
+        self.csv_path.write_text(TITLES_CSV, encoding="utf-8")
+        self.db_path = self.directory / "program_titles.sqlite3"
+
+    def test_batched_lookup_matches_the_in_memory_index(self):
+        store = TitleStore(str(self.db_path))
+        store.import_csv(str(self.csv_path))
+        index = TitleIndex(read_titles_csv(str(self.csv_path)))
+        descriptions = [
+            "LIGA MISTRZÓW",
+            "liga mistrzow skrot",
+            "Liga Mistrzów  Skrót",
+            "LIGA MISTRZÓW SKRÓT - Real Madryt",
+            "ESA SKRÓT odc. 4",
+            "PUSTY",
+            "ESA",
+            "",
+        ]
+
+        titles = store.lookup_many(descriptions)
+
+        for description in descriptions[:-1]:
+            with self.subTest(description=description):
+                self.assertEqual(titles[description], index.lookup(description))
+        self.assertNotIn("", titles)
+
+    def test_import_replaces_titles_and_is_skipped_when_unchanged(self):
+        store = TitleStore(str(self.db_path))
+        self.assertTrue(store.import_csv(str(self.csv_path)))
+        version = store.version()
+
+        self.assertFalse(store.import_csv(str(self.csv_path), only_if_changed=True))
+        self.assertEqual(store.version(), version)
+
+        self.csv_path.write_text("MECZ TESTOWY;Ekstraklasa\n", encoding="utf-8")
+        self.assertTrue(store.import_csv(str(self.csv_path), only_if_changed=True))
+        self.assertNotEqual(store.version(), version)
+        self.assertEqual(store.lookup("MECZ TESTOWY"), "Ekstraklasa")
+        self.assertEqual(store.lookup("LIGA MISTRZÓW"), "")
+
+    def test_each_thread_reuses_one_connection(self):
+        store = TitleStore(str(self.db_path))
+        self.addCleanup(store.close)
+        store.import_csv(str(self.csv_path))
+
+        with patch("backend.sqlite_connections.sqlite3.connect", wraps=sqlite3.connect) as connect:
+            for _ in range(3):
+                store.version()
+                store.lookup_many(["LIGA MISTRZÓW", "ESA SKRÓT odc. 4"])
+            worker = threading.Thread(target=store.lookup, args=("LIGA MISTRZÓW",))
+            worker.start()
+            worker.join()
+
+        self.assertEqual(connect.call_count, 1)
+
+    def test_unreadable_dictionary_disables_the_store(self):
+        self.csv_path.write_text("only-one-column\n", encoding="utf-8")
+
+        self.assertIsNone(get_title_store(str(self.db_path), str(self.csv_path), 0))
+
+    def test_parser_resolves_titles_from_the_store(self):
+        config = ScheduleConfig(
+            username="jan.kowalski",
+            password="secret",
+            output_dir=".",
+            output_filename="test.xlsx",
+            start_date="2026-05-18",
+            end_date="2026-05-18",
+            is_personal=False,
+            use_template_export=False,
+            program_titles_csv=str(self.csv_path),
+            program_titles_db=str(self.db_path),
+        )
+        html = (FIXTURES / "general_schedule.html").read_text(encoding="utf-8")
+
+        with patch.object(config, "get_program_titles_dict") as titles_dict:
+            parser = ScheduleParser(html, config)
+            parser.parse_schedule()
+
+        titles_dict.assert_not_called()
+        self.assertEqual([entry.program_title for entry in parser.get_parsed_data()], ["Liga Polska"])
+
+
+if __name__ == "__main__":
+    unittest.main()
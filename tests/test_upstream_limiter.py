@@ -0,0 +1,84 @@
+import tempfile
+import threading
+import time
+import unittest
+
+from backend import upstream_limiter
+from backend.upstream_limiter import UpstreamLimiter
+
+
+class UpstreamLimiterTests(unittest.TestCase):
+    def test_requests_in_flight_are_bounded(self):
+        limiter = UpstreamLimiter()
+        active = 0
+        peak = 0
+        lock = threading.Lock()
+
+        def request():
+            nonlocal active, peak
+            with limiter.slot(max_in_flight=2, rate=0, burst=0):
+                with lock:
+                    active += 1
+                    peak = max(peak, active)
+                time.sleep(0.05)
+                with lock:
+                    active -= 1
+
+        threads = [threading.Thread(target=request) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(peak, 2)
+        self.assertEqual(limiter.stats()["requests"], 6)
+        self.assertEqual(limiter.stats()["inFlight"], 0)
+
+    def test_token_bucket_spaces_requests_after_burst(self):
+        limiter = UpstreamLimiter()
+        started = time.monotonic()
+
+        for _ in range(4):
+            with limiter.slot(max_in_flight=0, rate=20, burst=2):
+                pass
+
+        self.assertGreaterEqual(time.monotonic() - started, 0.09)
+        self.assertGreater(limiter.stats()["waitSeconds"], 0)
+
+    @unittest.skipIf(upstream_limiter.fcntl is None, "fcntl is not available")
+    def test_shared_slots_are_enforced_across_limiters(self):
+        with tempfile.TemporaryDirectory() as directory:
+            # Separate instances stand in for separate worker processes
+            first, second = UpstreamLimiter(), UpstreamLimiter()
+            entered = threading.Event()
+
+            def wait_for_slot():
+                with second.slot(max_in_flight=1, rate=0, burst=0, lock_dir=directory):
+                    entered.set()
+
+            with first.slot(max_in_flight=1, rate=0, burst=0, lock_dir=directory):
+                waiter = threading.Thread(target=wait_for_slot)
+                waiter.start()
+                self.assertFalse(entered.wait(0.2))
+            waiter.join(5)
+
+            self.assertTrue(entered.is_set())
+            self.assertGreaterEqual(second.stats()["maxWaitSeconds"], 0.15)
+
+    @unittest.skipIf(upstream_limiter.fcntl is None, "fcntl is not available")
+    def test_shared_token_bucket_is_used_by_all_limiters(self):
+        with tempfile.TemporaryDirectory() as directory:
+            limiters = [UpstreamLimiter(), UpstreamLimiter()]
+            started = time.monotonic()
+
+            for index in range(4):
+                with limiters[index % 2].slot(
+                    max_in_flight=0, rate=20, burst=2, lock_dir=directory
+                ):
+                    pass
+
+            self.assertGreaterEqual(time.monotonic() - started, 0.09)
+
+
+if __name__ == "__main__":
+    unittest.main()